@@ -0,0 +1,120 @@
+"""Benchmark: batched Levenberg-Marquardt growth-curve fits vs per-series curve_fit.
+
+Generates synthetic saturating inclusion series (ragged lengths, noise), fits
+them with `growth_models.fit_growth_batch` (one vectorized loop for all series)
+and with `scipy.optimize.curve_fit` called once per series using the same
+curve, starting point and bounds, and compares wall time and fit quality:
+
+    python benchmarks/bench_growth_fit.py --series 100 1000 10000 --curve logistic gompertz
+"""
+
+import argparse
+import json
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+import growth_models
+
+
+def synthetic_series(n_series, n_years=6, seed=0):
+    # logistic-shaped rates observed every 3 years from 2009, with 3..n_years points per series
+    rng = np.random.default_rng(seed)
+    years = np.tile(2009.0 + 3.0 * np.arange(n_years), (n_series, 1))
+    ceiling = rng.uniform(40, 95, (n_series, 1))
+    rate = rng.uniform(0.1, 0.5, (n_series, 1))
+    midpoint = rng.uniform(2012, 2026, (n_series, 1))
+    values = ceiling / (1 + np.exp(-rate * (years - midpoint))) + rng.normal(0, 1.5, years.shape)
+    values = np.clip(values, 0.5, 99.5)
+    n_obs = rng.integers(growth_models.MIN_POINTS, n_years + 1, n_series)
+    mask = np.arange(n_years) < n_obs[:, None]
+    return years, values, mask
+
+
+def fit_batched(years, values, mask, curve):
+    fit = growth_models.fit_growth_batch(years, values, mask, curve=curve)
+    return fit['params'], fit['sse'], fit['converged']
+
+
+def fit_per_series(years, values, mask, curve):
+    from scipy.optimize import OptimizeWarning, curve_fit
+
+    def func(t, *p):
+        return growth_models.curve_values(curve, t[None, :], np.array([p]))[0]
+
+    lo_rest, hi_rest = growth_models.PARAM_BOUNDS[curve]
+    n_series = len(values)
+    params = np.full((n_series, 3), np.nan)
+    sse = np.full(n_series, np.nan)
+    ok = np.zeros(n_series, dtype=bool)
+    for i in range(n_series):
+        m = mask[i]
+        y = values[i, m]
+        t = years[i, m] - years[i, m].mean()
+        k_lo, k_hi = (b[0] for b in growth_models.ceiling_bounds(np.array([y.max()])))
+        p0 = [min(k_hi, k_lo * 1.2)] + list(growth_models.START_VALUES[curve])
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', OptimizeWarning)
+                params[i], _ = curve_fit(func, t, y, p0=p0, bounds=([k_lo] + list(lo_rest), [k_hi] + list(hi_rest)),
+                                         maxfev=5000)
+        except RuntimeError:
+            continue
+        sse[i] = ((y - func(t, *params[i])) ** 2).sum()
+        ok[i] = True
+    return params, sse, ok
+
+
+def run(n_series, curve, repeat=1, seed=0):
+    years, values, mask = synthetic_series(n_series, seed=seed)
+    timings = {}
+    results = {}
+    for name, fit in [('batched_lm', fit_batched), ('curve_fit_loop', fit_per_series)]:
+        best = np.inf
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results[name] = fit(years, values, mask, curve)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+    _, sse_b, ok_b = results['batched_lm']
+    _, sse_c, ok_c = results['curve_fit_loop']
+    both = ok_b & ok_c
+    # relative SSE gap per series; > 0 where the batched fit is worse
+    gap = (sse_b[both] - sse_c[both]) / np.maximum(sse_c[both], 1e-12)
+    return {
+        'curve': curve,
+        'n_series': n_series,
+        'batched_lm_s': timings['batched_lm'],
+        'curve_fit_loop_s': timings['curve_fit_loop'],
+        'speedup': timings['curve_fit_loop'] / timings['batched_lm'],
+        'batched_converged': float(ok_b.mean()),
+        'curve_fit_converged': float(ok_c.mean()),
+        'sse_within_1pct': float((gap <= 0.01).mean()) if both.any() else None,
+        'sse_gap_median': float(np.median(gap)) if both.any() else None,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark batched growth-curve fits against per-series curve_fit')
+    parser.add_argument('--series', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--curve', nargs='+', default=list(growth_models.CURVES), choices=list(growth_models.CURVES))
+    parser.add_argument('--repeat', type=int, default=1, help='timing repeats (best is kept)')
+    parser.add_argument('--json', default=None, help='also write the results to this JSON file')
+    args = parser.parse_args()
+
+    rows = []
+    for curve in args.curve:
+        for n in args.series:
+            row = run(n, curve, repeat=args.repeat)
+            rows.append(row)
+            print(f"{curve:9s} {n:6d} series: batched {row['batched_lm_s'] * 1000:9.1f} ms, "
+                  f"curve_fit loop {row['curve_fit_loop_s'] * 1000:9.1f} ms ({row['speedup']:.0f}x); "
+                  f"converged {row['batched_converged']:.1%} / {row['curve_fit_converged']:.1%}, "
+                  f"SSE within 1% of curve_fit: {row['sse_within_1pct']:.1%}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2))
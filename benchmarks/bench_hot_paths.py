@@ -0,0 +1,240 @@
+"""Benchmark: load, enrich, fit / predict and dashboard hot paths on scaled-up data.
+
+Times each hot path on synthetic data with 1x, 100x and 10,000x the rows of
+the unified workbook (see `synthetic_data.py`):
+
+    load_unified_data (cold: openpyxl, warm: Parquet cache)
+    get_next_record_id, add_observations / add_events / add_impact_links
+    select_findex, build_series_panel
+    fit_linear / predict_linear / predict_logit_linear over every series
+    dashboard page computations (latest_baselines, trend_series, ci_band, target_progress)
+
+Results go to `benchmarks/results/<commit>.json` with the machine and library
+versions; `--compare` prints the change against an earlier results file:
+
+    python benchmarks/bench_hot_paths.py --scale 1 100 10000
+    python benchmarks/bench_hot_paths.py --compare benchmarks/results/<old commit>.json
+
+Writing and parsing a workbook with openpyxl takes minutes at 10,000x, so
+the load benchmarks skip scales above --max-workbook-rows.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+sys.path.insert(0, str(ROOT / 'dashboard'))
+sys.path.insert(0, str(ROOT))
+
+import computations
+import data_loader
+import enrich_data
+import task4_forecast
+from synthetic_data import synthetic_forecasts, synthetic_unified, write_workbook
+
+RESULTS_DIR = ROOT / 'benchmarks' / 'results'
+MIN_BATCH_S = 0.05  # calls are batched until one batch takes at least this long
+
+
+def measure(func, repeat=5):
+    """Per-call seconds of func over `repeat` batches; fast calls are batched like timeit.autorange"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_BATCH_S or number >= 1 << 16:
+            break
+        number *= 10
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return {'min_s': min(times), 'median_s': statistics.median(times), 'number': number, 'repeat': repeat}
+
+
+@contextmanager
+def raw_data_dir(path):
+    # point load_unified_data at a directory of synthetic workbooks
+    original = data_loader.get_data_path
+    data_loader.get_data_path = lambda filename: Path(path) / filename
+    try:
+        yield
+    finally:
+        data_loader.get_data_path = original
+
+
+def series_arrays(panel):
+    # (years, values) of every series in a build_series_panel result
+    return [(panel['years'][i, m], panel['values'][i, m]) for i, m in enumerate(panel['mask'])]
+
+
+def bench_load(main_data, impact_links, repeat, max_rows):
+    if len(main_data) > max_rows:
+        return {name: {'skipped': f'{len(main_data)} rows > --max-workbook-rows {max_rows}'}
+                for name in ('load_unified_data_cold', 'load_unified_data_warm')}
+    with tempfile.TemporaryDirectory() as tmp:
+        write_workbook(main_data, impact_links, Path(tmp) / 'ethiopia_fi_unified_data.xlsx')
+        with raw_data_dir(tmp):
+            out = {'load_unified_data_cold': measure(lambda: data_loader.load_unified_data(use_cache=False),
+                                                     repeat=min(repeat, 3))}
+            data_loader.load_unified_data()  # builds the Parquet cache
+            out['load_unified_data_warm'] = measure(data_loader.load_unified_data, repeat)
+    return out
+
+
+def bench_enrich(main_data, impact_links, repeat):
+    new_events = enrich_data.add_events(main_data)
+    return {
+        'get_next_record_id': measure(lambda: enrich_data.get_next_record_id(main_data), repeat),
+        'add_observations': measure(lambda: enrich_data.add_observations(main_data), repeat),
+        'add_events': measure(lambda: enrich_data.add_events(main_data), repeat),
+        'add_impact_links': measure(lambda: enrich_data.add_impact_links(main_data, impact_links, new_events),
+                                    repeat),
+    }
+
+
+def bench_models(main_data, repeat):
+    years_fore = np.arange(2025, 2028)
+    panel = task4_forecast.build_series_panel(main_data)
+    arrays = series_arrays(panel)
+    is_pct = (panel['series']['unit'] == '%').to_numpy()
+    pct_arrays = [a for a, pct in zip(arrays, is_pct) if pct]
+    linear_fits = [task4_forecast.fit_linear(y, v) for y, v in arrays]
+    logit_fits = [task4_forecast.fit_logit_linear(y, v) for y, v in pct_arrays]
+    out = {
+        'select_findex': measure(lambda: task4_forecast.select_findex(main_data, 'Account Ownership Rate'), repeat),
+        'build_series_panel': measure(lambda: task4_forecast.build_series_panel(main_data), repeat),
+        'fit_linear': measure(lambda: [task4_forecast.fit_linear(y, v) for y, v in arrays], repeat),
+        'predict_linear': measure(lambda: [task4_forecast.predict_linear(f, years_fore) for f in linear_fits], repeat),
+        'predict_logit_linear': measure(
+            lambda: [task4_forecast.predict_logit_linear(f, years_fore) for f in logit_fits], repeat),
+    }
+    out['fit_linear']['n_series'] = out['predict_linear']['n_series'] = len(arrays)
+    out['predict_logit_linear']['n_series'] = len(pct_arrays)
+    return out
+
+
+def bench_dashboard(fore, repeat):
+    series = fore['series'].iloc[-1]
+    return {
+        'dashboard_series_names': measure(lambda: computations.series_names(fore), repeat),
+        'dashboard_latest_baselines': measure(lambda: computations.latest_baselines(fore), repeat),
+        'dashboard_trend_series': measure(lambda: computations.trend_series(fore), repeat),
+        'dashboard_ci_band': measure(lambda: computations.ci_band(fore, series), repeat),
+        'dashboard_target_progress': measure(lambda: computations.target_progress(fore, series, 70.0), repeat),
+    }
+
+
+def run(scale, repeat=5, max_workbook_rows=50_000, only=None):
+    """Results of every benchmark group (or the groups in `only`) at one scale"""
+    main_data, impact_links = synthetic_unified(scale)
+    # the scripts work on the typed schema the loaders return
+    typed_main, typed_links = data_loader.apply_schema(main_data), data_loader.apply_schema(impact_links)
+    fore = synthetic_forecasts(scale)
+    # (group, benchmarks, rows of the table they run on)
+    groups = [
+        ('load', lambda: bench_load(main_data, impact_links, repeat, max_workbook_rows), len(main_data)),
+        ('enrich', lambda: bench_enrich(typed_main, typed_links, repeat), len(main_data)),
+        ('models', lambda: bench_models(typed_main, repeat), len(main_data)),
+        ('dashboard', lambda: bench_dashboard(fore, repeat), len(fore)),
+    ]
+    rows = []
+    for group, bench, n_rows in groups:
+        if only and group not in only:
+            continue
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            results = bench()
+        for name, result in results.items():
+            rows.append({'benchmark': name, 'group': group, 'scale': scale, 'rows': n_rows, **result})
+    return rows
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return commit, dirty
+
+
+def machine_info():
+    commit, dirty = git_commit()
+    return {'commit': commit, 'dirty': dirty, 'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'platform': platform.platform(), 'machine': platform.machine(), 'cpu_count': os.cpu_count()}
+
+
+def compare(current, baseline, threshold=0.2):
+    """Rows of (benchmark, scale, baseline s, current s, ratio, flag); ratio > 1 + threshold is a regression"""
+    old = {(r['benchmark'], r['scale']): r for r in baseline['results'] if 'median_s' in r}
+    out = []
+    for r in current['results']:
+        b = old.get((r['benchmark'], r['scale']))
+        if b is None or 'median_s' not in r:
+            continue
+        ratio = r['median_s'] / b['median_s']
+        flag = 'slower' if ratio > 1 + threshold else 'faster' if ratio < 1 / (1 + threshold) else ''
+        out.append((r['benchmark'], r['scale'], b['median_s'], r['median_s'], ratio, flag))
+    return out
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the load, enrich, fit/predict and dashboard hot paths')
+    parser.add_argument('--scale', type=int, nargs='+', default=[1, 100, 10000],
+                        help='copies of the unified data (1 = current row counts)')
+    parser.add_argument('--repeat', type=int, default=5, help='timed batches per benchmark (median is reported)')
+    parser.add_argument('--only', nargs='+', default=None, choices=['load', 'enrich', 'models', 'dashboard'],
+                        help='benchmark groups to run (default: all)')
+    parser.add_argument('--max-workbook-rows', type=int, default=50_000,
+                        help='largest synthetic workbook written for the load benchmarks')
+    parser.add_argument('--out', default=None, help='results file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', default=None, help='earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative change flagged by --compare')
+    args = parser.parse_args()
+
+    meta = machine_info()
+    results = []
+    for scale in args.scale:
+        rows = run(scale, repeat=args.repeat, max_workbook_rows=args.max_workbook_rows, only=args.only)
+        for row in rows:
+            if 'skipped' in row:
+                print(f"{row['benchmark']:28s} {scale:6d}x  skipped ({row['skipped']})")
+                continue
+            print(f"{row['benchmark']:28s} {scale:6d}x  {row['rows']:8d} rows  "
+                  f"median {row['median_s'] * 1000:10.3f} ms  min {row['min_s'] * 1000:10.3f} ms")
+        results.extend(rows)
+
+    report = {'meta': meta, 'results': results}
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{meta['commit'] or 'unknown'}{'-dirty' if meta['dirty'] else ''}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f'Results written to {out}')
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        print(f"\nChange vs {baseline['meta'].get('commit')} ({args.compare}):")
+        for name, scale, old_s, new_s, ratio, flag in compare(report, baseline, args.threshold):
+            print(f'{name:28s} {scale:6d}x  {old_s * 1000:10.3f} -> {new_s * 1000:10.3f} ms  {ratio:5.2f}x  {flag}')
@@ -0,0 +1,116 @@
+"""Synthetic scale-up of the unified dataset for benchmarks.
+
+`synthetic_unified(scale)` tiles the real main-data and impact_links tables
+`scale` times. Copy k > 0 gets its own indicator codes and names (suffix
+`_Sk`), record IDs and event links, plus jittered numeric values, so the
+schema, dtypes and value mix match the real workbook. Row and series counts
+grow linearly with `scale`:
+
+    python benchmarks/synthetic_data.py --scale 100 --out /tmp/synthetic_100x
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from data_loader import IMPACT_SHEET, MAIN_SHEET, load_unified_data
+
+ID_PATTERN = r'^([A-Za-z]+)_(\d+)$'
+
+
+def _renumber(ids, copy_idx, n_per_prefix):
+    # PREFIX_NNNN of copy k -> PREFIX_<NNNN + k * highest NNNN of the prefix>, unique across copies
+    parts = ids.astype(str).str.extract(ID_PATTERN)
+    valid = parts[1].notna().to_numpy()
+    nums = parts[1].astype(float).to_numpy() + copy_idx * parts[0].map(n_per_prefix).to_numpy(dtype=float)
+    renumbered = (parts[0] + '_' + pd.Series(np.where(valid, nums, 0).astype(np.int64), index=parts.index)
+                  .astype(str).str.zfill(4))
+    return np.where(valid, renumbered.to_numpy(dtype=object), ids.to_numpy(dtype=object))
+
+
+def _suffix(values, copy_idx):
+    # tag codes / names of copy k > 0 with '_Sk'; missing values stay missing
+    values = pd.Series(values, dtype=object).reset_index(drop=True)
+    tagged = values.astype(str) + pd.Series(np.char.add('_S', copy_idx.astype(str)), dtype=object)
+    keep = (copy_idx == 0) | values.isna().to_numpy()
+    return np.where(keep, values.to_numpy(dtype=object), tagged.to_numpy(dtype=object))
+
+
+def _highest_ids(*id_columns):
+    parts = pd.concat([col.astype(str).str.extract(ID_PATTERN) for col in id_columns]).dropna()
+    return parts[1].astype(int).groupby(parts[0]).max().to_dict()
+
+
+def _tile(df, scale):
+    # `scale` copies of df in one frame, and the copy number of each row
+    out = df.iloc[np.tile(np.arange(len(df)), scale)].reset_index(drop=True)
+    return out, np.repeat(np.arange(scale), len(df))
+
+
+def synthetic_unified(scale, seed=0, base=None):
+    """Main data and impact links scaled up `scale` times.
+
+    Args:
+        scale: Number of copies of the real tables (1 returns them unchanged)
+        seed: Seed of the value jitter
+        base: (main_data, impact_links) to tile; default the raw unified
+            workbook read with typed=False
+
+    Returns:
+        tuple: (main_data DataFrame, impact_links DataFrame) with the columns
+            and dtypes of `base`
+    """
+    main, links = base if base is not None else load_unified_data(typed=False)
+    rng = np.random.default_rng(seed)
+    n_per_prefix = _highest_ids(main['record_id'], links['record_id'])
+
+    main, k = _tile(main, scale)
+    main['record_id'] = _renumber(main['record_id'], k, n_per_prefix)
+    main['indicator'] = _suffix(main['indicator'], k)
+    main['indicator_code'] = _suffix(main['indicator_code'], k)
+    # +-5% jitter of the copies keeps percentages near their real range
+    main['value_numeric'] = main['value_numeric'] * np.where(k > 0, rng.uniform(0.95, 1.05, len(main)), 1.0)
+
+    links, k = _tile(links, scale)
+    links['record_id'] = _renumber(links['record_id'], k, n_per_prefix)
+    links['parent_id'] = _renumber(links['parent_id'], k, n_per_prefix)
+    links['related_indicator'] = _suffix(links['related_indicator'], k)
+    links['impact_estimate'] = links['impact_estimate'] * np.where(k > 0, rng.uniform(0.95, 1.05, len(links)), 1.0)
+    return main, links
+
+
+def synthetic_forecasts(scale, base_path=None):
+    """reports/forecasts_task4.csv tiled `scale` times, copy k > 0 with series '<name> [Sk]'"""
+    base_path = base_path or Path(__file__).resolve().parent.parent / 'reports' / 'forecasts_task4.csv'
+    fore = pd.read_csv(base_path)
+    fore, k = _tile(fore, scale)
+    fore['series'] = np.where(k > 0, fore['series'] + pd.Series(np.char.add(' [S', k.astype(str)), dtype=object) + ']',
+                              fore['series'])
+    return fore
+
+
+def write_workbook(main_data, impact_links, path):
+    """Write a unified-format workbook (main sheet and impact sheet)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with pd.ExcelWriter(path) as writer:
+        main_data.to_excel(writer, sheet_name=MAIN_SHEET, index=False)
+        impact_links.to_excel(writer, sheet_name=IMPACT_SHEET, index=False)
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a scaled-up synthetic unified workbook')
+    parser.add_argument('--scale', type=int, default=100, help='copies of the real tables')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True, help='directory to write ethiopia_fi_unified_data.xlsx to')
+    args = parser.parse_args()
+
+    main_data, impact_links = synthetic_unified(args.scale, seed=args.seed)
+    path = write_workbook(main_data, impact_links, Path(args.out) / 'ethiopia_fi_unified_data.xlsx')
+    print(f'{len(main_data)} records, {len(impact_links)} impact links -> {path}')
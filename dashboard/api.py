@@ -0,0 +1,223 @@
+"""JSON API over the dashboard computations (no Streamlit needed).
+
+A plain ASGI application: any ASGI server can host it, e.g.
+
+    pip install uvicorn
+    python dashboard/api.py --port 8000
+
+Endpoints (GET, JSON; `run` defaults to the latest run in reports/artifacts,
+or reports/forecasts_task4.csv when there is no artifact store):
+
+    /runs                                   runs in the artifact store
+    /series?run=ID                          series names
+    /latest?run=ID                          latest baseline per series
+    /trends?run=ID&series=A&series=B        baseline paths (all series by default)
+    /band?run=ID&series=A                   95% CI polygon of a series
+    /target?run=ID&series=A&target=60       progress toward a target (%)
+    /stats                                  response cache counters
+
+Responses are cached per (endpoint, resolved run, query) with LRU eviction
+and a TTL, and carry an ETag; a request whose If-None-Match matches gets an
+empty 304.
+"""
+import argparse
+import asyncio
+import functools
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qs
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import artifact_store
+import computations
+
+CACHE_MAX_ENTRIES = 256
+CACHE_TTL = 60
+# How long the id of the latest stored run is reused before re-reading the manifest
+LATEST_RUN_TTL = 5
+
+
+class ResponseCache:
+    """LRU cache of encoded responses with a per-entry TTL (seconds)"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            calls = self.hits + self.misses
+            return {'entries': len(self._entries), 'max_entries': self.max_entries, 'ttl': self.ttl,
+                    'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / calls if calls else None}
+
+
+cache = ResponseCache()
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+_latest = {'checked': float('-inf'), 'run': None}
+
+
+def _latest_stored_run():
+    if time.monotonic() - _latest['checked'] > LATEST_RUN_TTL:
+        _latest['run'] = artifact_store.latest_run() if artifact_store.store_exists() else None
+        _latest['checked'] = time.monotonic()
+    return _latest['run']
+
+
+def resolve_run(run_id=None):
+    """Run id to serve: the given one, the latest stored run, or 'csv:<mtime>'"""
+    if run_id:
+        return run_id
+    latest = _latest_stored_run()
+    if latest is not None:
+        return latest
+    if not computations.FORECASTS_CSV.exists():
+        raise HTTPError(404, 'No forecast runs and no reports/forecasts_task4.csv')
+    # the CSV is rewritten in place, so its mtime is part of the cache key
+    return f'csv:{computations.FORECASTS_CSV.stat().st_mtime_ns}'
+
+
+@functools.lru_cache(maxsize=16)
+def run_forecasts(run):
+    """Forecasts table of a resolved run (stored runs never change)"""
+    try:
+        return computations.read_forecasts(None if run.startswith('csv:') else run)
+    except KeyError:
+        raise HTTPError(404, f'Unknown run {run!r}')
+
+
+def _one(query, name, default=None):
+    values = query.get(name)
+    return values[0] if values else default
+
+
+def _series(fore, query, default=None):
+    series = _one(query, 'series', default)
+    if series is None:
+        raise HTTPError(400, 'series is required')
+    if series not in set(fore['series']):
+        raise HTTPError(404, f'Unknown series {series!r}')
+    return series
+
+
+def _target(query):
+    try:
+        return float(_one(query, 'target', 60))
+    except ValueError:
+        raise HTTPError(400, 'target must be a number')
+
+
+ROUTES = {
+    '/series': lambda fore, q: computations.series_names(fore),
+    '/latest': lambda fore, q: computations.latest_baselines(fore),
+    '/trends': lambda fore, q: computations.trend_series(fore, q.get('series')),
+    '/band': lambda fore, q: computations.ci_band(fore, _series(fore, q)),
+    '/target': lambda fore, q: computations.target_progress(fore, _series(fore, q, 'Account Ownership Rate'),
+                                                          _target(q)),
+}
+
+
+def _runs_payload():
+    if not artifact_store.store_exists():
+        return []
+    return artifact_store.list_runs().to_dict(orient='records')
+
+
+def render(path, query):
+    """Compute the (status, body, etag) response for a GET; cached per resolved run"""
+    if path == '/stats':
+        return 200, json.dumps(cache.stats()).encode(), None
+    if path != '/runs' and path not in ROUTES:
+        raise HTTPError(404, f'Unknown endpoint {path}')
+    run = resolve_run(_one(query, 'run')) if path != '/runs' else None
+    key = (path, run, tuple(sorted((k, tuple(v)) for k, v in query.items() if k != 'run')))
+    response = cache.get(key)
+    if response is None:
+        payload = _runs_payload() if path == '/runs' else ROUTES[path](run_forecasts(run), query)
+        body = json.dumps(payload, separators=(',', ':')).encode()
+        response = (200, body, '"{}"'.format(hashlib.sha256(body).hexdigest()[:32]))
+        cache.put(key, response)
+    return response
+
+
+async def _send(send, status, body=b'', etag=None, head=False):
+    headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    if etag:
+        headers += [(b'etag', etag.encode()), (b'cache-control', f'max-age={CACHE_TTL}'.encode())]
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': b'' if head else body})
+
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+    if scope['method'] not in ('GET', 'HEAD'):
+        await _send(send, 405, b'{"error":"method not allowed"}')
+        return
+    query = parse_qs(scope.get('query_string', b'').decode())
+    try:
+        status, body, etag = await asyncio.get_running_loop().run_in_executor(None, render, scope['path'], query)
+    except HTTPError as e:
+        await _send(send, e.status, json.dumps({'error': str(e)}).encode())
+        return
+    request_etag = dict(scope.get('headers', [])).get(b'if-none-match')
+    if etag and request_etag is not None and request_etag.decode() == etag:
+        await _send(send, 304, etag=etag, head=True)
+        return
+    await _send(send, status, body, etag, head=scope['method'] == 'HEAD')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the dashboard JSON API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit('Serving the API needs an ASGI server: pip install uvicorn')
+    uvicorn.run(app, host=args.host, port=args.port)
@@ -6,14 +6,75 @@ Run locally:
     streamlit run dashboard/app.py
 
 """
+import functools
+import json
+import sys
+import threading
+import time
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import artifact_store
+import computations
+
+
+# Bounds for the memoized selectors and figures: entries per function and
+# seconds before an entry is recomputed (new runs show up after at most TTL)
+CACHE_MAX_ENTRIES = 64
+CACHE_TTL = 600
+
+_stats_lock = threading.Lock()
+
+
+@st.cache_resource
+def cache_stats():
+    """Hit / miss counters and timings per memoized function, shared by all sessions"""
+    return {}
+
+
+def _record(name, kind, seconds):
+    with _stats_lock:
+        entry = cache_stats().setdefault(name, {'call': 0, 'miss': 0, 'call_s': 0.0, 'miss_s': 0.0})
+        entry[kind] += 1
+        entry[kind + '_s'] += seconds
+
+
+def memoized(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+    """st.cache_data with bounded size and TTL that also counts hits and misses.
+
+    The wrapped body only runs on a miss, so misses are counted inside it and
+    calls around the cached function.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def compute(*args):
+            start = time.perf_counter()
+            result = func(*args)
+            _record(func.__name__, 'miss', time.perf_counter() - start)
+            return result
+
+        cached = st.cache_data(max_entries=max_entries, ttl=ttl, show_spinner=False)(compute)
+
+        @functools.wraps(func)
+        def call(*args):
+            start = time.perf_counter()
+            result = cached(*args)
+            _record(func.__name__, 'call', time.perf_counter() - start)
+            return result
+
+        call.clear = cached.clear
+        return call
+    return decorate
+
 
-@st.cache_data
+@memoized(max_entries=1)
 def load_forecasts():
     p = Path('reports/forecasts_task4.csv')
     if not p.exists():
@@ -22,79 +83,204 @@ def load_forecasts():
     return pd.read_csv(p)
 
 
-def overview_page(fore):
+@memoized(max_entries=1)
+def list_runs():
+    """Runs recorded by task4_forecast.py in reports/artifacts (empty if none)"""
+    if not artifact_store.store_exists():
+        return pd.DataFrame()
+    return artifact_store.list_runs()
+
+
+@memoized()
+def list_series(run_id):
+    if run_id is None:
+        return computations.series_names(load_forecasts())
+    return artifact_store.list_series(run_id)
+
+
+@memoized()
+def get_forecasts(run_id, series):
+    """Forecast rows of the given series; run_id None reads the CSV"""
+    return computations.read_forecasts(run_id, series)
+
+
+@memoized(max_entries=1)
+def load_data_profile():
+    p = Path('reports/data_profile.json')
+    if not p.exists():
+        return None
+    return json.loads(p.read_text())
+
+
+# ---- per-page selectors and figures, keyed on run id / series / target ----
+
+@memoized()
+def latest_baselines(run_id, series):
+    """Baseline of the last forecast year per series"""
+    latest = computations.latest_baselines(get_forecasts(run_id, series))
+    return {s: v['baseline'] for s, v in latest.items()}
+
+
+@memoized()
+def baseline_label(run_id, series):
+    """Model selector label of the run's baseline, e.g. 'logit_linear (baseline)'"""
+    model = computations.baseline_model(get_forecasts(run_id, (series,)), series)
+    return 'baseline' if model is None else f'{model} (baseline)'
+
+
+@memoized()
+def trends_figure(run_id, series):
+    fig = go.Figure()
+    for trend in computations.trend_series(get_forecasts(run_id, series)):
+        fig.add_trace(go.Scatter(x=trend['year'], y=trend['baseline'], mode='lines+markers', name=trend['series']))
+    return fig
+
+
+@memoized()
+def model_options(run_id, series):
+    """Candidate models stored with the run, the selected (backtest winner) first"""
+    return computations.model_options(computations.read_model_forecasts(run_id, series),
+                                      computations.read_model_scores(run_id, series))
+
+
+@memoized()
+def model_forecasts(run_id, series, model):
+    """Forecast rows of one candidate model; model None is the run's baseline"""
+    if model is None:
+        return get_forecasts(run_id, (series,))
+    return computations.model_path(computations.read_model_forecasts(run_id, series), model)
+
+
+@memoized()
+def forecast_figure(run_id, series, model):
+    d = model_forecasts(run_id, series, model)
+    band = computations.ci_band(d, series)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=d['year'], y=d['baseline'], mode='lines+markers', name=model or baseline_label(run_id, series)))
+    fig.add_trace(go.Scatter(x=band['x'], y=band['y'], fill='toself', name='95% CI', opacity=0.2, showlegend=True))
+    return fig
+
+
+@memoized()
+def forecast_csv(run_id, series, model):
+    return model_forecasts(run_id, series, model).to_csv(index=False)
+
+
+@memoized()
+def target_figure(run_id, series, target):
+    progress = computations.target_progress(get_forecasts(run_id, (series,)), series, target)
+    fig = px.line(x=progress['year'], y=progress['baseline'], labels={'x': 'year', 'y': 'baseline'},
+                  title=f'Progress toward {target}% target')
+    fig.add_hline(y=target, line_dash='dash', annotation_text=f'{target}% target')
+    return fig
+
+
+def overview_page(run_id, series_options):
     st.title('Financial Inclusion — Overview')
     st.markdown('Key metrics and trend highlights')
-    cols = st.columns(3)
-    # show latest baseline for each series
-    for i, s in enumerate(fore['series'].unique()):
-        df_s = fore[fore['series'] == s]
-        latest = df_s.sort_values('year').iloc[-1]
-        cols[i].metric(label=s, value=f"{latest['baseline']:.1f}%")
+    # show latest baseline for each series, three per row
+    cols = st.columns(min(len(series_options), 3) or 1)
+    latest = latest_baselines(run_id, tuple(series_options))
+    for i, s in enumerate(series_options):
+        cols[i % len(cols)].metric(label=s, value=f"{latest[s]:.1f}%")
 
 
-def trends_page(fore):
+def trends_page(run_id, series_options):
     st.header('Trends')
-    series = st.multiselect('Select series', options=fore['series'].unique().tolist(), default=fore['series'].unique().tolist())
-    dfp = fore[fore['series'].isin(series)]
-    fig = go.Figure()
-    for s in dfp['series'].unique():
-        d = dfp[dfp['series'] == s]
-        fig.add_trace(go.Scatter(x=d['year'], y=d['baseline'], mode='lines+markers', name=s))
-    st.plotly_chart(fig, use_container_width=True)
+    series = st.multiselect('Select series', options=series_options, default=series_options)
+    st.plotly_chart(trends_figure(run_id, tuple(series)), use_container_width=True)
 
 
-def forecasts_page(fore):
+def forecasts_page(run_id, series_options):
     st.header('Forecasts')
-    model = st.selectbox('Model selection (prototype)', options=['logit-linear (baseline)'])
-    series = st.selectbox('Series', options=fore['series'].unique())
-    d = fore[fore['series'] == series]
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=d['year'], y=d['baseline'], mode='lines+markers', name='Baseline'))
-    fig.add_trace(go.Scatter(x=d['year'].tolist()+d['year'][::-1].tolist(), y=(d['ci95_high'].tolist()+d['ci95_low'][::-1].tolist()), fill='toself', name='95% CI', opacity=0.2, showlegend=True))
-    st.plotly_chart(fig, use_container_width=True)
-    st.download_button('Download forecasts CSV', data=d.to_csv(index=False), file_name=f'forecasts_{series.replace(" ","_")}.csv')
+    series = st.selectbox('Series', options=series_options)
+    # models ordered by backtest rank (task4_backtest.py); runs without candidate forecasts only have the baseline
+    model = st.selectbox('Model', options=model_options(run_id, series) or [None],
+                         format_func=lambda m: baseline_label(run_id, series) if m is None else m)
+    st.plotly_chart(forecast_figure(run_id, series, model), use_container_width=True)
+    st.download_button('Download forecasts CSV', data=forecast_csv(run_id, series, model), file_name=f'forecasts_{series.replace(" ","_")}.csv')
 
 
-def inclusion_page(fore):
+def inclusion_page(run_id):
     st.header('Inclusion Projections')
     series = 'Account Ownership Rate'
-    d = fore[fore['series'] == series]
     target = st.slider('Target (%)', min_value=10, max_value=100, value=60)
     st.metric('Target', f'{target}%')
-    latest = d[d['year'] == d['year'].min()].iloc[0]
-    st.markdown(f"Latest baseline forecast: {d['baseline'].iloc[0]:.1f}%")
-    fig = px.line(d, x='year', y='baseline', title=f'Progress toward {target}% target')
-    fig.add_hline(y=target, line_dash='dash', annotation_text=f'{target}% target')
-    st.plotly_chart(fig, use_container_width=True)
+    st.markdown(f"Latest baseline forecast: {latest_baselines(run_id, (series,))[series]:.1f}%")
+    st.plotly_chart(target_figure(run_id, series, target), use_container_width=True)
+
+
+def profile_page(profile):
+    st.header('Data Profile')
+    if profile is None:
+        st.info('Data profile not found. Run src/profiler.py or src/explore_data.py first.')
+        return
+    main_p = profile['tables']['main']
+    links_p = profile['tables']['impact_links']
+    st.caption(f"{profile['source']} data, profiled {profile['generated']}")
+    cols = st.columns(3)
+    cols[0].metric('Records', main_p['n_rows'])
+    cols[1].metric('Impact links', links_p['n_rows'])
+    cols[2].metric('Duplicate record_id rows', main_p['duplicates']['n_rows'])
+    counts = pd.Series(main_p['value_counts']['record_type'], name='count').rename_axis('record_type').reset_index()
+    st.plotly_chart(px.bar(counts, x='record_type', y='count', title='Records by type'), use_container_width=True)
+    years = main_p['years']
+    st.markdown(f"Observation years: {', '.join(map(str, years['observed']))}")
+    if years['gaps']:
+        st.markdown('Gaps: ' + ', '.join(f'{a}-{b}' for a, b in years['gaps']))
+    missing = pd.DataFrame(main_p['columns']).T[['missing', 'missing_pct', 'n_unique']]
+    st.dataframe(missing[missing['missing'] > 0].sort_values('missing', ascending=False))
+
+
+def cache_stats_table():
+    """Calls, hit rate and mean latency per memoized function"""
+    with _stats_lock:
+        stats = {name: dict(entry) for name, entry in cache_stats().items()}
+    rows = []
+    for name, e in sorted(stats.items()):
+        hits = max(e['call'] - e['miss'], 0)
+        rows.append({'function': name, 'calls': e['call'], 'hits': hits,
+                     'hit_rate': hits / e['call'] if e['call'] else float('nan'),
+                     'mean_call_ms': 1000 * e['call_s'] / e['call'] if e['call'] else float('nan'),
+                     'mean_miss_ms': 1000 * e['miss_s'] / e['miss'] if e['miss'] else float('nan')})
+    return pd.DataFrame(rows, columns=['function', 'calls', 'hits', 'hit_rate', 'mean_call_ms', 'mean_miss_ms'])
+
+
+def cache_panel():
+    with st.sidebar.expander('Cache statistics'):
+        table = cache_stats_table()
+        total_calls = table['calls'].sum()
+        st.metric('Overall hit rate', f"{table['hits'].sum() / total_calls:.0%}" if total_calls else 'n/a')
+        st.dataframe(table.round({'hit_rate': 3, 'mean_call_ms': 2, 'mean_miss_ms': 2}), hide_index=True)
+        st.caption(f'Entries per function: {CACHE_MAX_ENTRIES}, TTL: {CACHE_TTL}s')
+        if st.button('Clear caches'):
+            st.cache_data.clear()
+            cache_stats().clear()
 
 
 def main():
     st.set_page_config(layout='wide')
-    fore = load_forecasts()
-    if fore.empty:
+    runs = list_runs()
+    run_id = None
+    if not runs.empty:
+        labels = {r.run_id: f'{r.run_id} ({r.model_version})' for r in runs.itertuples()}
+        run_id = st.sidebar.selectbox('Forecast run', options=list(labels), format_func=labels.get)
+    elif load_forecasts().empty:
         return
-    page = st.sidebar.selectbox('Page', ['Overview', 'Trends', 'Forecasts', 'Inclusion Projections'])
+    series_options = list_series(run_id)
+    page = st.sidebar.selectbox('Page', ['Overview', 'Trends', 'Forecasts', 'Inclusion Projections', 'Data Profile'])
     if page == 'Overview':
-        overview_page(fore)
+        overview_page(run_id, series_options)
     elif page == 'Trends':
-        trends_page(fore)
+        trends_page(run_id, series_options)
     elif page == 'Forecasts':
-        forecasts_page(fore)
+        forecasts_page(run_id, series_options)
+    elif page == 'Data Profile':
+        profile_page(load_data_profile())
     else:
-        inclusion_page(fore)
+        inclusion_page(run_id)
+    cache_panel()
 
 
 if __name__ == '__main__':
     main()
-"""
-Dashboard application for Financial Inclusion Forecasting
-"""
-
-def main():
-    """Main entry point for the dashboard"""
-    print("Dashboard application - to be implemented")
-    pass
-
-if __name__ == "__main__":
-    main()
@@ -0,0 +1,127 @@
+"""Dashboard page computations, independent of Streamlit.
+
+The functions below take a forecasts table (columns series, year, baseline,
+ci95_low, ci95_high, ...) and return plain Python structures, so the
+Streamlit app, the JSON API (`dashboard/api.py`) and the load test all share
+them. `read_forecasts` is the only one that does I/O.
+"""
+import math
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+import artifact_store
+
+FORECASTS_CSV = Path(__file__).resolve().parent.parent / 'reports' / 'forecasts_task4.csv'
+
+
+def _num(value):
+    """JSON-safe float (NaN -> None)"""
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def read_forecasts(run_id=None, series=None):
+    """Forecast rows of a run, optionally for some series only.
+
+    run_id None reads the latest run in the artifact store, or
+    reports/forecasts_task4.csv when there is no store.
+    """
+    if run_id is None and artifact_store.store_exists():
+        run_id = artifact_store.latest_run()
+    if run_id is None:
+        fore = pd.read_csv(FORECASTS_CSV)
+        if series is not None:
+            fore = fore[fore['series'].isin(list(series))]
+    else:
+        fore = artifact_store.read_artifact(run_id, series=None if series is None else list(series))
+    return fore.sort_values(['series', 'year'], kind='stable').reset_index(drop=True)
+
+
+def series_names(fore):
+    return fore['series'].drop_duplicates().tolist()
+
+
+def latest_baselines(fore):
+    """{series: {'year', 'baseline'}} for the last forecast year of each series"""
+    latest = fore.sort_values('year', kind='stable').groupby('series', sort=False).tail(1)
+    return {s: {'year': int(y), 'baseline': _num(b)}
+            for s, y, b in zip(latest['series'], latest['year'], latest['baseline'])}
+
+
+def baseline_model(fore, series):
+    """Model that produced a series' baseline (the run's `model` column), None for tables without one"""
+    if 'model' not in fore.columns:
+        return None
+    models = fore.loc[fore['series'] == series, 'model'].dropna()
+    return models.iloc[0] if len(models) else None
+
+
+def trend_series(fore, series=None):
+    """[{'series', 'year': [...], 'baseline': [...]}] per series, in table order"""
+    if series is not None:
+        fore = fore[fore['series'].isin(list(series))]
+    out = []
+    for s, d in fore.groupby('series', sort=False):
+        out.append({'series': s, 'year': d['year'].astype(int).tolist(),
+                    'baseline': [_num(v) for v in d['baseline']]})
+    return out
+
+
+def ci_band(fore, series):
+    """Closed polygon of a series' 95% interval: upper edge forward, lower edge back"""
+    d = fore[fore['series'] == series]
+    years = d['year'].astype(int).tolist()
+    return {'series': series,
+            'x': years + years[::-1],
+            'y': [_num(v) for v in d['ci95_high']] + [_num(v) for v in d['ci95_low'][::-1]]}
+
+
+def target_progress(fore, series, target):
+    """Baseline path toward a target (%), the gap per year and the first year it is met"""
+    d = fore[fore['series'] == series]
+    baseline = [_num(v) for v in d['baseline']]
+    years = d['year'].astype(int).tolist()
+    met = [y for y, b in zip(years, baseline) if b is not None and b >= target]
+    return {'series': series, 'target': target, 'year': years, 'baseline': baseline,
+            'gap': [None if b is None else target - b for b in baseline],
+            'first_year_met': met[0] if met else None}
+
+
+def read_model_forecasts(run_id, series):
+    """Every candidate model's forecasts of a series in a stored run (empty if none)"""
+    if run_id is None:
+        return pd.DataFrame()
+    try:
+        return artifact_store.read_artifact(run_id, 'model_forecasts', series=[series])
+    except KeyError:
+        return pd.DataFrame()
+
+
+def read_model_scores(run_id, series):
+    """Backtest scores of a series stored with a run (empty if none)"""
+    if run_id is None:
+        return pd.DataFrame()
+    try:
+        return artifact_store.read_artifact(run_id, 'model_scores', series=[series])
+    except KeyError:
+        return pd.DataFrame()
+
+
+def model_options(model_fore, scores=None):
+    """Candidate models of a series: the selected one first, then by backtest rank"""
+    if model_fore.empty:
+        return []
+    models = model_fore['model'].drop_duplicates().tolist()
+    rank = {} if scores is None or scores.empty else dict(zip(scores['model'], scores['rank']))
+    selected = set(model_fore.loc[model_fore['selected'], 'model'])
+    return sorted(models, key=lambda m: (m not in selected, rank.get(m, math.inf)))
+
+
+def model_path(model_fore, model):
+    """One model's forecasts as a forecasts table (series, year, baseline, ci95_low, ci95_high)"""
+    d = model_fore[model_fore['model'] == model].sort_values('year', kind='stable')
+    return d.rename(columns={'forecast': 'baseline'})[['series', 'year', 'baseline', 'ci95_low', 'ci95_high']]
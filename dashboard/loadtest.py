@@ -0,0 +1,130 @@
+"""Load test for the dashboard JSON API (`dashboard/api.py`).
+
+By default the ASGI app is driven in-process (no server or HTTP client
+needed), which measures the API and cache themselves. With --url it sends
+real HTTP requests to a running server instead:
+
+    python dashboard/loadtest.py --requests 5000 --concurrency 16
+    python dashboard/loadtest.py --url http://127.0.0.1:8000 --etag
+
+Requests cycle through a mix of the dashboard's page queries; the report
+gives p50/p90/p99 latency, throughput and status counts.
+"""
+import argparse
+import asyncio
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import api
+
+
+def request_mix(series, targets=(50, 60, 70, 80)):
+    """(path, query) pairs covering every page of the dashboard"""
+    mix = [('/latest', {}), ('/trends', {}), ('/series', {})]
+    mix += [('/band', {'series': s}) for s in series]
+    mix += [('/target', {'series': s, 'target': t}) for s in series[:1] for t in targets]
+    return [(path, urlencode(query)) for path, query in mix]
+
+
+async def _asgi_get(path, query, etag=None):
+    """One in-process GET; returns (status, etag)"""
+    headers = [(b'if-none-match', etag.encode())] if etag else []
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query.encode(), 'headers': headers}
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    await api.app(scope, receive, send)
+    start = sent[0]
+    response_etag = dict(start['headers']).get(b'etag')
+    return start['status'], response_etag.decode() if response_etag else None
+
+
+def run_in_process(mix, n_requests, concurrency, use_etag):
+    latencies = np.empty(n_requests)
+    statuses = Counter()
+    etags = {}
+
+    async def worker(offset):
+        for i in range(offset, n_requests, concurrency):
+            path, query = mix[i % len(mix)]
+            start = time.perf_counter()
+            status, etag = await _asgi_get(path, query, etags.get((path, query)) if use_etag else None)
+            latencies[i] = time.perf_counter() - start
+            statuses[status] += 1
+            if etag:
+                etags[(path, query)] = etag
+
+    async def main():
+        await asyncio.gather(*(worker(k) for k in range(concurrency)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    return latencies, statuses, time.perf_counter() - start
+
+
+def run_http(base_url, mix, n_requests, concurrency, use_etag):
+    latencies = np.empty(n_requests)
+    statuses = Counter()
+    etags = {}
+
+    def one(i):
+        path, query = mix[i % len(mix)]
+        request = urllib.request.Request(f"{base_url.rstrip('/')}{path}?{query}")
+        if use_etag and (path, query) in etags:
+            request.add_header('If-None-Match', etags[(path, query)])
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                status, etag = response.status, response.headers.get('ETag')
+        except urllib.error.HTTPError as e:
+            status, etag = e.code, None
+        latencies[i] = time.perf_counter() - start
+        statuses[status] += 1
+        if etag:
+            etags[(path, query)] = etag
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(n_requests)))
+    return latencies, statuses, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test the dashboard JSON API')
+    parser.add_argument('--url', default=None, help='base URL of a running API (default: drive the app in-process)')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--etag', action='store_true', help='revalidate with If-None-Match after the first response')
+    args = parser.parse_args()
+
+    series = api.run_forecasts(api.resolve_run())['series'].drop_duplicates().tolist()
+    mix = request_mix(series)
+    if args.url:
+        latencies, statuses, elapsed = run_http(args.url, mix, args.requests, args.concurrency, args.etag)
+    else:
+        latencies, statuses, elapsed = run_in_process(mix, args.requests, args.concurrency, args.etag)
+
+    p50, p90, p99 = np.percentile(latencies * 1000, [50, 90, 99])
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {len(mix)} distinct queries"
+          f" ({'HTTP ' + args.url if args.url else 'in-process'})")
+    print(f"latency ms: p50 {p50:.3f}  p90 {p90:.3f}  p99 {p99:.3f}  max {latencies.max() * 1000:.3f}")
+    print(f"throughput: {args.requests / elapsed:.0f} req/s")
+    print(f"status: {dict(sorted(statuses.items()))}")
+    if not args.url:
+        print(f"response cache: {api.cache.stats()}")
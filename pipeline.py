@@ -0,0 +1,257 @@
+"""Incremental pipeline runner: enrich -> profile / explore / backtest -> forecast -> dashboard.
+
+Each stage runs one of the repo's scripts in a subprocess and declares the files it
+reads and writes. A stage is skipped when the SHA-256 of its command and input files
+matches its last successful run and its outputs are still in place; otherwise it is
+rerun, which in turn changes the inputs of the stages downstream of it. Stages whose
+dependencies are done run in parallel (--workers).
+
+    python pipeline.py                  # bring everything up to date
+    python pipeline.py forecast         # forecast and whatever it depends on
+    python pipeline.py --force backtest # rerun backtest (and its dependencies) regardless
+    python pipeline.py --dry-run        # show what would run
+
+Per-stage wall time, peak memory (max RSS of the stage's process, from os.wait4) and
+status are appended as one JSON line per pipeline run to `reports/pipeline_runs.jsonl`;
+stage output goes to `reports/pipeline_logs/<stage>.log`. Input digests and the
+last successful run of each stage are kept in `reports/pipeline_state.json`.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from data_loader import file_digest
+
+RUN_LOG = Path('reports/pipeline_runs.jsonl')
+STATE_PATH = Path('reports/pipeline_state.json')
+LOG_DIR = Path('reports/pipeline_logs')
+
+ENRICHED = 'data/processed/ethiopia_fi_unified_data_enriched.xlsx'
+# batches appended with enrich_data.py --incremental; load_enriched_data prefers them to the workbook
+STORE_LOG = 'data/processed/enrichment_store/batches.jsonl'
+LOADER = ['src/data_loader.py']
+FORECAST_CODE = ['task4_forecast.py', 'src/growth_models.py', 'src/event_effects.py',
+                 'src/event_regression.py', 'src/hierarchy.py', 'src/mixed_frequency.py',
+                 'src/artifact_store.py', 'src/fit_cache.py', 'src/enrichment_store.py']
+
+# name -> command, upstream stages, input files (data and code) and output files.
+# Outputs of an upstream stage are listed among the inputs of the stages that read them.
+STAGES = {
+    'enrich': {
+        'cmd': ['src/enrich_data.py'],
+        'deps': [],
+        'inputs': ['data/raw/ethiopia_fi_unified_data.xlsx', 'data/raw/reference_codes.xlsx',
+                   'src/enrich_data.py', 'src/event_graph.py', 'src/enrichment_store.py'] + LOADER,
+        'outputs': [ENRICHED],
+    },
+    'profile': {
+        'cmd': ['src/profiler.py', '--enriched'],
+        'deps': ['enrich'],
+        'inputs': [ENRICHED, STORE_LOG, 'src/profiler.py'] + LOADER,
+        'outputs': ['reports/data_profile.json'],
+    },
+    'explore': {
+        'cmd': ['task1_explore.py'],
+        'deps': [],
+        'inputs': ['data/raw/ethiopia_fi_unified_data.xlsx', 'data/raw/reference_codes.xlsx',
+                   'data/raw/Additional Data Points Guide.xlsx', 'task1_explore.py'] + LOADER,
+        'outputs': [],
+    },
+    'backtest': {
+        'cmd': ['task4_backtest.py'],
+        'deps': ['enrich'],
+        'inputs': [ENRICHED, STORE_LOG, 'task4_backtest.py'] + FORECAST_CODE + LOADER,
+        'outputs': ['reports/model_scores.csv', 'reports/model_selection.csv'],
+    },
+    'forecast': {
+        'cmd': ['task4_forecast.py'],
+        'deps': ['enrich', 'backtest'],
+        'inputs': [ENRICHED, STORE_LOG, 'reports/model_selection.csv'] + FORECAST_CODE + LOADER,
+        'outputs': ['reports/forecasts_task4.csv', 'reports/artifacts/manifest.sqlite'],
+    },
+    # the dashboard itself is interactive; this stage checks that every page's
+    # data API answers against the latest forecast run
+    'dashboard': {
+        'cmd': ['dashboard/loadtest.py', '--requests', '200'],
+        'deps': ['forecast'],
+        'inputs': ['reports/forecasts_task4.csv', 'reports/artifacts/manifest.sqlite',
+                   'reports/data_profile.json', 'dashboard/api.py', 'dashboard/computations.py',
+                   'dashboard/loadtest.py'],
+        'outputs': [],
+    },
+}
+
+
+def load_state(path=STATE_PATH):
+    if not Path(path).exists():
+        return {'digests': {}, 'stages': {}}
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def save_state(state, path=STATE_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w') as fh:
+        json.dump(state, fh, indent=2)
+    os.replace(tmp_path, path)
+
+
+def digest(path, digests):
+    # SHA-256 of a file, reused while its size and mtime are unchanged; None if missing
+    full = ROOT / path
+    if not full.exists():
+        return None
+    st = full.stat()
+    cached = digests.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    value = file_digest(full)
+    digests[path] = [st.st_mtime_ns, st.st_size, value]
+    return value
+
+
+def stage_key(name, digests):
+    # content hash of a stage: same command and inputs -> same outputs
+    stage = STAGES[name]
+    payload = json.dumps([stage['cmd'], [[p, digest(p, digests)] for p in sorted(stage['inputs'])]])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def is_fresh(name, key, state):
+    last = state['stages'].get(name)
+    return (last is not None and last['key'] == key
+            and all((ROOT / p).exists() for p in STAGES[name]['outputs']))
+
+
+def select_stages(targets):
+    # the requested stages plus everything upstream of them, in declaration order
+    wanted, todo = set(), list(targets or STAGES)
+    while todo:
+        name = todo.pop()
+        if name not in STAGES:
+            raise ValueError(f'Unknown stage {name!r}; expected one of {list(STAGES)}')
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(STAGES[name]['deps'])
+    return [name for name in STAGES if name in wanted]
+
+
+def run_stage(name):
+    """Run one stage's command; returns (returncode, wall seconds, peak RSS in MB or None)."""
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    cmd = [sys.executable] + STAGES[name]['cmd']
+    start = time.perf_counter()
+    with open(ROOT / LOG_DIR / f'{name}.log', 'w') as log:
+        proc = subprocess.Popen(cmd, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT)
+        if hasattr(os, 'wait4'):
+            # reap the child ourselves to get its resource usage (ru_maxrss is in KB on Linux)
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            peak = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+        else:
+            proc.wait()
+            peak = None
+    return proc.returncode, time.perf_counter() - start, peak
+
+
+def run_pipeline(targets=None, force=False, workers=None, dry_run=False):
+    """Bring the selected stages up to date and return the run record.
+
+    With `force`, every selected stage is rerun whether or not its inputs changed.
+    """
+    names = select_stages(targets)
+    state = load_state()
+    status, records = {}, {}
+    run_id = datetime.now().strftime('%Y%m%dT%H%M%S')
+    started = time.perf_counter()
+    workers = workers or min(len(names), os.cpu_count() or 1)
+
+    def ready():
+        return [n for n in names if n not in status
+                and all(status.get(d) in ('ran', 'skipped') for d in STAGES[n]['deps'])]
+
+    def blocked():
+        return [n for n in names if n not in status
+                and any(status.get(d) in ('failed', 'blocked') for d in STAGES[n]['deps'])]
+
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while True:
+            for name in blocked():
+                status[name] = 'blocked'
+                records[name] = {'stage': name, 'status': 'blocked'}
+            for name in ready():
+                if name in running.values():
+                    continue
+                key = stage_key(name, state['digests'])
+                # in a dry run, upstream stages that would run change this stage's inputs
+                upstream_runs = dry_run and any(records[d]['status'] == 'would run' for d in STAGES[name]['deps'])
+                if not force and not upstream_runs and is_fresh(name, key, state):
+                    status[name] = 'skipped'
+                    records[name] = {'stage': name, 'status': 'skipped', 'key': key}
+                elif dry_run:
+                    status[name] = 'ran'
+                    records[name] = {'stage': name, 'status': 'would run', 'key': key}
+                else:
+                    print(f'[{name}] running {" ".join(STAGES[name]["cmd"])}')
+                    running[pool.submit(run_stage, name)] = name
+                    records[name] = {'stage': name, 'key': key}
+            if not running:
+                if not ready():
+                    break
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                returncode, wall, peak = future.result()
+                status[name] = 'ran' if returncode == 0 else 'failed'
+                records[name].update({'status': status[name], 'returncode': returncode, 'wall_s': round(wall, 3),
+                                      'peak_rss_mb': None if peak is None else round(peak, 1),
+                                      'log': str(LOG_DIR / f'{name}.log')})
+                print(f'[{name}] {status[name]} in {wall:.1f}s'
+                      + ('' if peak is None else f', peak RSS {peak:.0f} MB'))
+                if returncode == 0:
+                    # the key of the inputs it ran on, so an unchanged rerun skips it
+                    state['stages'][name] = {'key': records[name]['key'], 'run_id': run_id,
+                                             'finished': datetime.now().isoformat(timespec='seconds')}
+
+    run = {'run_id': run_id, 'targets': list(targets or []), 'dry_run': dry_run,
+           'wall_s': round(time.perf_counter() - started, 3), 'stages': [records[n] for n in names]}
+    if not dry_run:
+        save_state(state)
+        RUN_LOG.parent.mkdir(parents=True, exist_ok=True)
+        with open(RUN_LOG, 'a') as fh:
+            fh.write(json.dumps(run) + '\n')
+    return run
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the data -> forecast -> dashboard pipeline incrementally')
+    parser.add_argument('stages', nargs='*', help=f'stages to bring up to date (default: all of {list(STAGES)})')
+    parser.add_argument('--force', action='store_true', help='rerun the selected stages even if up to date')
+    parser.add_argument('--workers', type=int, default=None, help='stages run in parallel (default: one per CPU)')
+    parser.add_argument('--dry-run', action='store_true', help='only show which stages would run')
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    run = run_pipeline(args.stages, force=args.force, workers=args.workers, dry_run=args.dry_run)
+    for record in run['stages']:
+        extra = (f" {record['wall_s']:.1f}s" if 'wall_s' in record else '') + (
+            f", {record['peak_rss_mb']:.0f} MB" if record.get('peak_rss_mb') is not None else '')
+        print(f"{record['stage']:10s} {record['status']}{extra}")
+    print(f"Pipeline {run['run_id']} finished in {run['wall_s']:.1f}s"
+          + ('' if run['dry_run'] else f'; run log appended to {RUN_LOG}'))
+    sys.exit(1 if any(r['status'] == 'failed' for r in run['stages']) else 0)
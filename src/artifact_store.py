@@ -0,0 +1,262 @@
+"""
+Versioned store for forecast outputs
+
+Each run of a forecasting script is recorded in a small SQLite manifest
+(reports/artifacts/manifest.sqlite) together with the tables it produced.
+Tables are stored once per content: the file name is the SHA-256 of the
+table's values (objects/<2 hex>/<digest>.parquet), so an unchanged forecast
+reruns into the same object. Parquet files are written with one row group per
+series, and the manifest indexes which series each artifact holds, so readers
+can list series from SQLite and load a single series with a Parquet filter
+instead of reading and filtering the whole table.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from data_loader import parquet_available
+
+
+STORE_DIRNAME = "artifacts"
+MANIFEST_NAME = "manifest.sqlite"
+OBJECTS_DIRNAME = "objects"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created TEXT NOT NULL,
+    script TEXT,
+    model_version TEXT,
+    params TEXT
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    name TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    n_rows INTEGER NOT NULL,
+    series_col TEXT,
+    PRIMARY KEY (run_id, name)
+);
+CREATE TABLE IF NOT EXISTS artifact_series (
+    run_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    series TEXT NOT NULL,
+    n_rows INTEGER NOT NULL,
+    PRIMARY KEY (run_id, name, series)
+);
+CREATE INDEX IF NOT EXISTS artifact_series_by_series ON artifact_series (name, series);
+"""
+
+
+def get_store_dir():
+    """Get the default artifact store directory (reports/artifacts)"""
+    project_root = Path(__file__).parent.parent
+    return project_root / "reports" / STORE_DIRNAME
+
+
+def _store_dir(store_dir):
+    return Path(store_dir) if store_dir is not None else get_store_dir()
+
+
+def _connect(store_dir, create=False):
+    """Open the manifest; only writers create the directory and tables"""
+    if create:
+        store_dir.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(store_dir / MANIFEST_NAME)
+        conn.executescript(_SCHEMA)
+        return conn
+    path = store_dir / MANIFEST_NAME
+    if not path.exists():
+        raise FileNotFoundError(f"No artifact store at {store_dir}")
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def store_exists(store_dir=None):
+    """Check whether the store holds at least one run"""
+    path = _store_dir(store_dir) / MANIFEST_NAME
+    if not path.exists():
+        return False
+    with closing(_connect(path.parent)) as conn:
+        try:
+            return conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0] > 0
+        except sqlite3.OperationalError:
+            return False
+
+
+def new_run_id():
+    """Timestamp-based run id"""
+    return datetime.now().strftime("%Y%m%dT%H%M%S%f")
+
+
+def frame_digest(df):
+    """
+    SHA-256 of a table's content (column names, dtypes and values).
+
+    The digest does not depend on the Parquet writer, so the same table
+    always maps to the same object.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def object_path(digest, store_dir=None):
+    """Path of the Parquet object with the given digest"""
+    return _store_dir(store_dir) / OBJECTS_DIRNAME / digest[:2] / f"{digest}.parquet"
+
+
+def _write_object(df, path, series_col):
+    """Write df to path atomically, one row group per series"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+    if series_col is None:
+        pq.write_table(table, tmp_path)
+    else:
+        # rows are already sorted by series; row-group statistics let
+        # read_artifact skip the groups of other series
+        bounds = df[series_col].ne(df[series_col].shift()).to_numpy().nonzero()[0].tolist() + [len(df)]
+        with pq.ParquetWriter(tmp_path, table.schema) as writer:
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                writer.write_table(table.slice(start, stop - start))
+    os.replace(tmp_path, path)
+
+
+def write_run(artifacts, model_version=None, script=None, params=None, run_id=None,
+              series_cols=None, store_dir=None):
+    """
+    Record a run and store its output tables.
+
+    Objects are written first and the run becomes visible in the manifest
+    in one transaction, so an interrupted write leaves no partial run.
+
+    Args:
+        artifacts: dict of artifact name -> DataFrame
+        model_version: Version label of the model that produced the run
+        script: Name of the producing script
+        params: JSON-serializable dict of run parameters
+        run_id: Unique id for the run (default: a timestamp)
+        series_cols: dict of artifact name -> column identifying a series
+            (default 'series' when the table has that column)
+        store_dir: Store directory (default: reports/artifacts)
+
+    Returns:
+        str: The run id
+
+    Raises:
+        ValueError: If the run id is already used
+    """
+    if not parquet_available():
+        raise ImportError("The artifact store needs a Parquet engine; install pyarrow")
+    store_dir = _store_dir(store_dir)
+    run_id = run_id or new_run_id()
+    series_cols = series_cols or {}
+
+    with closing(_connect(store_dir, create=True)) as conn:
+        if conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone():
+            raise ValueError(f"Run {run_id!r} already exists in {store_dir}")
+
+        artifact_rows = []
+        series_rows = []
+        for name, df in artifacts.items():
+            series_col = series_cols.get(name, "series" if "series" in df.columns else None)
+            if series_col is not None:
+                df = df.sort_values(series_col, kind="stable")
+            digest = frame_digest(df)
+            path = object_path(digest, store_dir)
+            if not path.exists():
+                _write_object(df, path, series_col)
+            artifact_rows.append((run_id, name, digest, len(df), series_col))
+            if series_col is not None:
+                counts = df.groupby(series_col, sort=True).size()
+                series_rows.extend((run_id, name, str(series), int(n)) for series, n in counts.items())
+
+        with conn:
+            conn.execute("INSERT INTO runs VALUES (?, ?, ?, ?, ?)",
+                         (run_id, datetime.now().isoformat(timespec="seconds"), script,
+                          model_version, json.dumps(params or {}, sort_keys=True)))
+            conn.executemany("INSERT INTO artifacts VALUES (?, ?, ?, ?, ?)", artifact_rows)
+            conn.executemany("INSERT INTO artifact_series VALUES (?, ?, ?, ?)", series_rows)
+    return run_id
+
+
+def list_runs(store_dir=None):
+    """
+    Runs in the store, newest first.
+
+    Returns:
+        DataFrame with columns run_id, created, script, model_version, params
+    """
+    with closing(_connect(_store_dir(store_dir))) as conn:
+        return pd.read_sql_query("SELECT * FROM runs ORDER BY created DESC, run_id DESC", conn)
+
+
+def latest_run(name="forecasts", store_dir=None):
+    """Id of the newest run holding the named artifact, or None"""
+    with closing(_connect(_store_dir(store_dir))) as conn:
+        row = conn.execute(
+            "SELECT r.run_id FROM runs r JOIN artifacts a ON a.run_id = r.run_id "
+            "WHERE a.name = ? ORDER BY r.created DESC, r.run_id DESC LIMIT 1", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def list_series(run_id, name="forecasts", store_dir=None):
+    """Series held by an artifact, read from the manifest"""
+    with closing(_connect(_store_dir(store_dir))) as conn:
+        rows = conn.execute("SELECT series FROM artifact_series WHERE run_id = ? AND name = ? ORDER BY series",
+                            (run_id, name)).fetchall()
+    return [series for (series,) in rows]
+
+
+def series_runs(series, name="forecasts", store_dir=None):
+    """Runs whose artifact holds a series, newest first"""
+    with closing(_connect(_store_dir(store_dir))) as conn:
+        return pd.read_sql_query(
+            "SELECT r.*, s.n_rows FROM artifact_series s JOIN runs r ON r.run_id = s.run_id "
+            "WHERE s.name = ? AND s.series = ? ORDER BY r.created DESC, r.run_id DESC",
+            conn, params=(name, str(series)))
+
+
+def read_artifact(run_id, name="forecasts", series=None, columns=None, store_dir=None):
+    """
+    Load an artifact of a run.
+
+    Args:
+        run_id: Run id (see list_runs / latest_run)
+        name: Artifact name
+        series: Series value or list of values to load (default: all);
+            pushed down to the Parquet reader as a row-group filter
+        columns: Columns to load (default: all)
+        store_dir: Store directory (default: reports/artifacts)
+
+    Returns:
+        DataFrame
+
+    Raises:
+        KeyError: If the run has no artifact with that name
+    """
+    store_dir = _store_dir(store_dir)
+    with closing(_connect(store_dir)) as conn:
+        row = conn.execute("SELECT digest, series_col FROM artifacts WHERE run_id = ? AND name = ?",
+                           (run_id, name)).fetchone()
+    if row is None:
+        raise KeyError(f"No artifact {name!r} in run {run_id!r}")
+    digest, series_col = row
+    filters = None
+    if series is not None:
+        if series_col is None:
+            raise ValueError(f"Artifact {name!r} is not indexed by series")
+        values = [series] if isinstance(series, str) else list(series)
+        filters = [(series_col, "in", values)]
+    return pd.read_parquet(object_path(digest, store_dir), columns=columns, filters=filters)
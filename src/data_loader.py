@@ -2,33 +2,111 @@
 Data loading utilities for Ethiopia Financial Inclusion Forecasting
 """
 
+import argparse
+import hashlib
+import importlib.util
+import json
+import numpy as np
 import pandas as pd
 import os
 from pathlib import Path
 
 
+# Parsed sheets are cached as Parquet in a hidden directory next to the source
+# workbook, e.g. data/raw/.cache/ethiopia_fi_unified_data/
+CACHE_DIRNAME = ".cache"
+CACHE_MANIFEST = "manifest.json"
+
+# Sheet names used by the unified and enriched workbooks
+MAIN_SHEET = "ethiopia_fi_unified_data"
+IMPACT_SHEET = "Impact_sheet"
+
+# Typed schema applied by the loaders (see apply_schema)
+CATEGORICAL_COLUMNS = [
+    "record_type", "category", "pillar", "indicator_code", "indicator_direction",
+    "value_type", "unit", "gender", "location", "source_type", "confidence",
+    "relationship_type", "impact_direction", "impact_magnitude",
+]
+DATE_COLUMNS = ["observation_date", "period_start", "period_end", "collection_date"]
+
+
 def get_data_path(filename):
     """Get the path to a data file in the raw data directory"""
     project_root = Path(__file__).parent.parent
     return project_root / "data" / "raw" / filename
 
 
-def load_unified_data():
+def parquet_available():
+    """Check whether a Parquet engine (pyarrow or fastparquet) is installed"""
+    return any(importlib.util.find_spec(engine) is not None
+               for engine in ("pyarrow", "fastparquet"))
+
+
+def get_cache_dir(filepath):
+    """Get the cache directory used for a source workbook"""
+    filepath = Path(filepath)
+    return filepath.parent / CACHE_DIRNAME / filepath.stem
+
+
+def file_digest(filepath, chunk_size=1 << 20):
+    """Compute the SHA-256 hex digest of a file, reading it in chunks"""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_workbook(filepath, sheet_names=None):
     """
-    Load the unified financial inclusion dataset.
+    Open a workbook once and parse the requested sheets in a single pass.
+    
+    pandas' openpyxl engine loads the workbook in read-only (streaming) mode,
+    so each sheet is parsed from the already-open archive instead of
+    re-unzipping the file for every pd.read_excel call.
+    
+    Args:
+        filepath: Path to the .xlsx file
+        sheet_names: Sheet names to parse; missing names are skipped. None
+            parses every sheet.
+    
+    Returns:
+        dict: sheet name -> DataFrame, in workbook order
+    """
+    with pd.ExcelFile(filepath, engine="openpyxl") as xl:
+        available = xl.sheet_names
+        if sheet_names is not None:
+            available = [name for name in available if name in sheet_names]
+        return {name: xl.parse(name) for name in available}
+
+
+def split_unified_sheets(sheets):
+    """
+    Pick the main data and impact_links tables out of a workbook's sheets.
+    
+    The named sheets are preferred; otherwise the first two sheets are used
+    in workbook order. A workbook with a single sheet has its impact_link records
+    split out of the main table.
+    
+    Args:
+        sheets: dict of sheet name -> DataFrame, as from read_workbook
     
     Returns:
         tuple: (main_data DataFrame, impact_links DataFrame)
     """
-    filepath = get_data_path("ethiopia_fi_unified_data.xlsx")
+    names = list(sheets.keys())
+    if not names:
+        raise ValueError("Workbook has no sheets")
     
-    # Load the main data sheet
-    main_data = pd.read_excel(filepath, sheet_name=0)
+    main_name = MAIN_SHEET if MAIN_SHEET in sheets else names[0]
+    other_names = [name for name in names if name != main_name]
     
-    # Load the impact_links sheet if it exists
-    try:
-        impact_links = pd.read_excel(filepath, sheet_name=1)
-    except:
+    main_data = sheets[main_name]
+    if IMPACT_SHEET in sheets:
+        impact_links = sheets[IMPACT_SHEET]
+    elif other_names:
+        impact_links = sheets[other_names[0]]
+    else:
         # If only one sheet, impact_links might be in the main data
         impact_links = main_data[main_data['record_type'] == 'impact_link'].copy()
         main_data = main_data[main_data['record_type'] != 'impact_link'].copy()
@@ -36,55 +114,364 @@ def load_unified_data():
     return main_data, impact_links
 
 
-def load_reference_codes():
+# Python types of values in mixed-type columns, so they survive the round trip
+_PYTYPE_SUFFIX = "__pytype"
+_PYTYPE_RESTORE = {
+    "int": int,
+    "float": float,
+    "bool": lambda v: v == "True",
+    "Timestamp": pd.Timestamp,
+    "datetime": pd.Timestamp,
+}
+
+
+def _to_parquet_safe(df):
+    """
+    Make a sheet storable as Parquet.
+    
+    Columns mixing Python types (e.g. fiscal_year holds both 2024 and
+    'FY2024/25') have no single Parquet type, so their non-null values are
+    stored as strings alongside a companion column recording each value's
+    original type; _from_parquet_safe restores them.
+    """
+    df = df.copy()
+    for col in list(df.columns):
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith("mixed"):
+            df[col + _PYTYPE_SUFFIX] = df[col].map(lambda v: None if pd.isna(v) else type(v).__name__)
+            df[col] = df[col].map(lambda v: None if pd.isna(v) else str(v))
+    return df
+
+
+def _from_parquet_safe(df):
+    """Restore mixed-type columns written by _to_parquet_safe"""
+    for type_col in [c for c in df.columns if c.endswith(_PYTYPE_SUFFIX)]:
+        col = type_col[:-len(_PYTYPE_SUFFIX)]
+        restore = [_PYTYPE_RESTORE.get(t, str) if isinstance(t, str) else None for t in df[type_col]]
+        df[col] = pd.Series(
+            [np.nan if fn is None else fn(v) for fn, v in zip(restore, df[col])],
+            index=df.index, dtype=object,
+        )
+        df = df.drop(columns=type_col)
+    return df
+
+
+def _read_cached_sheet(path):
+    return _from_parquet_safe(pd.read_parquet(path))
+
+
+def _load_cache_manifest(cache_dir):
+    manifest_path = cache_dir / CACHE_MANIFEST
+    if not manifest_path.exists():
+        return None
+    try:
+        with open(manifest_path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache_manifest(cache_dir, manifest):
+    tmp_path = cache_dir / f"{CACHE_MANIFEST}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(manifest, fh, indent=2)
+    os.replace(tmp_path, cache_dir / CACHE_MANIFEST)
+
+
+def _cache_is_fresh(filepath, cache_dir, manifest):
+    """
+    Check a cache manifest against the source workbook.
+    
+    A matching mtime and size is trusted without hashing. If the mtime moved
+    but the content hash is unchanged (e.g. the file was touched or copied),
+    the manifest is refreshed instead of rebuilding the cache.
+    """
+    if manifest is None:
+        return False
+    if not all((cache_dir / f).exists() for f in manifest.get("files", [])):
+        return False
+    stat = filepath.stat()
+    if manifest.get("mtime_ns") == stat.st_mtime_ns and manifest.get("size") == stat.st_size:
+        return True
+    if manifest.get("size") != stat.st_size or manifest.get("sha256") != file_digest(filepath):
+        return False
+    manifest["mtime_ns"] = stat.st_mtime_ns
+    _write_cache_manifest(cache_dir, manifest)
+    return True
+
+
+def build_cache(filepath):
+    """
+    Parse every sheet of a workbook and write it to the Parquet cache.
+    
+    Each file is written under a per-process temporary name and moved into
+    place, so a process reading the cache while another rebuilds it (e.g.
+    parallel pipeline stages) never sees a partly written sheet.
+    
+    Returns:
+        dict: sheet name -> DataFrame, in workbook order
+    """
+    filepath = Path(filepath)
+    cache_dir = get_cache_dir(filepath)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    stat = filepath.stat()
+    sheets = read_workbook(filepath)
+    files = []
+    for i, (name, df) in enumerate(sheets.items()):
+        filename = f"sheet_{i:02d}.parquet"
+        tmp_path = cache_dir / f"{filename}.{os.getpid()}.tmp"
+        _to_parquet_safe(df).to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cache_dir / filename)
+        files.append(filename)
+    
+    _write_cache_manifest(cache_dir, {
+        "source": filepath.name,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": file_digest(filepath),
+        "sheets": list(sheets.keys()),
+        "files": files,
+    })
+    return sheets
+
+
+def read_excel_cached(filepath, sheet_name=0, use_cache=True):
+    """
+    Read workbook sheets, serving them from the Parquet cache when fresh.
+    
+    The cache lives next to the source workbook and is keyed on its mtime,
+    size and SHA-256 hash; a stale or missing cache is rebuilt from the
+    workbook automatically.
+    
+    Args:
+        filepath: Path to the .xlsx file
+        sheet_name: Sheet position (int), name (str) or None for all
+            sheets, as for pd.read_excel
+        use_cache: Set to False to always re-read the workbook
+    
+    Returns:
+        DataFrame for the requested sheet, or a dict of sheet name ->
+        DataFrame when sheet_name is None
+    
+    Raises:
+        IndexError/KeyError: If the sheet does not exist
+    """
+    filepath = Path(filepath)
+    if not use_cache or not parquet_available():
+        if sheet_name is None:
+            return read_workbook(filepath)
+        return pd.read_excel(filepath, sheet_name=sheet_name)
+    
+    cache_dir = get_cache_dir(filepath)
+    manifest = _load_cache_manifest(cache_dir)
+    if not _cache_is_fresh(filepath, cache_dir, manifest):
+        sheets = build_cache(filepath)
+        if sheet_name is None:
+            return sheets
+        if isinstance(sheet_name, int):
+            return list(sheets.values())[sheet_name]
+        return sheets[sheet_name]
+    
+    if sheet_name is None:
+        return {name: _read_cached_sheet(cache_dir / filename)
+                for name, filename in zip(manifest["sheets"], manifest["files"])}
+    if isinstance(sheet_name, int):
+        position = sheet_name
+    elif sheet_name in manifest["sheets"]:
+        position = manifest["sheets"].index(sheet_name)
+    else:
+        raise KeyError(sheet_name)
+    return _read_cached_sheet(cache_dir / manifest["files"][position])
+
+
+def _downcast_numeric(values):
+    """Smallest dtype that holds every value of a numeric column exactly"""
+    if pd.api.types.is_bool_dtype(values.dtype):
+        return values
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return pd.to_numeric(values, downcast="integer")
+    if pd.api.types.is_float_dtype(values.dtype) and values.dtype != np.float32:
+        as_float32 = values.astype(np.float32)
+        # float32 only when every value (NaN included) survives the round trip
+        if np.array_equal(as_float32.to_numpy(dtype=np.float64), values.to_numpy(dtype=np.float64), equal_nan=True):
+            return as_float32
+    return values
+
+
+def _parse_dates(values):
+    """Parse a column to datetime64, or return it unchanged if any value does not parse"""
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values
+    if values.isna().all():
+        # an empty column (e.g. period_start of a sheet without flows) is still a date column
+        return pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    parsed = pd.to_datetime(values, errors="coerce", format="mixed")
+    if parsed[values.notna()].isna().any():
+        # e.g. the raw main sheet's collection_date holds collector names
+        return values
+    return parsed
+
+
+def apply_schema(df):
+    """
+    Convert a unified-format table to the typed schema.
+    
+    - CATEGORICAL_COLUMNS holding text become `category`
+    - DATE_COLUMNS are parsed to datetime64 when every value parses, so
+      downstream code can use the `.dt` accessor directly
+    - Other numeric columns are downcast (float32 / small ints) only when
+      no value changes
+    - Columns with no values at all (read back as float64 NaN, e.g. the main
+      sheet's impact_direction) become empty categoricals when listed in
+      CATEGORICAL_COLUMNS and object columns otherwise, not float32
+    
+    Args:
+        df: Main data or impact_links table as read from a workbook
+    
+    Returns:
+        DataFrame: A typed copy of df
+    """
+    df = df.copy()
+    for col in df.columns:
+        values = df[col]
+        if col in DATE_COLUMNS:
+            df[col] = _parse_dates(values)
+        elif col in CATEGORICAL_COLUMNS and not pd.api.types.is_numeric_dtype(values.dtype):
+            df[col] = values.astype("category")
+        elif values.isna().all():
+            # nothing to infer a type from; keep the column text-compatible
+            values = values.astype(object)
+            df[col] = values.astype("category") if col in CATEGORICAL_COLUMNS else values
+        elif pd.api.types.is_numeric_dtype(values.dtype):
+            df[col] = _downcast_numeric(values)
+    return df
+
+
+def memory_report(before, after):
+    """
+    Per-column memory footprint of a table before and after apply_schema.
+    
+    Returns:
+        DataFrame: dtype and deep memory usage (bytes) per column, with a
+        TOTAL row
+    """
+    report = pd.DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "dtype_after": after.dtypes.reindex(before.columns).astype(str),
+        "bytes_before": before.memory_usage(deep=True, index=False),
+        "bytes_after": after.memory_usage(deep=True, index=False).reindex(before.columns),
+    })
+    report.loc["TOTAL"] = ["", "", report["bytes_before"].sum(), report["bytes_after"].sum()]
+    report["saved_pct"] = (100 * (1 - report["bytes_after"].astype(float)
+                                  / report["bytes_before"].astype(float).where(lambda b: b > 0))).round(1)
+    return report
+
+
+def load_unified_data(use_cache=True, typed=True):
+    """
+    Load the unified financial inclusion dataset.
+    
+    Args:
+        use_cache: Serve sheets from the Parquet cache (set False to force
+            a re-read of the workbook)
+        typed: Apply the typed schema (categoricals, parsed dates,
+            downcast numerics); set False for the raw sheet dtypes
+    
+    Returns:
+        tuple: (main_data DataFrame, impact_links DataFrame)
+    """
+    filepath = get_data_path("ethiopia_fi_unified_data.xlsx")
+    return load_workbook_data(filepath, use_cache=use_cache, typed=typed)
+
+
+def load_workbook_data(filepath, use_cache=True, typed=True):
+    """
+    Load the main data and impact_links tables of a unified-format workbook.
+    
+    All sheets are read together (one pass over the workbook, or one cache
+    lookup) and then split by name with split_unified_sheets.
+
+    Args:
+        filepath: Path to the workbook
+        use_cache: Serve sheets from the Parquet cache
+        typed: Apply the typed schema (see apply_schema)
+
+    Returns:
+        tuple: (main_data DataFrame, impact_links DataFrame)
+    """
+    sheets = read_excel_cached(filepath, sheet_name=None, use_cache=use_cache)
+    main_data, impact_links = split_unified_sheets(sheets)
+    if typed:
+        return apply_schema(main_data), apply_schema(impact_links)
+    return main_data, impact_links
+
+
+def load_reference_codes(use_cache=True):
     """Load the reference codes for valid field values"""
     filepath = get_data_path("reference_codes.xlsx")
-    return pd.read_excel(filepath)
+    return read_excel_cached(filepath, use_cache=use_cache)
 
 
-def load_additional_data_guide():
+def load_additional_data_guide(use_cache=True):
     """Load the additional data points guide"""
     filepath = get_data_path("Additional Data Points Guide.xlsx")
-    return pd.read_excel(filepath, sheet_name=None)  # Load all sheets
+    return read_excel_cached(filepath, sheet_name=None, use_cache=use_cache)  # Load all sheets
 
 
-def load_enriched_data():
+def load_enriched_data(use_cache=True, typed=True):
     """
     Load the enriched financial inclusion dataset.
     
+    Batches appended with `enrich_data.py --incremental` take precedence:
+    when the enrichment store holds any, the enriched view is materialized
+    from it. Otherwise the enriched workbook is read.
+    
+    Args:
+        use_cache: Serve sheets from the Parquet cache (set False to force
+            a re-read of the workbook)
+        typed: Apply the typed schema (see load_unified_data)
+    
     Returns:
         tuple: (main_data DataFrame, impact_links DataFrame)
     """
+    if parquet_available():
+        import enrichment_store  # imports this module, so not at the top
+        if enrichment_store.store_exists():
+            return enrichment_store.materialize(use_cache=use_cache, typed=typed)
+    
     project_root = Path(__file__).parent.parent
     filepath = project_root / "data" / "processed" / "ethiopia_fi_unified_data_enriched.xlsx"
     
     if not filepath.exists():
         # Fall back to original data if enriched doesn't exist
-        return load_unified_data()
-    
-    # Load the main data sheet
-    main_data = pd.read_excel(filepath, sheet_name=0)
+        return load_unified_data(use_cache=use_cache, typed=typed)
     
-    # Load the impact_links sheet
-    try:
-        impact_links = pd.read_excel(filepath, sheet_name=1)
-    except:
-        impact_links = main_data[main_data['record_type'] == 'impact_link'].copy()
-        main_data = main_data[main_data['record_type'] != 'impact_link'].copy()
-    
-    return main_data, impact_links
+    return load_workbook_data(filepath, use_cache=use_cache, typed=typed)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load and summarise the unified dataset")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="re-read the Excel workbooks instead of the Parquet cache")
+    parser.add_argument("--memory-report", action="store_true",
+                        help="show the memory footprint before and after the typed schema")
+    args = parser.parse_args()
+    
     # Test loading
     print("Loading unified data...")
-    main_data, impact_links = load_unified_data()
+    main_data, impact_links = load_unified_data(use_cache=not args.no_cache)
     print(f"Main data shape: {main_data.shape}")
     print(f"Impact links shape: {impact_links.shape}")
     
     print("\nLoading reference codes...")
-    ref_codes = load_reference_codes()
+    ref_codes = load_reference_codes(use_cache=not args.no_cache)
     print(f"Reference codes shape: {ref_codes.shape}")
     
     print("\nMain data columns:", main_data.columns.tolist())
     print("\nMain data record types:", main_data['record_type'].value_counts())
+    
+    if args.memory_report:
+        raw_main, raw_links = load_unified_data(use_cache=not args.no_cache, typed=False)
+        for name, raw, typed in [("Main data", raw_main, main_data), ("Impact links", raw_links, impact_links)]:
+            print(f"\n{name} memory (bytes):")
+            print(memory_report(raw, typed).to_string())
@@ -3,30 +3,107 @@ Data enrichment script for Task 1
 Adds additional observations, events, and impact_links to the dataset
 """
 
+import argparse
 import pandas as pd
+import sys
 from pathlib import Path
 from datetime import datetime
 
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from data_loader import MAIN_SHEET, IMPACT_SHEET, load_reference_codes, load_unified_data
+from event_graph import EventLinkIndex
+import enrichment_store
+
 
 def load_existing_data():
     """Load the existing unified data"""
-    project_root = Path(__file__).parent.parent
-    data_file = project_root / "data" / "raw" / "ethiopia_fi_unified_data.xlsx"
-    
-    main_data = pd.read_excel(data_file, sheet_name=0)
-    impact_links = pd.read_excel(data_file, sheet_name=1)
-    
-    return main_data, impact_links
+    return load_unified_data()
+
+
+class RecordIdAllocator:
+    """
+    Hands out record IDs of the form PREFIX_NNNN without rescanning the data.
+    
+    Existing IDs are scanned once (one vectorized pass covers every prefix)
+    to seed a counter per prefix; later allocations only bump the counter.
+    All known IDs are kept in a set, so an ID that is already taken is never
+    handed out again.
+    
+    Args:
+        *frames: DataFrames (or Series of IDs) whose record_id values are in use
+    """
+    
+    def __init__(self, *frames):
+        self._taken = set()
+        self._next = {}
+        for frame in frames:
+            self.observe(frame)
+    
+    def observe(self, ids):
+        """Register IDs that are already in use (DataFrame with record_id, or Series)"""
+        if isinstance(ids, pd.DataFrame):
+            if 'record_id' not in ids.columns:
+                return
+            ids = ids['record_id']
+        ids = pd.Series(ids, dtype=object).dropna().astype(str)
+        self._taken.update(ids)
+        parts = ids.str.extract(r'^([A-Za-z]+)_(\d+)').dropna()
+        if len(parts) == 0:
+            return
+        highest = parts[1].astype(int).groupby(parts[0]).max()
+        for prefix, num in highest.items():
+            self._next[prefix] = max(self._next.get(prefix, 1), int(num) + 1)
+    
+    def peek(self, prefix="REC"):
+        """The next ID for a prefix, without reserving it"""
+        num = self._next.get(prefix, 1)
+        while f"{prefix}_{num:04d}" in self._taken:
+            num += 1
+        return f"{prefix}_{num:04d}"
+    
+    def allocate(self, prefix="REC", n=1):
+        """Reserve n new IDs for a prefix and return them as a list"""
+        num = self._next.get(prefix, 1)
+        ids = []
+        while len(ids) < n:
+            record_id = f"{prefix}_{num:04d}"
+            if record_id not in self._taken:
+                ids.append(record_id)
+            num += 1
+        self._next[prefix] = num
+        self._taken.update(ids)
+        return ids
+    
+    def next_id(self, prefix="REC"):
+        """Reserve and return a single new ID"""
+        return self.allocate(prefix, 1)[0]
+    
+    def is_taken(self, ids):
+        """Boolean array marking which of ids are already in use"""
+        return pd.Series(ids, dtype=object).isin(self._taken).to_numpy()
+    
+    def reserve(self, record_id):
+        """
+        Claim a specific ID.
+        
+        Raises:
+            ValueError: If the ID is already in use
+        """
+        if record_id in self._taken:
+            raise ValueError(f"Record ID collision: {record_id} is already in use")
+        self.observe(pd.Series([record_id]))
 
 
 def get_next_record_id(df, prefix="REC"):
-    """Get the next available record ID"""
-    existing_ids = df['record_id'].str.extract(rf'^{prefix}_(\d+)')[0].astype(float)
-    if existing_ids.notna().any():
-        next_num = int(existing_ids.max()) + 1
-    else:
-        next_num = 1
-    return f"{prefix}_{next_num:04d}"
+    """
+    Get the next available record ID.
+    
+    Scans df on every call and does not reserve the ID; use a shared
+    RecordIdAllocator when adding several records.
+    """
+    return RecordIdAllocator(df).peek(prefix)
 
 
 def get_next_event_id(df):
@@ -39,13 +116,14 @@ def get_next_impact_id(df):
     return get_next_record_id(df, prefix="IMP")
 
 
-def add_observations(main_data):
+def add_observations(main_data, allocator=None):
     """Add additional observations for forecasting"""
+    allocator = allocator or RecordIdAllocator(main_data)
     new_observations = []
     
     # 1. Infrastructure observations - Agent density
     new_obs = {
-        'record_id': get_next_record_id(main_data),
+        'record_id': allocator.next_id("REC"),
         'record_type': 'observation',
         'category': None,
         'pillar': 'ACCESS',
@@ -84,7 +162,7 @@ def add_observations(main_data):
     
     # 2. Smartphone penetration
     new_obs = {
-        'record_id': get_next_record_id(main_data),
+        'record_id': allocator.next_id("REC"),
         'record_type': 'observation',
         'category': None,
         'pillar': 'ACCESS',
@@ -123,7 +201,7 @@ def add_observations(main_data):
     
     # 3. Mobile internet penetration
     new_obs = {
-        'record_id': get_next_record_id(main_data),
+        'record_id': allocator.next_id("REC"),
         'record_type': 'observation',
         'category': None,
         'pillar': 'ACCESS',
@@ -162,7 +240,7 @@ def add_observations(main_data):
     
     # 4. Digital payment transaction volume (P2P)
     new_obs = {
-        'record_id': get_next_record_id(main_data),
+        'record_id': allocator.next_id("REC"),
         'record_type': 'observation',
         'category': None,
         'pillar': 'USAGE',
@@ -201,7 +279,7 @@ def add_observations(main_data):
     
     # 5. Gender gap in account ownership (2024)
     new_obs = {
-        'record_id': get_next_record_id(main_data),
+        'record_id': allocator.next_id("REC"),
         'record_type': 'observation',
         'category': None,
         'pillar': 'GENDER',
@@ -241,23 +319,20 @@ def add_observations(main_data):
     # Convert to DataFrame
     new_obs_df = pd.DataFrame(new_observations)
     
-    # Ensure all columns match
-    for col in main_data.columns:
-        if col not in new_obs_df.columns:
-            new_obs_df[col] = None
-    
-    new_obs_df = new_obs_df[main_data.columns]
+    # Align to the existing column order (missing columns are left empty)
+    new_obs_df = new_obs_df.reindex(columns=main_data.columns)
     
     return new_obs_df
 
 
-def add_events(main_data):
+def add_events(main_data, allocator=None):
     """Add additional events that may affect financial inclusion"""
+    allocator = allocator or RecordIdAllocator(main_data)
     new_events = []
     
     # 1. Interoperability mandate
     new_event = {
-        'record_id': get_next_event_id(main_data),
+        'record_id': allocator.next_id("EVT"),
         'record_type': 'event',
         'category': 'regulation',
         'pillar': None,  # Events don't have pillars
@@ -296,7 +371,7 @@ def add_events(main_data):
     
     # 2. QR code payment standardization
     new_event = {
-        'record_id': get_next_event_id(main_data),
+        'record_id': allocator.next_id("EVT"),
         'record_type': 'event',
         'category': 'infrastructure',
         'pillar': None,
@@ -335,7 +410,7 @@ def add_events(main_data):
     
     # 3. Agent network expansion program
     new_event = {
-        'record_id': get_next_event_id(main_data),
+        'record_id': allocator.next_id("EVT"),
         'record_type': 'event',
         'category': 'infrastructure',
         'pillar': None,
@@ -375,18 +450,15 @@ def add_events(main_data):
     # Convert to DataFrame
     new_events_df = pd.DataFrame(new_events)
     
-    # Ensure all columns match
-    for col in main_data.columns:
-        if col not in new_events_df.columns:
-            new_events_df[col] = None
-    
-    new_events_df = new_events_df[main_data.columns]
+    # Align to the existing column order (missing columns are left empty)
+    new_events_df = new_events_df.reindex(columns=main_data.columns)
     
     return new_events_df
 
 
-def add_impact_links(main_data, impact_links, new_events_df):
+def add_impact_links(main_data, impact_links, new_events_df, allocator=None):
     """Add impact links connecting events to indicators"""
+    allocator = allocator or RecordIdAllocator(impact_links)
     new_links = []
     
     # Get event IDs from new events
@@ -396,7 +468,7 @@ def add_impact_links(main_data, impact_links, new_events_df):
     
     # 1. Interoperability → USAGE (P2P transactions)
     new_link = {
-        'record_id': get_next_impact_id(impact_links),
+        'record_id': allocator.next_id("IMP"),
         'parent_id': interop_event_id,
         'record_type': 'impact_link',
         'category': None,
@@ -436,7 +508,7 @@ def add_impact_links(main_data, impact_links, new_events_df):
     
     # 2. QR Standard → USAGE (merchant payments)
     new_link = {
-        'record_id': get_next_impact_id(impact_links),
+        'record_id': allocator.next_id("IMP"),
         'parent_id': qr_event_id,
         'record_type': 'impact_link',
         'category': None,
@@ -476,7 +548,7 @@ def add_impact_links(main_data, impact_links, new_events_df):
     
     # 3. Agent Expansion → ACCESS
     new_link = {
-        'record_id': get_next_impact_id(impact_links),
+        'record_id': allocator.next_id("IMP"),
         'parent_id': agent_event_id,
         'record_type': 'impact_link',
         'category': None,
@@ -517,16 +589,58 @@ def add_impact_links(main_data, impact_links, new_events_df):
     # Convert to DataFrame
     new_links_df = pd.DataFrame(new_links)
     
-    # Ensure all columns match
-    for col in impact_links.columns:
-        if col not in new_links_df.columns:
-            new_links_df[col] = None
-    
-    new_links_df = new_links_df[impact_links.columns]
+    # Align to the existing column order (missing columns are left empty)
+    new_links_df = new_links_df.reindex(columns=impact_links.columns)
     
     return new_links_df
 
 
+def _record_keys(df, columns):
+    """Tuples identifying records by content (dates compared by day, text case-sensitively)"""
+    parts = []
+    for col in columns:
+        values = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if col in ("observation_date", "period_start", "period_end"):
+            values = pd.to_datetime(values, errors="coerce").dt.strftime("%Y-%m-%d")
+        parts.append(values.astype(object).where(values.notna(), None))
+    return list(zip(*parts)) if parts else []
+
+
+def drop_existing_records(main_data, impact_links, observations, events, links):
+    """
+    Drop new records that the data already holds under other IDs.
+    
+    An observation is a duplicate when its (indicator_code, observation_date,
+    source_name) is already observed, and an event when its (indicator_code,
+    observation_date) is. Links of a duplicate event are moved to the existing
+    event and dropped if that event already has a link to the same indicator.
+    Re-running an incremental enrichment therefore adds nothing twice.
+    
+    Returns:
+        tuple: (observations, events, links) DataFrames without the duplicates
+    """
+    obs_cols = ["indicator_code", "observation_date", "source_name"]
+    event_cols = ["indicator_code", "observation_date"]
+    existing_obs = main_data[main_data["record_type"] == "observation"]
+    existing_events = main_data[main_data["record_type"] == "event"]
+    
+    seen = set(_record_keys(existing_obs, obs_cols))
+    observations = observations[[key not in seen for key in _record_keys(observations, obs_cols)]]
+    
+    event_ids = dict(zip(_record_keys(existing_events, event_cols), existing_events["record_id"]))
+    keys = _record_keys(events, event_cols)
+    # new event id -> id of the same event already in the data
+    moved = {new_id: event_ids[key] for new_id, key in zip(events["record_id"], keys) if key in event_ids}
+    events = events[[key not in event_ids for key in keys]]
+    
+    links = links.copy()
+    links["parent_id"] = links["parent_id"].map(lambda pid: moved.get(pid, pid))
+    link_cols = ["parent_id", "related_indicator"]
+    seen = set(_record_keys(impact_links, link_cols))
+    links = links[[key not in seen for key in _record_keys(links, link_cols)]]
+    return observations, events, links
+
+
 def save_enriched_data(main_data, impact_links, output_file):
     """Save the enriched dataset"""
     project_root = Path(__file__).parent.parent
@@ -537,41 +651,108 @@ def save_enriched_data(main_data, impact_links, output_file):
     
     # Save to Excel with two sheets
     with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-        main_data.to_excel(writer, sheet_name='ethiopia_fi_unified_data', index=False)
-        impact_links.to_excel(writer, sheet_name='Impact_sheet', index=False)
+        main_data.to_excel(writer, sheet_name=MAIN_SHEET, index=False)
+        impact_links.to_excel(writer, sheet_name=IMPACT_SHEET, index=False)
     
     print(f"Enriched data saved to: {output_path}")
     return output_path
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add observations, events and impact links to the dataset")
+    parser.add_argument("--incremental", action="store_true",
+                        help="append the new rows as a batch to the enrichment store "
+                             "instead of rewriting the enriched workbook")
+    parser.add_argument("--batch-id", default=None,
+                        help="id for the incremental batch (default: timestamp)")
+    parser.add_argument("--ingest", nargs="+", default=None, metavar="FILE",
+                        help="add the records in these CSV/JSONL files instead of the "
+                             "built-in additions")
+    parser.add_argument("--chunksize", type=int, default=10_000,
+                        help="rows read per chunk when ingesting files")
+    parser.add_argument("--export-excel", nargs="?", const="ethiopia_fi_unified_data_enriched.xlsx",
+                        default=None, metavar="FILE",
+                        help="after an incremental run, also export the enriched view to "
+                             "data/processed/FILE")
+    args = parser.parse_args()
+    
     print("Loading existing data...")
-    main_data, impact_links = load_existing_data()
+    if args.incremental and enrichment_store.store_exists():
+        # Continue from the enriched view so new ids follow earlier batches
+        main_data, impact_links = enrichment_store.materialize()
+    else:
+        main_data, impact_links = load_existing_data()
     
     print(f"Original main data: {len(main_data)} records")
     print(f"Original impact links: {len(impact_links)} records")
-    
-    print("\nAdding new observations...")
-    new_observations = add_observations(main_data)
-    print(f"Added {len(new_observations)} new observations")
-    
-    print("\nAdding new events...")
-    new_events = add_events(main_data)
-    print(f"Added {len(new_events)} new events")
-    
-    print("\nAdding new impact links...")
-    new_links = add_impact_links(main_data, impact_links, new_events)
-    print(f"Added {len(new_links)} new impact links")
-    
-    # Combine with existing data
-    enriched_main = pd.concat([main_data, new_observations, new_events], ignore_index=True)
-    enriched_links = pd.concat([impact_links, new_links], ignore_index=True)
-    
-    print(f"\nEnriched main data: {len(enriched_main)} records")
-    print(f"Enriched impact links: {len(enriched_links)} records")
-    
-    # Save enriched data
-    output_file = "ethiopia_fi_unified_data_enriched.xlsx"
-    save_enriched_data(enriched_main, enriched_links, output_file)
+    link_index = EventLinkIndex.from_data(main_data, impact_links)
+    # One ID scan for all new records; counters carry across the add_* calls
+    allocator = RecordIdAllocator(main_data, impact_links)
+    
+    if args.ingest:
+        import ingest  # imports this module for RecordIdAllocator
+        print(f"\nIngesting {len(args.ingest)} file(s)...")
+        batch = ingest.ingest_files(args.ingest, main_data, impact_links,
+                                    ref_codes=load_reference_codes(), allocator=allocator,
+                                    chunksize=args.chunksize)
+        new_observations, new_events, new_links = (
+            batch["observations"], batch["events"], batch["impact_links"])
+        print(f"Accepted {len(new_observations)} observations, {len(new_events)} events, "
+              f"{len(new_links)} impact links")
+        violations = batch["violations"]
+        if len(violations) > 0:
+            print(f"Rejected {violations['row'].nunique()} rows:")
+            print(violations.groupby(["field", "issue"]).size().to_string())
+    else:
+        print("\nAdding new observations...")
+        new_observations = add_observations(main_data, allocator)
+        print(f"Added {len(new_observations)} new observations")
+    
+        print("\nAdding new events...")
+        new_events = add_events(main_data, allocator)
+        print(f"Added {len(new_events)} new events")
+    
+        print("\nAdding new impact links...")
+        new_links = add_impact_links(main_data, impact_links, new_events, allocator)
+        print(f"Added {len(new_links)} new impact links")
+    
+    n_before = len(new_observations) + len(new_events) + len(new_links)
+    new_observations, new_events, new_links = drop_existing_records(
+        main_data, impact_links, new_observations, new_events, new_links)
+    n_skipped = n_before - len(new_observations) - len(new_events) - len(new_links)
+    if n_skipped:
+        print(f"Skipped {n_skipped} records already in the data")
+    if args.incremental and len(new_observations) + len(new_events) + len(new_links) == 0:
+        print("\nNothing new to add: every record is already in the enriched data")
+        sys.exit(0)
+    
+    # Update the event/link index with the new rows only
+    link_index.append_events(new_events)
+    link_index.append_links(new_links)
+    orphans = link_index.orphan_links()
+    if len(orphans) > 0:
+        print(f"Warning: {len(orphans)} impact links point at unknown events: "
+              f"{sorted(orphans['parent_id'].astype(str).unique())}")
+    print(f"Events without impact links: {link_index.unlinked_events()['record_id'].nunique()}")
+    
+    if args.incremental:
+        entry = enrichment_store.append_batch(args.batch_id, observations=new_observations,
+                                              events=new_events, impact_links=new_links)
+        print(f"\nAppended batch {entry['batch_id']} to {enrichment_store.get_store_dir()}")
+        if args.export_excel:
+            output_path = Path(__file__).parent.parent / "data" / "processed" / args.export_excel
+            enrichment_store.export_excel(output_path)
+            print(f"Enriched data exported to: {output_path}")
+    else:
+        # Combine with existing data
+        enriched_main = pd.concat([main_data, new_observations, new_events], ignore_index=True)
+        enriched_links = pd.concat([impact_links, new_links], ignore_index=True)
+        
+        print(f"\nEnriched main data: {len(enriched_main)} records")
+        print(f"Enriched impact links: {len(enriched_links)} records")
+        
+        # Save enriched data
+        output_file = args.export_excel or "ethiopia_fi_unified_data_enriched.xlsx"
+        save_enriched_data(enriched_main, enriched_links, output_file)
     
     print("\nEnrichment complete!")
@@ -0,0 +1,222 @@
+"""
+Append-only store for enrichment batches
+
+Each enrichment run is written as a batch of delta tables (observations,
+events, impact_links) to Parquet files under
+data/processed/enrichment_store/<table>/batch=<batch id>.parquet, and recorded
+in batches.jsonl once its files are in place. The raw unified workbook stays
+the base; the enriched view (base + all deltas, in batch order) is
+materialized on demand and cached until the base workbook or the batch log
+changes. Exporting the enriched view to Excel is an optional last step.
+"""
+
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from data_loader import (MAIN_SHEET, IMPACT_SHEET, _from_parquet_safe, _to_parquet_safe,
+                         apply_schema, get_data_path, load_unified_data, parquet_available)
+
+
+STORE_DIRNAME = "enrichment_store"
+BATCH_LOG = "batches.jsonl"
+MATERIALIZED_DIRNAME = "materialized"
+DELTA_TABLES = ("observations", "events", "impact_links")
+
+_BATCH_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def get_store_dir():
+    """Get the default enrichment store directory"""
+    project_root = Path(__file__).parent.parent
+    return project_root / "data" / "processed" / STORE_DIRNAME
+
+
+def _require_parquet():
+    if not parquet_available():
+        raise ImportError("The enrichment store needs a Parquet engine; install pyarrow")
+
+
+def list_batches(store_dir=None):
+    """
+    Read the batch log.
+
+    Returns:
+        list of dict: one entry per committed batch, oldest first
+    """
+    store_dir = Path(store_dir) if store_dir is not None else get_store_dir()
+    log_path = store_dir / BATCH_LOG
+    if not log_path.exists():
+        return []
+    with open(log_path) as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def store_exists(store_dir=None):
+    """Check whether the store holds at least one committed batch"""
+    return len(list_batches(store_dir)) > 0
+
+
+def new_batch_id():
+    """Timestamp-based batch id"""
+    return datetime.now().strftime("%Y%m%dT%H%M%S%f")
+
+
+def append_batch(batch_id=None, observations=None, events=None, impact_links=None,
+                 store_dir=None, note=None):
+    """
+    Write one enrichment batch to the store.
+
+    The delta files are written first and the batch becomes visible only
+    when its line is appended to the batch log, so an interrupted write
+    leaves the store unchanged.
+
+    Args:
+        batch_id: Unique id for the batch (default: a timestamp)
+        observations, events, impact_links: New rows (DataFrames or None)
+        store_dir: Store directory (default: data/processed/enrichment_store)
+        note: Optional free-text description kept in the log
+
+    Returns:
+        dict: The log entry written for the batch
+
+    Raises:
+        ValueError: If the batch id is invalid or already used
+    """
+    _require_parquet()
+    store_dir = Path(store_dir) if store_dir is not None else get_store_dir()
+    batch_id = batch_id or new_batch_id()
+    if not _BATCH_ID_PATTERN.match(batch_id):
+        raise ValueError(f"Invalid batch id: {batch_id!r}")
+    if any(b["batch_id"] == batch_id for b in list_batches(store_dir)):
+        raise ValueError(f"Batch {batch_id!r} already exists in {store_dir}")
+
+    tables = {"observations": observations, "events": events, "impact_links": impact_links}
+    files = {}
+    rows = {}
+    for table, df in tables.items():
+        rows[table] = 0 if df is None else len(df)
+        if df is None or len(df) == 0:
+            continue
+        table_dir = store_dir / table
+        table_dir.mkdir(parents=True, exist_ok=True)
+        filename = f"batch={batch_id}.parquet"
+        tmp_path = table_dir / (filename + ".tmp")
+        _to_parquet_safe(df.reset_index(drop=True)).to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, table_dir / filename)
+        files[table] = f"{table}/{filename}"
+
+    entry = {
+        "batch_id": batch_id,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "rows": rows,
+        "files": files,
+    }
+    if note:
+        entry["note"] = note
+    store_dir.mkdir(parents=True, exist_ok=True)
+    with open(store_dir / BATCH_LOG, "a") as fh:
+        fh.write(json.dumps(entry) + "\n")
+    return entry
+
+
+def load_deltas(store_dir=None):
+    """
+    Read every committed delta, concatenated per table in batch order.
+
+    Returns:
+        dict: table name -> DataFrame (empty if the table has no deltas)
+    """
+    _require_parquet()
+    store_dir = Path(store_dir) if store_dir is not None else get_store_dir()
+    parts = {table: [] for table in DELTA_TABLES}
+    for batch in list_batches(store_dir):
+        for table, relpath in batch["files"].items():
+            parts[table].append(_from_parquet_safe(pd.read_parquet(store_dir / relpath)))
+    return {table: pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            for table, frames in parts.items()}
+
+
+def _base_signature(base_path):
+    stat = Path(base_path).stat()
+    return {"base": Path(base_path).name, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _concat_rows(frames):
+    frames = [df for df in frames if len(df) > 0]
+    return pd.concat(frames, ignore_index=True)
+
+
+def materialize(store_dir=None, use_cache=True, typed=True):
+    """
+    Build the enriched view: the raw unified data plus every batch.
+
+    The result is cached under <store>/materialized/ and reused until the
+    base workbook changes or a batch is appended.
+
+    Args:
+        store_dir: Store directory (default: data/processed/enrichment_store)
+        use_cache: Reuse the materialized view and the workbook's Parquet
+            cache when fresh
+        typed: Apply the typed schema (data_loader.apply_schema)
+
+    Returns:
+        tuple: (main_data DataFrame, impact_links DataFrame)
+    """
+    _require_parquet()
+    store_dir = Path(store_dir) if store_dir is not None else get_store_dir()
+    out_dir = store_dir / MATERIALIZED_DIRNAME
+    manifest_path = out_dir / "manifest.json"
+
+    signature = _base_signature(get_data_path("ethiopia_fi_unified_data.xlsx"))
+    signature["batches"] = [b["batch_id"] for b in list_batches(store_dir)]
+
+    if use_cache and manifest_path.exists():
+        with open(manifest_path) as fh:
+            manifest = json.load(fh)
+        if manifest == signature and all((out_dir / f"{name}.parquet").exists()
+                                         for name in ("main", "impact_links")):
+            main_data = _from_parquet_safe(pd.read_parquet(out_dir / "main.parquet"))
+            impact_links = _from_parquet_safe(pd.read_parquet(out_dir / "impact_links.parquet"))
+            if typed:
+                return apply_schema(main_data), apply_schema(impact_links)
+            return main_data, impact_links
+
+    main_data, impact_links = load_unified_data(use_cache=use_cache, typed=False)
+    deltas = load_deltas(store_dir)
+    main_data = _concat_rows([main_data, deltas["observations"], deltas["events"]])
+    impact_links = _concat_rows([impact_links, deltas["impact_links"]])
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    # per-process temporary files: parallel pipeline stages may materialize at once
+    for name, table in (("main", main_data), ("impact_links", impact_links)):
+        tmp_path = out_dir / f"{name}.parquet.{os.getpid()}.tmp"
+        _to_parquet_safe(table).to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, out_dir / f"{name}.parquet")
+    tmp_path = out_dir / f"manifest.json.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(signature, fh, indent=2)
+    os.replace(tmp_path, manifest_path)
+    if typed:
+        return apply_schema(main_data), apply_schema(impact_links)
+    return main_data, impact_links
+
+
+def export_excel(output_path, store_dir=None, use_cache=True):
+    """
+    Write the materialized enriched view to a unified-format workbook.
+
+    Returns:
+        Path: The workbook written
+    """
+    main_data, impact_links = materialize(store_dir, use_cache=use_cache, typed=False)
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
+        main_data.to_excel(writer, sheet_name=MAIN_SHEET, index=False)
+        impact_links.to_excel(writer, sheet_name=IMPACT_SHEET, index=False)
+    return output_path
@@ -0,0 +1,227 @@
+"""
+Event effect modeling for Task 3
+
+Evaluates how impact_links translate events into indicator changes over time.
+Each link is reduced once to flat arrays (event date, lag, impact, direction,
+response type); effects for all links x all dates x all indicators are then
+computed with array broadcasting instead of looping over events row by row.
+
+Response curves (months measured from the event date, effect starts after lag):
+    immediate: full impact as soon as the lag has passed
+    gradual:   linear ramp to full impact over 12 months after the lag
+    delayed:   linear ramp to full impact over 24 months after the lag
+"""
+
+import numpy as np
+import pandas as pd
+
+
+EFFECT_TYPES = ("immediate", "gradual", "delayed")
+RAMP_MONTHS = np.array([0.0, 12.0, 24.0])  # indexed by position in EFFECT_TYPES
+
+# Response type by event category; other categories use the default type
+CATEGORY_EFFECT_TYPES = {
+    "infrastructure": "delayed",
+    "policy": "delayed",
+    "product_launch": "gradual",
+    "market_entry": "gradual",
+}
+
+DAYS_PER_MONTH = 30.44  # average days per month
+
+# Sign of an impact_direction label
+DIRECTION_SIGNS = {"increase": 1.0, "decrease": -1.0}
+
+
+def _first_column(df, candidates):
+    for col in candidates:
+        if col in df.columns:
+            return col
+    return None
+
+
+def join_links_to_events(impact_links, events):
+    """
+    Attach event name, category and date to each impact link via parent_id.
+
+    Returns:
+        DataFrame: impact_links with event_name, event_category and event_date
+    """
+    events = events.drop_duplicates("record_id")
+    event_cols = events[["record_id", "indicator", "category", "observation_date"]].rename(columns={
+        "record_id": "parent_id",
+        "indicator": "event_name",
+        "category": "event_category",
+        "observation_date": "event_date",
+    })
+    return impact_links.merge(event_cols, on="parent_id", how="left")
+
+
+def build_link_arrays(impact_links, events=None, default_effect_type="gradual"):
+    """
+    Precompute per-link arrays for the effect engine.
+
+    Args:
+        impact_links: Impact links table. If events is None it must already be
+            joined to its events (e.g. the notebook's impact_with_events, with
+            observation_date_event / event_category columns).
+        events: Event records from the main table, or None
+        default_effect_type: Response type for categories not listed in
+            CATEGORY_EFFECT_TYPES
+
+    Returns:
+        dict of aligned arrays, one entry per usable link:
+            record_id, parent_id, event_name, indicator_code (str),
+            indicator_idx (int codes into 'indicators'), indicators,
+            event_date (datetime64[ns]), lag_months, impact (magnitude),
+            direction (+1/-1), effect_type (int codes into EFFECT_TYPES)
+        Links without an event date, impact_estimate or lag_months are dropped.
+    """
+    if default_effect_type not in EFFECT_TYPES:
+        raise ValueError(f"Unknown effect type: {default_effect_type}")
+
+    joined = impact_links if events is None else join_links_to_events(impact_links, events)
+    date_col = _first_column(joined, ["event_date", "observation_date_event", "observation_date"])
+    category_col = _first_column(joined, ["event_category", "category_event", "category"])
+    name_col = _first_column(joined, ["event_name", "indicator_event", "indicator"])
+    id_col = _first_column(joined, ["record_id", "record_id_impact"])
+
+    event_date = pd.to_datetime(joined[date_col], errors="coerce")
+    keep = (event_date.notna() & joined["impact_estimate"].notna()
+            & joined["lag_months"].notna() & joined["related_indicator"].notna()).to_numpy()
+    joined = joined[keep]
+    event_date = event_date[keep]
+
+    estimate = joined["impact_estimate"].to_numpy(dtype=float)
+    # the sign of impact_estimate wins; impact_direction covers unsigned estimates
+    text_sign = joined["impact_direction"].astype(object).map(DIRECTION_SIGNS).fillna(1.0).to_numpy()
+    direction = np.where(estimate != 0, np.sign(estimate), text_sign)
+
+    effect_names = (joined[category_col].astype(object).map(CATEGORY_EFFECT_TYPES).fillna(default_effect_type)
+                    if category_col else pd.Series(default_effect_type, index=joined.index))
+    indicator_idx, indicators = pd.factorize(joined["related_indicator"].astype(str), sort=True)
+
+    return {
+        "record_id": joined[id_col].to_numpy() if id_col else np.arange(len(joined)),
+        "parent_id": joined["parent_id"].to_numpy() if "parent_id" in joined.columns else None,
+        "event_name": joined[name_col].to_numpy() if name_col else None,
+        "indicator_code": joined["related_indicator"].astype(str).to_numpy(),
+        "indicator_idx": indicator_idx,
+        "indicators": np.asarray(indicators),
+        "event_date": event_date.to_numpy(dtype="datetime64[ns]"),
+        "lag_months": joined["lag_months"].to_numpy(dtype=float),
+        "impact": np.abs(estimate),
+        "direction": direction,
+        "effect_type": np.array([EFFECT_TYPES.index(t) for t in effect_names], dtype=np.int8),
+    }
+
+
+def response_shape(months_after, lag_months, ramp_months):
+    """
+    Fraction of the full impact reached, for broadcastable arrays of months
+    since the event, lags and ramp lengths (0 = immediate).
+    """
+    effective = np.asarray(months_after, dtype=float) - lag_months
+    ramp = np.asarray(ramp_months, dtype=float)
+    ramped = np.clip(effective / np.where(ramp > 0, ramp, 1.0), 0.0, 1.0)
+    shape = np.where(ramp > 0, ramped, 1.0)
+    return np.where(effective < 0, 0.0, shape)
+
+
+def months_since(event_dates, dates):
+    """Months from each event date (L,) to each target date (D,), as an (L, D) array"""
+    dates = pd.to_datetime(pd.Index(np.atleast_1d(dates))).to_numpy(dtype="datetime64[ns]")
+    delta = dates[None, :] - np.asarray(event_dates, dtype="datetime64[ns]")[:, None]
+    return delta / np.timedelta64(1, "D") / DAYS_PER_MONTH
+
+
+def link_effects(links, dates, effect_type=None):
+    """
+    Effect of every link at every date.
+
+    Args:
+        links: dict from build_link_arrays
+        dates: Target dates (D,)
+        effect_type: Force one response type for all links (default: per link)
+
+    Returns:
+        ndarray (L, D) of signed effects in the units of impact_estimate
+    """
+    if effect_type is None:
+        ramp = RAMP_MONTHS[links["effect_type"]]
+    else:
+        ramp = np.full(len(links["impact"]), RAMP_MONTHS[EFFECT_TYPES.index(effect_type)])
+    months = months_since(links["event_date"], dates)
+    shape = response_shape(months, links["lag_months"][:, None], ramp[:, None])
+    return (links["impact"] * links["direction"])[:, None] * shape
+
+
+def event_effects_tensor(links, dates, effect_type=None):
+    """
+    Effects of all links on all indicators at all dates in one broadcast.
+
+    Returns:
+        tuple: (tensor ndarray (n_indicators, n_dates, n_links), indicator codes)
+        A link only contributes to the indicator it targets; sum over the last
+        axis for combined effects.
+    """
+    effects = link_effects(links, dates, effect_type=effect_type)
+    targets = links["indicator_idx"][None, :] == np.arange(len(links["indicators"]))[:, None]
+    return targets[:, None, :] * effects.T[None, :, :], links["indicators"]
+
+
+def compute_event_effects(links, dates, indicators=None, effect_type=None):
+    """
+    Combined (additive) effect of all events per indicator and date.
+
+    Returns:
+        DataFrame indexed by date with one column per indicator
+    """
+    effects = link_effects(links, dates, effect_type=effect_type)
+    combined = np.zeros((len(links["indicators"]), effects.shape[1]))
+    np.add.at(combined, links["indicator_idx"], effects)
+
+    result = pd.DataFrame(combined.T, index=pd.to_datetime(pd.Index(np.atleast_1d(dates))),
+                          columns=links["indicators"])
+    if indicators is not None:
+        result = result.reindex(columns=list(indicators), fill_value=0.0)
+    return result
+
+
+def calculate_event_effect(event_date, impact_estimate, lag_months, effect_type='gradual',
+                           months_after_event=None):
+    """
+    Effect of one event at given months after it (scalar or array).
+
+    Kept with the signature used in notebooks/task3_event_impact_modeling.ipynb.
+    """
+    if months_after_event is None:
+        return 0
+    ramp = RAMP_MONTHS[EFFECT_TYPES.index(effect_type)] if effect_type in EFFECT_TYPES else None
+    if ramp is None:
+        return np.zeros_like(np.asarray(months_after_event, dtype=float)) if np.ndim(months_after_event) else 0
+    effect = impact_estimate * response_shape(months_after_event, lag_months, ramp)
+    return effect if np.ndim(effect) else float(effect)
+
+
+def combine_event_effects(events_df, target_date, target_indicator, effect_type='gradual'):
+    """
+    Combined effect of all events on one indicator at a target date.
+
+    Kept with the signature used in notebooks/task3_event_impact_modeling.ipynb,
+    where events_df is impact_links joined to events.
+
+    Returns:
+        tuple: (total effect, list of per-event {'event', 'effect', 'months_after'})
+    """
+    relevant = events_df[events_df['related_indicator'] == target_indicator]
+    links = build_link_arrays(relevant, default_effect_type=effect_type)
+    if len(links["impact"]) == 0:
+        return 0, []
+
+    effects = link_effects(links, [target_date])[:, 0]
+    months_after = months_since(links["event_date"], [target_date])[:, 0]
+    names = links["event_name"] if links["event_name"] is not None else ["Unknown"] * len(effects)
+    effects_list = [{'event': name, 'effect': effect, 'months_after': months}
+                    for name, effect, months in zip(names, effects, months_after)]
+    return float(effects.sum()), effects_list
@@ -0,0 +1,275 @@
+"""
+Indexed event / impact-link graph
+
+EventLinkIndex codes record ids and indicator codes as integers once and keeps
+CSR-style adjacency arrays (event -> links, indicator -> links), so neighbor
+lookups are a dict hit plus an array slice instead of a merge or set difference
+over the full tables. Appending events or links only codes the new rows; the
+adjacency is re-packed lazily on the next query.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from event_effects import DIRECTION_SIGNS
+
+
+def _csr(codes, n_nodes):
+    """Pack (row position, node code) pairs into CSR arrays (indptr, row positions)"""
+    codes = np.asarray(codes, dtype=np.int64)
+    valid = np.flatnonzero(codes >= 0)
+    order = valid[np.argsort(codes[valid], kind="stable")]
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes[valid], minlength=n_nodes), out=indptr[1:])
+    return indptr, order
+
+
+class EventLinkIndex:
+    """
+    Integer-coded index over events and the impact links that point at them.
+
+    Nodes are the record ids of events plus any parent_id that is not a known
+    event (orphan parents), so every link has a node. Row positions refer to
+    the events / links frames held by the index (see the events and links
+    attributes, original index labels kept), which grow as rows are appended.
+
+    Args:
+        events: Event records (record_type == 'event')
+        impact_links: Impact link records with parent_id and related_indicator
+    """
+
+    def __init__(self, events, impact_links):
+        self._node_ids = []
+        self._node_code = {}
+        self._node_event_row = []      # first event row per node, -1 for orphan parents
+        self._indicators = []
+        self._indicator_code = {}
+        self._link_row = {}            # link record_id -> first link row
+
+        self.events = events.iloc[:0].copy()
+        self.links = impact_links.iloc[:0].copy()
+        self._event_nodes = np.zeros(0, dtype=np.int64)
+        self._link_nodes = np.zeros(0, dtype=np.int64)
+        self._link_indicators = np.zeros(0, dtype=np.int64)
+        self._dirty = True
+
+        self.append_events(events)
+        self.append_links(impact_links)
+
+    @classmethod
+    def from_data(cls, df, impact_links):
+        """Build the index from the main table (all record types) and impact links"""
+        return cls(df[df["record_type"] == "event"], impact_links)
+
+    # ------------------------------------------------------------------ coding
+
+    def _code_nodes(self, ids):
+        codes = np.empty(len(ids), dtype=np.int64)
+        for i, record_id in enumerate(ids):
+            if record_id is None or (isinstance(record_id, float) and np.isnan(record_id)):
+                codes[i] = -1
+                continue
+            code = self._node_code.get(record_id)
+            if code is None:
+                code = len(self._node_ids)
+                self._node_code[record_id] = code
+                self._node_ids.append(record_id)
+                self._node_event_row.append(-1)
+            codes[i] = code
+        return codes
+
+    def _code_indicators(self, codes_in):
+        codes = np.empty(len(codes_in), dtype=np.int64)
+        for i, indicator in enumerate(codes_in):
+            if pd.isna(indicator):
+                codes[i] = -1
+                continue
+            code = self._indicator_code.get(indicator)
+            if code is None:
+                code = len(self._indicators)
+                self._indicator_code[indicator] = code
+                self._indicators.append(indicator)
+            codes[i] = code
+        return codes
+
+    def append_events(self, new_events):
+        """Add event records; only the new rows are coded"""
+        if len(new_events) == 0:
+            return
+        start = len(self.events)
+        ids = new_events["record_id"].tolist() if "record_id" in new_events.columns else [None] * len(new_events)
+        codes = self._code_nodes(ids)
+        for offset, code in enumerate(codes):
+            if code >= 0 and self._node_event_row[code] < 0:
+                self._node_event_row[code] = start + offset
+        self.events = pd.concat([self.events, new_events]) if start else new_events
+        self._event_nodes = np.concatenate([self._event_nodes, codes])
+        self._dirty = True
+
+    def append_links(self, new_links):
+        """Add impact links; only the new rows are coded"""
+        if len(new_links) == 0:
+            return
+        start = len(self.links)
+        parents = new_links["parent_id"].tolist() if "parent_id" in new_links.columns else [None] * len(new_links)
+        indicators = (new_links["related_indicator"].tolist() if "related_indicator" in new_links.columns
+                      else [None] * len(new_links))
+        if "record_id" in new_links.columns:
+            for offset, record_id in enumerate(new_links["record_id"].tolist()):
+                self._link_row.setdefault(record_id, start + offset)
+        self.links = pd.concat([self.links, new_links]) if start else new_links
+        self._link_nodes = np.concatenate([self._link_nodes, self._code_nodes(parents)])
+        self._link_indicators = np.concatenate([self._link_indicators, self._code_indicators(indicators)])
+        self._dirty = True
+
+    def _refresh(self):
+        if not self._dirty:
+            return
+        self._node_ptr, self._node_links = _csr(self._link_nodes, len(self._node_ids))
+        self._ind_ptr, self._ind_links = _csr(self._link_indicators, len(self._indicators))
+        self._is_event = np.asarray(self._node_event_row, dtype=np.int64) >= 0
+        self._dirty = False
+
+    # ----------------------------------------------------------------- queries
+
+    @property
+    def indicators(self):
+        """Indicator codes in the order they were first seen"""
+        return list(self._indicators)
+
+    def event_row(self, record_id):
+        """Row position of an event in self.events, or None"""
+        code = self._node_code.get(record_id)
+        if code is None or self._node_event_row[code] < 0:
+            return None
+        return self._node_event_row[code]
+
+    def link_row(self, record_id):
+        """Row position of an impact link in self.links, or None"""
+        return self._link_row.get(record_id)
+
+    def links_for_event(self, record_id):
+        """Row positions (in self.links) of the links whose parent_id is record_id"""
+        self._refresh()
+        code = self._node_code.get(record_id)
+        if code is None:
+            return np.zeros(0, dtype=np.int64)
+        return self._node_links[self._node_ptr[code]:self._node_ptr[code + 1]]
+
+    def links_for_indicator(self, indicator_code):
+        """Row positions (in self.links) of the links targeting an indicator"""
+        self._refresh()
+        code = self._indicator_code.get(indicator_code)
+        if code is None:
+            return np.zeros(0, dtype=np.int64)
+        return self._ind_links[self._ind_ptr[code]:self._ind_ptr[code + 1]]
+
+    def indicators_for_event(self, record_id):
+        """Indicator codes affected by an event"""
+        codes = self._link_indicators[self.links_for_event(record_id)]
+        return [self._indicators[c] for c in pd.unique(codes[codes >= 0])]
+
+    def events_for_indicator(self, indicator_code):
+        """parent_ids of the links targeting an indicator"""
+        nodes = self._link_nodes[self.links_for_indicator(indicator_code)]
+        return [self._node_ids[n] for n in pd.unique(nodes[nodes >= 0])]
+
+    def event_degree(self):
+        """Number of impact links per event row"""
+        self._refresh()
+        degree = np.diff(self._node_ptr)
+        return np.where(self._event_nodes >= 0, degree[np.maximum(self._event_nodes, 0)], 0)
+
+    def unlinked_events(self):
+        """Event records that no impact link points at"""
+        return self.events[self.event_degree() == 0]
+
+    def orphan_links(self):
+        """Impact links whose parent_id is missing or not a known event"""
+        self._refresh()
+        nodes = self._link_nodes
+        orphan = (nodes < 0) | ~self._is_event[np.maximum(nodes, 0)]
+        return self.links[orphan]
+
+    def event_indicator_matrix(self, values="estimate", label="event_name"):
+        """
+        Event x indicator matrix over all linked parents.
+
+        Args:
+            values: 'estimate' for signed impact estimates (sign from
+                impact_direction, +/-1 when there is no estimate), 'label' for
+                "direction, estimate, lag, magnitude" strings, or 'count' for
+                the number of links
+            label: 'event_name' to label rows with the event's indicator
+                (event name), or 'record_id'
+
+        Returns:
+            DataFrame with one row per linked parent_id (sorted) and one column
+            per indicator (order of first appearance). When several links share
+            a cell the last one wins (summed for 'count').
+        """
+        self._refresh()
+        valid = np.flatnonzero((self._link_nodes >= 0) & (self._link_indicators >= 0))
+        nodes = self._link_nodes[valid]
+        inds = self._link_indicators[valid]
+
+        parents = np.flatnonzero(np.diff(self._node_ptr) > 0)
+        parents = parents[np.argsort(np.asarray(self._node_ids, dtype=object)[parents].astype(str), kind="stable")]
+        row_of = np.full(len(self._node_ids), -1, dtype=np.int64)
+        row_of[parents] = np.arange(len(parents))
+        rows = row_of[nodes]
+        n_rows, n_cols = len(parents), len(self._indicators)
+
+        if label == "event_name":
+            event_rows = np.asarray(self._node_event_row, dtype=np.int64)[parents]
+            names = (self.events["indicator"].to_numpy(dtype=object) if "indicator" in self.events.columns
+                     else np.full(len(self.events), None, dtype=object))
+            index = pd.Index([names[r] if r >= 0 else np.nan for r in event_rows], name="event_name")
+        else:
+            index = pd.Index([self._node_ids[p] for p in parents], name="record_id")
+
+        if values == "count":
+            grid = np.zeros((n_rows, n_cols))
+            np.add.at(grid, (rows, inds), 1)
+            return pd.DataFrame(grid, index=index, columns=self._indicators)
+
+        # last link wins for each (parent, indicator) cell
+        pair = rows * n_cols + inds
+        _, first_from_end = np.unique(pair[::-1], return_index=True)
+        keep = len(pair) - 1 - first_from_end
+        rows, inds, link_rows = rows[keep], inds[keep], valid[keep]
+        links = self.links.iloc[link_rows]
+        direction = (links["impact_direction"].astype(object) if "impact_direction" in links.columns
+                     else pd.Series(index=links.index, dtype=object))
+        estimate = (pd.to_numeric(links["impact_estimate"], errors="coerce") if "impact_estimate" in links.columns
+                    else pd.Series(np.nan, index=links.index))
+
+        if values == "estimate":
+            sign = direction.map(DIRECTION_SIGNS).to_numpy(dtype=float)
+            cell = sign * np.where(estimate.notna(), estimate.abs(), 1.0)
+            grid = np.full((n_rows, n_cols), np.nan)
+        elif values == "label":
+            lag = (pd.to_numeric(links["lag_months"], errors="coerce") if "lag_months" in links.columns
+                   else pd.Series(np.nan, index=links.index))
+            magnitude = (links["impact_magnitude"].astype(object) if "impact_magnitude" in links.columns
+                         else pd.Series("unknown", index=links.index))
+            cell = direction.fillna("unknown").astype(str)
+            cell = cell + estimate.map(lambda v: f", {v:.1f}pp" if pd.notna(v) else "")
+            cell = cell + lag.map(lambda v: f", lag:{v:.0f}m" if pd.notna(v) else "")
+            cell = cell + magnitude.map(lambda v: f", {v}" if v != "unknown" else "")
+            cell = cell.to_numpy(dtype=object)
+            grid = np.full((n_rows, n_cols), np.nan, dtype=object)
+        else:
+            raise ValueError(f"Unknown matrix values: {values}")
+
+        grid[rows, inds] = cell
+        return pd.DataFrame(grid, index=index, columns=self._indicators)
+
+    def __repr__(self):
+        return (f"EventLinkIndex(events={len(self.events)}, links={len(self.links)}, "
+                f"indicators={len(self._indicators)})")
@@ -0,0 +1,279 @@
+"""
+Event-augmented trend regression
+
+Fits every indicator's trend and the effects of all events on it in one
+ridge regression. The design matrix is a scipy.sparse block matrix with one
+row per observation (indicator x date):
+
+    [ trend block | event block ]
+
+- trend block: an intercept and a slope (years since REF_YEAR) per indicator,
+  block-diagonal over indicators
+- event block: one column per impact link, nonzero only on the rows of the
+  indicator the link targets; the column holds the link's response shape
+  (event_effects.response_shape: a step for immediate effects, a 12/24-month
+  ramp for gradual/delayed ones, shifted by lag_months), so its coefficient
+  is the signed full effect in the indicator's units. impact_estimate is in
+  percentage points, so only indicators measured in PRIOR_UNITS get event
+  columns; counts and ETB values are fitted as plain trends
+
+Event coefficients are shrunk toward their impact_estimate priors with a ridge
+penalty alpha * (coef - prior)^2; trend slopes get a tiny penalty toward zero
+so indicators with a single observation stay identified (flat trend). The
+normal equations are solved with a sparse LU factorization, so the fit scales
+to hundreds of events and monthly observations.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from event_effects import DAYS_PER_MONTH, RAMP_MONTHS, build_link_arrays, response_shape
+
+
+REF_YEAR = 2020.0
+DEFAULT_ALPHA = 10.0  # penalty weight of an event coefficient's distance to its prior
+# impact_estimate is given in percentage points, so events only enter the
+# regression of indicators measured in those units
+PRIOR_UNITS = ("%", "pp")
+SLOPE_ALPHA = 1e-6  # keeps the slope of single-observation indicators identified
+
+
+def observation_table(df):
+    """
+    National, all-gender observations per indicator_code and date.
+
+    As in the forecasting scripts, Global Findex rows are preferred for
+    indicators that have any, and the max value is kept per date.
+
+    Args:
+        df: Main data in the typed schema (data_loader.load_enriched_data),
+            with observation_date parsed
+
+    Returns:
+        DataFrame with columns indicator_code, date, value, unit
+    """
+    obs = df[(df["record_type"] == "observation") & df["value_numeric"].notna()
+             & df["indicator_code"].notna()].copy()
+    obs = obs[(obs["gender"].astype(object).fillna("all") == "all")
+              & (obs["location"].astype(object).fillna("national") == "national")]
+    obs["date"] = obs["observation_date"]
+    obs = obs.dropna(subset=["date"])
+    obs["indicator_code"] = obs["indicator_code"].astype(str)
+
+    is_findex = obs["source_name"].astype(object).str.contains("Global Findex", na=False)
+    has_findex = is_findex.groupby(obs["indicator_code"]).transform("any")
+    obs = obs[is_findex | ~has_findex]
+    table = obs.groupby(["indicator_code", "date"], as_index=False).agg(
+        value=("value_numeric", "max"), unit=("unit", "first"))
+    return table.sort_values(["indicator_code", "date"], ignore_index=True)
+
+
+def decimal_years(dates):
+    """Dates as fractional years (2024-07-02 -> ~2024.5)"""
+    dates = pd.to_datetime(pd.Index(np.atleast_1d(dates)))
+    return (dates.year + (dates.dayofyear - 1) / np.where(dates.is_leap_year, 366.0, 365.0)).to_numpy()
+
+
+def _design(row_indicator, row_dates, n_indicators, links, link_indicator):
+    """
+    Sparse design rows for (indicator index, date) pairs.
+
+    Only (link, row) pairs whose indicators match are evaluated, so the work
+    is proportional to the nonzeros rather than links x rows.
+    """
+    n_rows = len(row_indicator)
+    n_links = len(link_indicator)
+    rows = np.arange(n_rows)
+    t = decimal_years(row_dates) - REF_YEAR
+    trend = sparse.csr_matrix(
+        (np.concatenate([np.ones(n_rows), t]),
+         (np.concatenate([rows, rows]), np.concatenate([2 * row_indicator, 2 * row_indicator + 1]))),
+        shape=(n_rows, 2 * n_indicators))
+
+    # pair each link with the rows of its indicator
+    order = np.argsort(row_indicator, kind="stable")
+    counts = np.bincount(row_indicator, minlength=n_indicators)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    per_link = counts[link_indicator]
+    pair_link = np.repeat(np.arange(n_links), per_link)
+    offsets = np.arange(per_link.sum()) - np.repeat(np.cumsum(per_link) - per_link, per_link)
+    pair_row = order[np.repeat(starts[link_indicator], per_link) + offsets]
+
+    dates = pd.to_datetime(pd.Index(np.atleast_1d(row_dates))).to_numpy(dtype="datetime64[ns]")
+    months = (dates[pair_row] - links["event_date"][pair_link]) / np.timedelta64(1, "D") / DAYS_PER_MONTH
+    shape = response_shape(months, links["lag_months"][pair_link], RAMP_MONTHS[links["effect_type"][pair_link]])
+    keep = shape != 0
+    events = sparse.csr_matrix((shape[keep], (pair_row[keep], pair_link[keep])), shape=(n_rows, n_links))
+    return sparse.hstack([trend, events], format="csr")
+
+
+def build_design(obs, impact_links, events=None):
+    """
+    Build the block design for an observation table and impact links.
+
+    Args:
+        obs: Observation table (see observation_table)
+        impact_links: Impact links table
+        events: Event records from the main table (None if impact_links is
+            already joined to its events)
+
+    Returns:
+        dict: X (csr), y, indicators, links (build_link_arrays output for the
+        links whose indicator has observations in PRIOR_UNITS),
+        link_indicator, columns (DataFrame describing each column), prior,
+        n_obs and last_date per indicator
+    """
+    indicator_idx, indicators = pd.factorize(obs["indicator_code"].astype(str), sort=True)
+    indicators = np.asarray(indicators)
+    links = build_link_arrays(impact_links, events)
+    # links to indicators without observations have no rows to load on, and a
+    # percentage-point prior means nothing for counts or ETB values
+    if "unit" in obs.columns:
+        units = obs["unit"].astype(object).groupby(indicator_idx).first().to_numpy()
+        in_prior_units = np.isin(units, PRIOR_UNITS)
+    else:
+        in_prior_units = np.ones(len(indicators), dtype=bool)
+    lookup = {code: i for i, code in enumerate(indicators) if in_prior_units[i]}
+    link_indicator = np.array([lookup.get(code, -1) for code in links["indicator_code"]], dtype=int)
+    usable = link_indicator >= 0
+    links = {k: (v[usable] if isinstance(v, np.ndarray) and len(v) == len(usable) else v)
+             for k, v in links.items()}
+    link_indicator = link_indicator[usable]
+
+    X = _design(indicator_idx, obs["date"], len(indicators), links, link_indicator)
+    trend_cols = pd.DataFrame({"kind": np.tile(["intercept", "slope"], len(indicators)),
+                               "indicator_code": np.repeat(indicators, 2)})
+    event_cols = pd.DataFrame({"kind": "event", "indicator_code": links["indicator_code"],
+                               "link_id": links["record_id"], "event": links["event_name"]})
+    columns = pd.concat([trend_cols, event_cols], ignore_index=True)
+    prior = np.concatenate([np.zeros(2 * len(indicators)), links["impact"] * links["direction"]])
+    dates = pd.Series(pd.to_datetime(pd.Index(obs["date"])))
+    return {"X": X, "y": obs["value"].to_numpy(dtype=float), "indicators": indicators, "links": links,
+            "link_indicator": link_indicator, "columns": columns, "prior": prior,
+            "n_obs": np.bincount(indicator_idx, minlength=len(indicators)),
+            "last_date": dates.groupby(indicator_idx).max().to_numpy()}
+
+
+def fit_event_regression(design, alpha=DEFAULT_ALPHA, slope_alpha=SLOPE_ALPHA):
+    """
+    Ridge fit of trends and event effects, shrinking events toward their priors.
+
+    Solves (X'X + P) beta = X'y + P prior with P = diag(penalties).
+
+    Returns:
+        dict: beta, coefficients (columns with prior and estimate), s2
+        (residual variance per indicator), A (the penalized normal matrix,
+        for standard errors) and the design metadata needed by
+        predict_event_regression
+    """
+    X, y, columns = design["X"], design["y"], design["columns"]
+    kind = columns["kind"].to_numpy()
+    penalty = np.select([kind == "event", kind == "slope"], [alpha, slope_alpha], 0.0)
+    A = (X.T @ X + sparse.diags(penalty)).tocsc()
+    beta = splu(A).solve(X.T @ y + penalty * design["prior"])
+
+    # residual variance per indicator (their units differ); a slope only
+    # counts as estimated with 2+ observations
+    n_indicators = len(design["indicators"])
+    row_indicator = X[:, 0:2 * n_indicators:2].tocsr().indices
+    n_obs = np.bincount(row_indicator, minlength=n_indicators)
+    resid = y - X @ beta
+    rss = np.bincount(row_indicator, weights=resid ** 2, minlength=n_indicators)
+    s2 = rss / np.maximum(1, n_obs - np.minimum(n_obs, 2))
+
+    coefficients = columns.copy()
+    coefficients["prior"] = design["prior"]
+    coefficients["estimate"] = beta
+    return {"beta": beta, "coefficients": coefficients, "s2": s2, "A": A, "alpha": alpha,
+            "prior": design["prior"], "n_obs": n_obs, "last_date": design["last_date"],
+            "indicators": design["indicators"], "links": design["links"],
+            "link_indicator": design["link_indicator"]}
+
+
+def predict_event_regression(fit, indicator_code, dates):
+    """
+    Forecast one indicator at the given dates.
+
+    Returns:
+        DataFrame with columns date, forecast, trend, event_effect and se
+        (residual plus coefficient uncertainty)
+
+    Raises:
+        KeyError: If the indicator was not in the fit
+    """
+    indicators = list(fit["indicators"])
+    if indicator_code not in indicators:
+        raise KeyError(f"Indicator {indicator_code!r} has no observations in the fit")
+    dates = pd.to_datetime(pd.Index(np.atleast_1d(dates)))
+    idx = indicators.index(indicator_code)
+    row_indicator = np.full(len(dates), idx)
+    X0 = _design(row_indicator, dates, len(indicators), fit["links"], fit["link_indicator"])
+    n_trend = 2 * len(indicators)
+    beta = fit["beta"]
+    trend = X0[:, :n_trend] @ beta[:n_trend]
+    effect = X0[:, n_trend:] @ beta[n_trend:]
+    # var = s2 * (1 + x0' A^-1 x0), solving only for the forecast rows
+    solved = splu(fit["A"]).solve(X0.T.toarray())
+    leverage = np.einsum("ij,ji->i", X0.toarray(), solved)
+    return pd.DataFrame({"date": dates, "forecast": trend + effect, "trend": trend, "event_effect": effect,
+                         "se": np.sqrt(fit["s2"][idx] * (1.0 + leverage))})
+
+
+def prior_lift(fit, indicator_code, dates):
+    """
+    Event effects at their priors, accrued after the indicator's last observation.
+
+    For indicators too short to estimate effects from, this is the lift the
+    impact_links expect on top of the trend of the observed history.
+
+    Returns:
+        ndarray of lifts at the given dates (zeros for indicators without
+        event columns)
+
+    Raises:
+        KeyError: If the indicator was not in the fit
+    """
+    indicators = list(fit["indicators"])
+    if indicator_code not in indicators:
+        raise KeyError(f"Indicator {indicator_code!r} has no observations in the fit")
+    idx = indicators.index(indicator_code)
+    dates = pd.to_datetime(pd.Index(np.atleast_1d(dates)))
+    all_dates = dates.append(pd.DatetimeIndex([fit["last_date"][idx]]))
+    X0 = _design(np.full(len(all_dates), idx), all_dates, len(indicators), fit["links"], fit["link_indicator"])
+    n_trend = 2 * len(indicators)
+    effect = X0[:, n_trend:] @ fit["prior"][n_trend:]
+    return effect[:-1] - effect[-1]
+
+
+def fit_events(df, impact_links, alpha=DEFAULT_ALPHA):
+    """Fit the event regression on a unified main table and its impact links"""
+    events = df[df["record_type"] == "event"]
+    return fit_event_regression(build_design(observation_table(df), impact_links, events), alpha=alpha)
+
+
+if __name__ == "__main__":
+    from data_loader import load_enriched_data
+
+    parser = argparse.ArgumentParser(description="Fit the event-augmented trend regression")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="prior penalty of event effects")
+    parser.add_argument("--indicator", default="ACC_OWNERSHIP", help="indicator_code to forecast")
+    parser.add_argument("--years", type=int, nargs="+", default=[2025, 2026, 2027])
+    parser.add_argument("--no-cache", action="store_true",
+                        help="re-read the Excel workbooks instead of the Parquet cache")
+    args = parser.parse_args()
+
+    main_df, links_df = load_enriched_data(use_cache=not args.no_cache)
+    fit = fit_events(main_df, links_df, alpha=args.alpha)
+    coefs = fit["coefficients"]
+    print("Event effects (prior -> estimate):")
+    print(coefs[coefs["kind"] == "event"].to_string(index=False))
+    print(f"\n{args.indicator} forecast:")
+    print(predict_event_regression(fit, args.indicator, [f"{y}-12-31" for y in args.years]).to_string(index=False))
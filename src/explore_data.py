@@ -2,6 +2,7 @@
 Data exploration script for Task 1: Data Exploration and Enrichment
 """
 
+import argparse
 import pandas as pd
 import sys
 from pathlib import Path
@@ -10,61 +11,66 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from data_loader import load_unified_data, load_reference_codes, load_additional_data_guide
+from event_graph import EventLinkIndex
+from profiler import missing_table, profile_data, write_profile
+from validation import RuleSet, validate_tables
 
 
-def explore_schema(df, impact_links, ref_codes):
-    """Explore the schema and structure of the data"""
+def _print_counts(counts):
+    """Print a profile's {value: count} dict like a value_counts Series"""
+    if counts:
+        print(pd.Series(counts).to_string())
+
+
+def explore_schema(df, impact_links, ref_codes, profile=None):
+    """Explore the schema and structure of the data (profile: see profiler.profile_data)"""
+    profile = profile or profile_data(df, impact_links)
+    main = profile["tables"]["main"]
+    links = profile["tables"]["impact_links"]
     print("=" * 80)
     print("SCHEMA EXPLORATION")
     print("=" * 80)
     
     print("\n1. MAIN DATA STRUCTURE")
     print("-" * 80)
-    print(f"Total records: {len(df)}")
-    print(f"Columns: {df.columns.tolist()}")
-    print(f"\nData types:\n{df.dtypes}")
+    print(f"Total records: {main['n_rows']}")
+    print(f"Columns: {list(main['columns'])}")
+    print("\nData types:")
+    print(pd.Series({col: info["dtype"] for col, info in main["columns"].items()}).to_string())
     
     print("\n2. RECORD TYPE DISTRIBUTION")
     print("-" * 80)
-    print(df['record_type'].value_counts())
+    _print_counts(main['value_counts'].get('record_type'))
     
     print("\n3. PILLAR DISTRIBUTION (for observations)")
     print("-" * 80)
-    obs_df = df[df['record_type'] == 'observation']
-    if 'pillar' in obs_df.columns:
-        print(obs_df['pillar'].value_counts())
+    _print_counts(main['value_counts_by_record_type'].get('pillar', {}).get('observation'))
     
     print("\n4. SOURCE TYPE DISTRIBUTION")
     print("-" * 80)
-    if 'source_type' in df.columns:
-        print(df['source_type'].value_counts())
+    _print_counts(main['value_counts'].get('source_type'))
     
     print("\n5. CONFIDENCE LEVEL DISTRIBUTION")
     print("-" * 80)
-    if 'confidence' in df.columns:
-        print(df['confidence'].value_counts())
+    _print_counts(main['value_counts'].get('confidence'))
     
     print("\n6. TEMPORAL RANGE")
     print("-" * 80)
-    date_cols = [col for col in df.columns if 'date' in col.lower()]
-    for col in date_cols:
-        if df[col].notna().any():
-            print(f"\n{col}:")
-            print(f"  Min: {df[col].min()}")
-            print(f"  Max: {df[col].max()}")
-            print(f"  Unique values: {df[col].nunique()}")
+    for col, span in main['temporal'].items():
+        print(f"\n{col}:")
+        print(f"  Min: {span['min']}")
+        print(f"  Max: {span['max']}")
+        print(f"  Unique values: {span['n_unique']}")
     
     print("\n7. INDICATORS COVERAGE")
     print("-" * 80)
-    if 'indicator_code' in df.columns:
-        indicators = df[df['indicator_code'].notna()]['indicator_code'].unique()
-        print(f"Total unique indicators: {len(indicators)}")
+    if main['indicators'] is not None:
+        print(f"Total unique indicators: {main['indicators']['n_unique']}")
         print("\nIndicators by record type:")
-        for rt in df['record_type'].unique():
-            rt_indicators = df[(df['record_type'] == rt) & (df['indicator_code'].notna())]['indicator_code'].unique()
+        for rt, rt_indicators in main['indicators']['by_record_type'].items():
             print(f"  {rt}: {len(rt_indicators)} indicators")
             if len(rt_indicators) <= 20:
-                for ind in sorted(rt_indicators):
+                for ind in rt_indicators:
                     print(f"    - {ind}")
     
     print("\n8. EVENTS CATALOG")
@@ -72,23 +78,23 @@ def explore_schema(df, impact_links, ref_codes):
     events = df[df['record_type'] == 'event']
     if len(events) > 0:
         print(f"Total events: {len(events)}")
-        if 'category' in events.columns:
+        if 'event' in main['value_counts_by_record_type'].get('category', {}):
             print("\nEvents by category:")
-            print(events['category'].value_counts())
+            _print_counts(main['value_counts_by_record_type']['category']['event'])
         print("\nEvent details:")
         event_cols = ['record_id', 'indicator', 'category', 'observation_date'] if 'indicator' in events.columns else events.columns[:10]
         print(events[event_cols].to_string())
     
     print("\n9. IMPACT LINKS")
     print("-" * 80)
-    if len(impact_links) > 0:
-        print(f"Total impact links: {len(impact_links)}")
-        if 'pillar' in impact_links.columns:
+    if links['n_rows'] > 0:
+        print(f"Total impact links: {links['n_rows']}")
+        if 'pillar' in links['value_counts']:
             print("\nImpact links by pillar:")
-            print(impact_links['pillar'].value_counts())
-        if 'impact_direction' in impact_links.columns:
+            _print_counts(links['value_counts']['pillar'])
+        if 'impact_direction' in links['value_counts']:
             print("\nImpact direction:")
-            print(impact_links['impact_direction'].value_counts())
+            _print_counts(links['value_counts']['impact_direction'])
     
     print("\n10. REFERENCE CODES")
     print("-" * 80)
@@ -96,54 +102,57 @@ def explore_schema(df, impact_links, ref_codes):
         print(f"Total reference code entries: {len(ref_codes)}")
         print("\nReference code structure:")
         print(ref_codes.head(10).to_string())
+    
+    print("\n11. REFERENCE CODE VALIDATION")
+    print("-" * 80)
+    if ref_codes is not None and len(ref_codes) > 0:
+        rules = RuleSet.from_reference_codes(ref_codes)
+        violations = validate_tables(df, impact_links, rules)
+        if len(violations) > 0:
+            print(f"Values not in reference codes: {int(violations['count'].sum())} "
+                  f"across {violations['field'].nunique()} fields")
+            print(violations[['table', 'field', 'value', 'record_type', 'count', 'example_id']].to_string(index=False))
+        else:
+            print(f"All coded fields match the reference codes ({len(rules.fields)} fields checked)")
 
 
-def analyze_data_quality(df, impact_links):
+def analyze_data_quality(df, impact_links, profile=None):
     """Analyze data quality and completeness"""
+    profile = profile or profile_data(df, impact_links)
+    main = profile["tables"]["main"]
     print("\n" + "=" * 80)
     print("DATA QUALITY ANALYSIS")
     print("=" * 80)
     
     print("\n1. MISSING VALUES")
     print("-" * 80)
-    missing = df.isnull().sum()
-    missing_pct = (missing / len(df)) * 100
-    missing_df = pd.DataFrame({
-        'Missing Count': missing,
-        'Missing %': missing_pct
-    })
-    missing_df = missing_df[missing_df['Missing Count'] > 0].sort_values('Missing Count', ascending=False)
-    print(missing_df.to_string())
+    print(missing_table(main).to_string())
     
     print("\n2. DUPLICATE RECORDS")
     print("-" * 80)
-    if 'record_id' in df.columns:
-        duplicates = df[df.duplicated(subset=['record_id'], keep=False)]
-        print(f"Duplicate record_ids: {len(duplicates)}")
-        if len(duplicates) > 0:
-            print(duplicates[['record_id', 'record_type']].to_string())
+    if main['duplicates'] is not None:
+        duplicates = main['duplicates']
+        print(f"Duplicate record_ids: {duplicates['n_rows']}")
+        if duplicates['n_rows'] > 0:
+            repeated = pd.DataFrame.from_dict(duplicates['record_ids'], orient='index')
+            repeated['record_types'] = repeated['record_types'].str.join(', ')
+            print(repeated.rename_axis('record_id').to_string())
 
 
-def identify_enrichment_opportunities(df, impact_links, ref_codes):
+def identify_enrichment_opportunities(df, impact_links, ref_codes, profile=None):
     """Identify opportunities for data enrichment"""
+    profile = profile or profile_data(df, impact_links)
     print("\n" + "=" * 80)
     print("ENRICHMENT OPPORTUNITIES")
     print("=" * 80)
     
     print("\n1. TEMPORAL GAPS")
     print("-" * 80)
-    obs_df = df[df['record_type'] == 'observation']
-    if 'observation_date' in obs_df.columns:
-        obs_df['year'] = pd.to_datetime(obs_df['observation_date'], errors='coerce').dt.year
-        years = sorted(obs_df['year'].dropna().unique())
-        print(f"Years with observations: {years}")
-        if len(years) > 1:
-            gaps = []
-            for i in range(len(years) - 1):
-                if years[i+1] - years[i] > 1:
-                    gaps.append(f"{int(years[i])} - {int(years[i+1])}")
-            if gaps:
-                print(f"Temporal gaps: {', '.join(gaps)}")
+    years = profile["tables"]["main"]["years"]
+    if years is not None:
+        print(f"Years with observations: {years['observed']}")
+        if years['gaps']:
+            print(f"Temporal gaps: {', '.join(f'{a} - {b}' for a, b in years['gaps'])}")
     
     print("\n2. MISSING INDICATORS")
     print("-" * 80)
@@ -163,33 +172,38 @@ def identify_enrichment_opportunities(df, impact_links, ref_codes):
     
     print("\n4. MISSING IMPACT LINKS")
     print("-" * 80)
-    events = df[df['record_type'] == 'event']
-    event_ids = set(events['record_id'].unique()) if 'record_id' in events.columns else set()
-    linked_events = set(impact_links['parent_id'].unique()) if 'parent_id' in impact_links.columns else set()
-    unlinked_events = event_ids - linked_events
-    if unlinked_events:
-        print(f"Events without impact links: {len(unlinked_events)}")
-        unlinked = events[events['record_id'].isin(unlinked_events)]
+    link_index = EventLinkIndex.from_data(df, impact_links)
+    unlinked = link_index.unlinked_events()
+    if len(unlinked) > 0:
+        print(f"Events without impact links: {unlinked['record_id'].nunique()}")
         print(unlinked[['record_id', 'indicator', 'category']].to_string())
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Explore the unified dataset")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="re-read the Excel workbooks instead of the Parquet cache")
+    args = parser.parse_args()
+    
     print("Loading data...")
-    main_data, impact_links = load_unified_data()
-    ref_codes = load_reference_codes()
+    main_data, impact_links = load_unified_data(use_cache=not args.no_cache)
+    ref_codes = load_reference_codes(use_cache=not args.no_cache)
+    profile = profile_data(main_data, impact_links)
+    profile_path = write_profile(profile)
+    print(f"Data profile written to: {profile_path}")
     
     print("\n" + "=" * 80)
     print("ETHIOPIA FINANCIAL INCLUSION DATA EXPLORATION")
     print("=" * 80)
     
     # Explore schema
-    explore_schema(main_data, impact_links, ref_codes)
+    explore_schema(main_data, impact_links, ref_codes, profile)
     
     # Analyze data quality
-    analyze_data_quality(main_data, impact_links)
+    analyze_data_quality(main_data, impact_links, profile)
     
     # Identify enrichment opportunities
-    identify_enrichment_opportunities(main_data, impact_links, ref_codes)
+    identify_enrichment_opportunities(main_data, impact_links, ref_codes, profile)
     
     print("\n" + "=" * 80)
     print("EXPLORATION COMPLETE")
@@ -0,0 +1,260 @@
+"""
+On-disk cache of model fits
+
+Fitting a trend is cheap, but the forecasting scripts refit the same few
+series on every run, notebook re-run and scenario sweep. FitCache keys each
+fit on a SHA-256 fingerprint of its inputs (model name, hyperparameters, model
+code version and the years / values arrays) and stores the fitted arrays
+(beta, s2, XtX_inv, ...) as a blob of .npy records in a SQLite file
+(models/fit_cache.sqlite), so only series whose data or model changed are
+refit.
+
+Every hit refreshes the entry's last-used time (written in batches); once
+the blobs exceed max_bytes the least recently used entries are evicted down to
+EVICT_TO of the cap. The stored size is tracked as fits are written, so a put
+only scans the table when it evicts; with several writer processes the tracked
+size can lag, and close() rechecks it. Fits read or written once are also kept
+in memory for the life of the cache object. A cache that cannot be opened or
+written (read-only checkout, locked file) is skipped with a warning and fits
+are computed directly.
+"""
+
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+
+CACHE_NAME = "fit_cache.sqlite"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# an eviction frees space down to this share of max_bytes, so the next puts
+# do not each evict again
+EVICT_TO = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fits (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    blob BLOB NOT NULL,
+    n_bytes INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fits_by_last_used ON fits (last_used);
+"""
+
+
+def get_cache_path():
+    """Get the default fit cache file (models/fit_cache.sqlite)"""
+    project_root = Path(__file__).parent.parent
+    return project_root / "models" / CACHE_NAME
+
+
+def fit_key(model, years, values, params=None, version=""):
+    """
+    Fingerprint of a fit's inputs.
+
+    Arrays are hashed as float64 (shape and bytes), so the same series maps
+    to the same key whether it came as ints, floats, lists or arrays.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([model, version, params or {}], sort_keys=True, default=str).encode())
+    for arr in (years, values):
+        arr = np.ascontiguousarray(np.asarray(arr, dtype=float))
+        digest.update(str(arr.shape).encode())
+        digest.update(arr.tobytes())
+    return digest.hexdigest()
+
+
+def encode_fit(fit):
+    """Serialize a fit dict of arrays and scalars: its names, then each value, as .npy records"""
+    buffer = io.BytesIO()
+    np.save(buffer, np.array(list(fit), dtype=str), allow_pickle=False)
+    for value in fit.values():
+        np.save(buffer, np.asarray(value), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def decode_fit(blob):
+    """Inverse of encode_fit; 0-d arrays come back as Python scalars"""
+    buffer = io.BytesIO(blob)
+    names = np.load(buffer, allow_pickle=False)
+    values = [np.load(buffer, allow_pickle=False) for _ in names]
+    return {str(name): value.item() if value.ndim == 0 else value for name, value in zip(names, values)}
+
+
+class FitCache:
+    """
+    SQLite-backed LRU cache of model fits.
+
+    Args:
+        path: Cache file (default: models/fit_cache.sqlite)
+        max_bytes: Size cap of the stored fits; least recently used entries
+            are evicted beyond it
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = Path(path) if path is not None else get_cache_path()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._pid = None
+        self._disabled = False
+        self._memo = {}  # fits read or written by this process
+        self._touched = {}  # key -> last-used time not yet written
+        self._n_bytes = None  # stored bytes, read on the first put
+
+    def _connection(self):
+        # connections are not shared across fork: a worker process opens its own
+        if self._pid != os.getpid():
+            self._conn = None
+            self._touched = {}
+            self._n_bytes = None
+        if self._conn is None and not self._disabled:
+            self._pid = os.getpid()
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(self.path, timeout=30)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.executescript(_SCHEMA)
+            except (OSError, sqlite3.Error) as e:
+                warnings.warn(f"Fit cache {self.path} unavailable ({e}); fitting without it")
+                self._disabled = True
+                self._conn = None
+        return self._conn
+
+    def _flush_touched(self, conn):
+        conn.executemany("UPDATE fits SET last_used = ? WHERE key = ?",
+                         [(t, key) for key, t in self._touched.items()])
+        self._touched = {}
+
+    def flush(self):
+        """Write the last-used times of this process' hits"""
+        conn = self._connection()
+        if conn is None or not self._touched:
+            return
+        try:
+            with conn:
+                self._flush_touched(conn)
+        except sqlite3.Error as e:
+            warnings.warn(f"Fit cache write failed ({e})")
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self.flush()
+            # other processes may have written since the size was last read
+            try:
+                with self._conn:
+                    if self._stored_bytes(self._conn) > self.max_bytes:
+                        self._evict(self._conn)
+            except sqlite3.Error as e:
+                warnings.warn(f"Fit cache write failed ({e})")
+            self._conn.close()
+        self._conn = None
+        self._n_bytes = None
+
+    def get(self, key):
+        """Cached fit for a key, or None"""
+        if key in self._memo:
+            self._touched[key] = time.time()
+            return self._memo[key]
+        conn = self._connection()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute("SELECT blob FROM fits WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            warnings.warn(f"Fit cache read failed ({e})")
+            return None
+        if row is None:
+            return None
+        # last-used times are written in batches (next put, flush or close)
+        self._touched[key] = time.time()
+        self._memo[key] = decode_fit(row[0])
+        return self._memo[key]
+
+    def put(self, key, model, fit):
+        """Store a fit and evict least recently used entries beyond max_bytes"""
+        conn = self._connection()
+        if conn is None:
+            return
+        blob = encode_fit(fit)
+        now = time.time()
+        try:
+            with conn:
+                self._flush_touched(conn)
+                n_bytes = self._n_bytes if self._n_bytes is not None else self._stored_bytes(conn)
+                replaced = conn.execute("SELECT n_bytes FROM fits WHERE key = ?", (key,)).fetchone()
+                conn.execute("INSERT OR REPLACE INTO fits VALUES (?, ?, ?, ?, ?, ?)",
+                             (key, model, blob, len(blob), now, now))
+                self._n_bytes = n_bytes + len(blob) - (replaced[0] if replaced else 0)
+                if self._n_bytes > self.max_bytes:
+                    self._evict(conn)
+        except sqlite3.Error as e:
+            warnings.warn(f"Fit cache write failed ({e})")
+            self._n_bytes = None
+            return
+        self._memo[key] = decode_fit(blob)
+
+    def _stored_bytes(self, conn):
+        self._n_bytes = conn.execute("SELECT COALESCE(SUM(n_bytes), 0) FROM fits").fetchone()[0]
+        return self._n_bytes
+
+    def _evict(self, conn):
+        # newest first; drop every entry past the point where the running size exceeds the target
+        conn.execute("""
+            DELETE FROM fits WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(n_bytes) OVER (ORDER BY last_used DESC, key) AS running FROM fits
+                ) WHERE running > ?
+            )""", (int(self.max_bytes * EVICT_TO),))
+        self._stored_bytes(conn)
+
+    def fit(self, model, fit_func, years, values, params=None, version=""):
+        """
+        Return fit_func(years, values) from the cache, fitting and storing it on a miss.
+
+        Args:
+            model: Model name (part of the key)
+            fit_func: Function (years, values) -> dict of arrays / scalars
+            years: Observation years
+            values: Observed values
+            params: Hyperparameters of the fit (part of the key)
+            version: Model code version (part of the key)
+        """
+        key = fit_key(model, years, values, params, version)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        result = fit_func(years, values)
+        self.misses += 1
+        self.put(key, model, result)
+        return result
+
+    def stats(self):
+        """Entries and bytes stored, plus hits and misses of this instance"""
+        conn = self._connection()
+        n_entries, n_bytes = (0, 0)
+        if conn is not None:
+            n_entries, n_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(n_bytes), 0) FROM fits").fetchone()
+        return {"entries": n_entries, "bytes": n_bytes, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        """Remove every cached fit"""
+        conn = self._connection()
+        if conn is not None:
+            with conn:
+                conn.execute("DELETE FROM fits")
+            self._n_bytes = 0
+        self._memo = {}
+        self._touched = {}
+
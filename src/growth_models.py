@@ -0,0 +1,221 @@
+"""
+Saturating growth curves for inclusion rates
+
+Logistic and Gompertz curves with a fitted ceiling, fitted to many series at
+once. All series are stacked into padded (n_series, max_len) arrays with a
+boolean mask (as built by task4_forecast.build_series_panel) and solved by a
+single projected Levenberg-Marquardt loop: every iteration forms the normal
+equations of all still-active series with einsum and solves the batch of 3x3
+systems together. Each series keeps its own damping factor and drops out of
+the loop once it has converged.
+
+Curves (time t is centred on each series' mean observation year):
+    logistic: ceiling / (1 + exp(-rate * (t - midpoint)))
+    gompertz: ceiling * exp(-shift * exp(-rate * t))
+
+The ceiling is bounded below by the highest observation (and by the series'
+target when one is given, e.g. an NFIS-II target, assuming the target is
+reachable) and above by ceiling_max (100 for percentages).
+"""
+
+import numpy as np
+
+
+MIN_POINTS = 3  # three parameters per curve
+PARAM_NAMES = {
+    "logistic": ("ceiling", "rate", "midpoint"),
+    "gompertz": ("ceiling", "shift", "rate"),
+}
+
+# Bounds and starting values of the non-ceiling parameters
+PARAM_BOUNDS = {
+    "logistic": (np.array([1e-4, -100.0]), np.array([5.0, 100.0])),
+    "gompertz": (np.array([1e-6, 1e-4]), np.array([50.0, 5.0])),
+}
+START_VALUES = {
+    "logistic": np.array([0.2, 0.0]),
+    "gompertz": np.array([1.0, 0.1]),
+}
+
+_EXP_LIMIT = 500.0  # exp() arguments are clipped to stay finite
+
+
+def _exp(x):
+    return np.exp(np.clip(x, -_EXP_LIMIT, _EXP_LIMIT))
+
+
+def _logistic(t, params):
+    """Curve values and Jacobian (..., 3) for params (n, 3) and times (n, m)"""
+    ceiling, rate, midpoint = (params[:, k:k + 1] for k in range(3))
+    s = 1.0 / (1.0 + _exp(-rate * (t - midpoint)))
+    ds = ceiling * s * (1.0 - s)
+    return ceiling * s, np.stack([s, ds * (t - midpoint), -ds * rate], axis=-1)
+
+
+def _gompertz(t, params):
+    ceiling, shift, rate = (params[:, k:k + 1] for k in range(3))
+    g = _exp(-rate * t)
+    e = _exp(-shift * g)
+    return ceiling * e, np.stack([e, -ceiling * g * e, ceiling * shift * t * g * e], axis=-1)
+
+
+CURVES = {"logistic": _logistic, "gompertz": _gompertz}
+
+
+def curve_values(curve, t, params):
+    """Evaluate a curve for params (n, 3) at centred times t (n, m)"""
+    return CURVES[curve](np.asarray(t, dtype=float), np.asarray(params, dtype=float))[0]
+
+
+def ceiling_bounds(y_max, target=None, ceiling_max=100.0):
+    """
+    Per-series bounds of the ceiling parameter.
+
+    Args:
+        y_max: Highest observation of each series
+        target: Optional target of each series (NaN where there is none)
+        ceiling_max: Upper bound (scalar or per series)
+
+    Returns:
+        tuple: (lower, upper) arrays
+    """
+    lower = np.maximum(np.asarray(y_max, dtype=float), 1e-3)
+    if target is not None:
+        lower = np.fmax(lower, np.asarray(target, dtype=float))
+    upper = np.maximum(np.broadcast_to(np.asarray(ceiling_max, dtype=float), lower.shape), lower * 1.001)
+    return lower, upper
+
+
+def fit_growth_batch(years, y, mask=None, curve="logistic", target=None, ceiling_max=100.0,
+                     max_iter=1000, ftol=1e-10, xtol=1e-10):
+    """
+    Fit a growth curve to every series with a batched Levenberg-Marquardt loop.
+
+    Steps are projected onto the parameter bounds. A series stops iterating
+    once an accepted step reduces its squared error by less than ftol
+    (relative), moves its parameters by less than xtol (relative), or no step
+    can reduce its error any more; series with fewer than MIN_POINTS
+    observations are not fitted (NaN parameters).
+
+    Args:
+        years: (n_series, max_len) observation years (or 1-D for one series)
+        y: Observed values, same shape
+        mask: Boolean array marking observed cells (default: all)
+        curve: "logistic" or "gompertz"
+        target: Optional per-series target bounding the ceiling from below
+        ceiling_max: Upper bound of the ceiling
+        max_iter: Iteration limit
+        ftol: Relative error-reduction tolerance
+        xtol: Relative step tolerance
+
+    Returns:
+        dict: curve, params (n, 3), t0, sse, s2, cov (n, 3, 3; NaN when not
+        estimable), n, converged, n_iter
+    """
+    if curve not in CURVES:
+        raise ValueError(f"Unknown growth curve {curve!r}; expected one of {list(CURVES)}")
+    func = CURVES[curve]
+    years = np.atleast_2d(np.asarray(years, dtype=float))
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    mask = np.ones(y.shape, dtype=bool) if mask is None else np.atleast_2d(np.asarray(mask, dtype=bool))
+    n_series = len(y)
+    w = mask.astype(float)
+    y = np.where(mask, y, 0.0)
+
+    n = mask.sum(axis=1)
+    t0 = (years * w).sum(axis=1) / np.maximum(n, 1)
+    t = np.where(mask, years - t0[:, None], 0.0)
+
+    y_max = np.where(mask, y, -np.inf).max(axis=1)
+    k_lo, k_hi = ceiling_bounds(np.where(n > 0, y_max, 0.0), target, ceiling_max)
+    rest_lo, rest_hi = PARAM_BOUNDS[curve]
+    lower = np.column_stack([k_lo, np.tile(rest_lo, (n_series, 1))])
+    upper = np.column_stack([k_hi, np.tile(rest_hi, (n_series, 1))])
+    params = np.column_stack([np.clip(k_lo * 1.2, k_lo, k_hi), np.tile(START_VALUES[curve], (n_series, 1))])
+
+    def residuals(idx, p):
+        f, jac = func(t[idx], p)
+        return (y[idx] - f) * w[idx], jac * w[idx][..., None]
+
+    fitted = n >= MIN_POINTS
+    r, _ = residuals(np.arange(n_series), params)
+    sse = (r ** 2).sum(axis=1)
+    lam = np.full(n_series, 1e-3)
+    converged = np.zeros(n_series, dtype=bool)
+    n_iter = np.zeros(n_series, dtype=int)
+    active = fitted.copy()
+
+    for _ in range(max_iter):
+        idx = np.flatnonzero(active)
+        if len(idx) == 0:
+            break
+        p = params[idx]
+        r, jac = residuals(idx, p)
+        grad = np.einsum("smi,sm->si", jac, r)
+        # parameters held at a bound by the gradient are frozen for this step,
+        # so the others move freely instead of being clipped back
+        pinned = ((p <= lower[idx]) & (grad < 0)) | ((p >= upper[idx]) & (grad > 0))
+        jac = np.where(pinned[:, None, :], 0.0, jac)
+        grad = np.where(pinned, 0.0, grad)
+        jtj = np.einsum("smi,smj->sij", jac, jac)
+        # Marquardt scaling, floored so a flat direction still gets damped
+        diag = np.diagonal(jtj, axis1=1, axis2=2)
+        diag = np.maximum(diag, 1e-12 * np.maximum(diag.max(axis=1, keepdims=True), 1.0))
+        step = np.linalg.solve(jtj + lam[idx, None, None] * (diag[:, :, None] * np.eye(3)), grad[..., None])[..., 0]
+        p_new = np.clip(p + step, lower[idx], upper[idx])
+
+        r_new, _ = residuals(idx, p_new)
+        sse_new = (r_new ** 2).sum(axis=1)
+        better = sse_new < sse[idx]
+        reduction = sse[idx] - sse_new
+        moved = np.abs(p_new - p).max(axis=1) / (np.abs(p).max(axis=1) + xtol)
+
+        params[idx[better]] = p_new[better]
+        sse_old = sse[idx]
+        sse[idx[better]] = sse_new[better]
+        lam[idx] = np.where(better, np.maximum(lam[idx] / 10.0, 1e-12), lam[idx] * 10.0)
+        n_iter[idx] += 1
+
+        done = ((better & ((reduction <= ftol * sse_old) | (sse_new <= 1e-24)))
+                | (moved <= xtol) | (lam[idx] > 1e12))
+        converged[idx[done]] = True
+        active[idx[done]] = False
+
+    params[~fitted] = np.nan
+    sse[~fitted] = np.nan
+    dof = n - 3
+    s2 = np.where(fitted, sse / np.maximum(dof, 1), np.nan)
+
+    # parameter covariance s2 * (J'J)^-1 at the solution; undefined without spare observations
+    cov = np.full((n_series, 3, 3), np.nan)
+    est = np.flatnonzero(fitted & (dof > 0))
+    if len(est):
+        _, jac = residuals(est, params[est])
+        cov[est] = s2[est, None, None] * np.linalg.pinv(np.einsum("smi,smj->sij", jac, jac))
+
+    return {"curve": curve, "params": params, "t0": t0, "sse": sse, "s2": s2, "cov": cov,
+            "n": n, "converged": converged, "n_iter": n_iter}
+
+
+def predict_growth_batch(fit, years_pred):
+    """
+    Forecast every fitted series.
+
+    The standard error combines the residual variance with the parameter
+    uncertainty (delta method); the latter is left out for series whose
+    covariance is not estimable.
+
+    Args:
+        fit: Result of fit_growth_batch
+        years_pred: Forecast years, 1-D (shared) or (n_series, h)
+
+    Returns:
+        tuple: (forecast, se), each (n_series, h)
+    """
+    years_pred = np.asarray(years_pred, dtype=float)
+    t = np.broadcast_to(years_pred, (len(fit["t0"]),) + years_pred.shape[-1:]) - fit["t0"][:, None]
+    y_pred, jac = CURVES[fit["curve"]](t, fit["params"])
+    cov = fit["cov"]
+    cov = np.where(np.isfinite(cov).all(axis=(1, 2))[:, None, None], cov, 0.0)
+    var = fit["s2"][:, None] + np.einsum("shi,sij,shj->sh", jac, cov, jac)
+    return y_pred, np.sqrt(var)
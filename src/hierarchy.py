@@ -0,0 +1,242 @@
+"""
+Grouped hierarchies over the gender / location / region dimensions
+
+For each indicator, the bottom series are the cross product of the levels
+observed in each dimension (e.g. female x rural x Amhara); every combination
+in which some dimensions are aggregated ("all" gender, "national" location,
+"all" regions) is an aggregate node. A sparse summing matrix S maps bottom
+series to all nodes:
+
+    node = S @ bottom
+
+Counts (users, transactions, ETB) add up, so their rows of S hold ones.
+Rates (%, ratios) are population-weighted averages of their groups, so their
+rows hold the groups' population shares, normalized to sum to one.
+
+Base forecasts are made independently for every node that has data and are
+then reconciled so the aggregates agree with their groups:
+
+    bottom_up: aggregate the bottom-level forecasts
+    ols:       b = (S'S)^-1 S' y_hat
+    mint:      b = (S'W^-1 S)^-1 S'W^-1 y_hat, with W the diagonal of the base
+               forecast variances (cross-series error covariances cannot be
+               estimated from a handful of survey years)
+
+Nodes without a base forecast get zero weight. Bottom series that no
+forecast pins down (e.g. female x urban when only the gender and location
+margins are observed) are held at a proportional split of the total by a
+tiny ridge term. All hierarchies are stacked into one block-diagonal S, so
+thousands of leaf series are reconciled with one sparse solve per horizon.
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+
+DIMENSIONS = ("gender", "location", "region")
+# labels meaning "all groups" in each dimension; the first is the canonical one
+TOTAL_LABELS = {
+    "gender": ("all",),
+    "location": ("national", "all"),
+    "region": ("all",),
+}
+# groups a dimension may be split into (None: any non-total label, e.g. regions)
+GROUP_LEVELS = {
+    "gender": ("female", "male"),
+    "location": ("rural", "urban"),
+    "region": None,
+}
+# population shares used to average rates (approximate national splits);
+# levels without a share are weighted equally
+DEFAULT_SHARES = {
+    "gender": {"female": 0.5, "male": 0.5},
+    "location": {"rural": 0.78, "urban": 0.22},
+}
+# units averaged rather than summed when aggregating
+RATE_UNITS = ("%", "pp", "ratio", "% of GNI", "per_10k_adults")
+METHODS = ("bottom_up", "ols", "mint")
+
+_RIDGE = 1e-8  # relative weight of the proportional split for unidentified bottom series
+
+
+def _canonical(dim, label):
+    """Canonical node label of a series label, or None if it is not a group of the dimension"""
+    label = "all" if pd.isna(label) else str(label)
+    if label in TOTAL_LABELS[dim]:
+        return TOTAL_LABELS[dim][0]
+    levels = GROUP_LEVELS[dim]
+    return label if levels is None or label in levels else None
+
+
+def _weights(dim, levels, shares):
+    """Population shares of a dimension's levels, normalized to sum to one"""
+    dim_shares = shares.get(dim, {})
+    w = np.array([dim_shares.get(level, 1.0 / len(levels)) for level in levels], dtype=float)
+    return w / w.sum()
+
+
+def build_hierarchy(series, shares=None):
+    """
+    Build grouped hierarchies for a table of series.
+
+    Args:
+        series: DataFrame with indicator_code, gender, location, region and
+            unit columns, one row per observed series (e.g. the 'series' table
+            of task4_forecast.build_series_panel)
+        shares: Population shares per dimension and level (default
+            DEFAULT_SHARES), used to average rate indicators
+
+    Returns:
+        dict:
+            nodes: DataFrame (indicator_code, gender, location, region, unit,
+                kind, level, is_bottom, series_idx) with one row per node;
+                series_idx is the row of `series` holding its data, or -1
+            S: csr summing matrix (n_nodes, n_bottom)
+            bottom: node index of each bottom series
+            top: node index of the total of each bottom series' indicator
+            split: proportional split of the total per bottom series
+            skipped: rows of `series` outside any hierarchy (labels that are
+                not groups of a dimension, e.g. gender 'gap')
+    """
+    shares = DEFAULT_SHARES if shares is None else shares
+    series = series.reset_index(drop=True)
+    canon = pd.DataFrame({dim: [_canonical(dim, v) for v in series[dim]] if dim in series.columns
+                          else TOTAL_LABELS[dim][0] for dim in DIMENSIONS})
+    usable = canon.notna().all(axis=1).to_numpy()
+    skipped = np.flatnonzero(~usable)
+
+    totals = [TOTAL_LABELS[dim][0] for dim in DIMENSIONS]
+    node_cols = {name: [] for name in ["indicator_code", *DIMENSIONS, "unit", "kind", "level", "is_bottom",
+                                        "series_idx"]}
+    s_rows, s_cols, s_vals = [], [], []
+    bottom, top, split = [], [], []
+    n_nodes = n_bottom = 0
+    for code, idx in pd.Series(np.flatnonzero(usable)).groupby(series.loc[usable, "indicator_code"].to_numpy()):
+        idx = idx.to_numpy()
+        unit = series.loc[idx[0], "unit"]
+        kind = "rate" if unit in RATE_UNITS else "total"
+        groups = canon.loc[idx]
+        levels = [sorted(set(groups[dim]) - {total}) for dim, total in zip(DIMENSIONS, totals)]
+
+        # level codes per dimension, -1 for the total; a dimension with no
+        # observed groups stays at its total
+        node_codes = np.array(list(itertools.product(*[list(range(len(lv))) + [-1] for lv in levels])))
+        bottom_codes = np.array(list(itertools.product(*[range(len(lv)) if lv else [-1] for lv in levels])))
+        member = ((node_codes[:, None, :] == -1) | (node_codes[:, None, :] == bottom_codes[None, :, :])).all(axis=2)
+        bottom_w = np.ones(len(bottom_codes))
+        for d, (dim, lv) in enumerate(zip(DIMENSIONS, levels)):
+            if lv:
+                bottom_w *= _weights(dim, lv, shares)[bottom_codes[:, d]]
+        weights = member * bottom_w if kind == "rate" else member.astype(float)
+        if kind == "rate":
+            weights /= weights.sum(axis=1, keepdims=True)
+        rows, cols = np.nonzero(member)
+        s_rows.append(n_nodes + rows)
+        s_cols.append(n_bottom + cols)
+        s_vals.append(weights[rows, cols])
+
+        split_dims = node_codes != -1
+        is_bottom = (node_codes[:, None, :] == bottom_codes[None, :, :]).all(axis=2)
+        labels = [np.array(lv + [total], dtype=object) for lv, total in zip(levels, totals)]
+        node_cols["indicator_code"].append(np.full(len(node_codes), code, dtype=object))
+        for d, dim in enumerate(DIMENSIONS):
+            node_cols[dim].append(labels[d][node_codes[:, d]])
+        node_cols["unit"].append(np.full(len(node_codes), unit, dtype=object))
+        node_cols["kind"].append(np.full(len(node_codes), kind, dtype=object))
+        node_cols["level"].append(np.array(["/".join(np.array(DIMENSIONS)[m]) or "total" for m in split_dims],
+                                           dtype=object))
+        node_cols["is_bottom"].append(is_bottom.any(axis=1))
+        # node position of each series: nodes enumerate the product of
+        # (levels..., total) per dimension in row-major order
+        sizes = np.array([len(lv) + 1 if lv else 1 for lv in levels])
+        strides = np.concatenate([np.cumprod(sizes[::-1])[::-1][1:], [1]])
+        pos = sum(np.array([lv.index(g) if g != total else len(lv) for g in groups[dim]]) * stride
+                  for dim, lv, total, stride in zip(DIMENSIONS, levels, totals, strides))
+        series_idx = np.full(len(node_codes), -1)
+        # e.g. location 'all' and 'national' map to the same node: keep the first
+        series_idx[pos[::-1]] = idx[::-1]
+        node_cols["series_idx"].append(series_idx)
+
+        bottom.append(n_nodes + is_bottom.argmax(axis=0))
+        top.append(np.full(len(bottom_codes), n_nodes + int(np.flatnonzero(~split_dims.any(axis=1))[0])))
+        # proportional split of the total: every group at the total rate, or
+        # counts split by population share
+        split.append(np.ones(len(bottom_codes)) if kind == "rate" else bottom_w)
+        n_nodes += len(node_codes)
+        n_bottom += len(bottom_codes)
+
+    def _cat(parts, dtype):
+        return np.concatenate(parts).astype(dtype) if parts else np.array([], dtype=dtype)
+
+    nodes = pd.DataFrame({name: _cat(parts, bool if name == "is_bottom" else int if name == "series_idx"
+                                     else object) for name, parts in node_cols.items()})
+    S = sparse.csr_matrix((_cat(s_vals, float), (_cat(s_rows, int), _cat(s_cols, int))), shape=(n_nodes, n_bottom))
+    return {"nodes": nodes, "S": S, "bottom": _cat(bottom, int), "top": _cat(top, int),
+            "split": _cat(split, float), "skipped": skipped}
+
+
+def reconcile(hierarchy, base, variance=None, method="mint"):
+    """
+    Reconcile base forecasts so every aggregate matches its groups.
+
+    Args:
+        hierarchy: Result of build_hierarchy
+        base: (n_nodes, horizon) base forecasts, NaN where a node has none
+        variance: (n_nodes, horizon) base forecast variances, for 'mint';
+            NaN variances of nodes with a forecast are filled with the mean
+            variance of their hierarchy
+        method: 'bottom_up', 'ols' or 'mint'
+
+    Returns:
+        ndarray (n_nodes, horizon) of coherent forecasts
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown reconciliation method {method!r}; expected one of {METHODS}")
+    S = hierarchy["S"]
+    base = np.asarray(base, dtype=float)
+    if base.ndim == 1:
+        base = base[:, None]
+    has_base = np.isfinite(base)
+    prior = np.where(has_base[hierarchy["top"]], base[hierarchy["top"]], 0.0) * hierarchy["split"][:, None]
+
+    if method == "bottom_up":
+        b = np.where(has_base[hierarchy["bottom"]], base[hierarchy["bottom"]], prior)
+        return S @ b
+
+    if method == "ols":
+        precision = has_base.astype(float)
+    else:
+        if variance is None:
+            raise ValueError("method 'mint' needs base forecast variances")
+        variance = np.asarray(variance, dtype=float).reshape(base.shape)
+        group = hierarchy["nodes"]["indicator_code"].to_numpy()
+        known = has_base & np.isfinite(variance) & (variance > 0)
+        fill = (pd.DataFrame(np.where(known, variance, np.nan)).groupby(group).transform("mean")
+                .to_numpy())
+        variance = np.where(known, variance, fill)
+        # fall back to unit weights where no variance of the hierarchy is known
+        variance = np.where(np.isfinite(variance) & (variance > 0), variance, 1.0)
+        precision = np.where(has_base, 1.0 / variance, 0.0)
+
+    y = np.where(has_base, base, 0.0)
+    out = np.empty_like(base)
+    for h in range(base.shape[1]):
+        Wi = sparse.diags(precision[:, h])
+        A = (S.T @ Wi @ S).tocsc()
+        ridge = _RIDGE * max(A.diagonal().max(), 1.0) if A.shape[0] else 0.0
+        A = A + ridge * sparse.identity(A.shape[0], format="csc")
+        b = splu(A).solve(S.T @ (precision[:, h] * y[:, h]) + ridge * prior[:, h])
+        out[:, h] = S @ b
+    return out
+
+
+def coherence_error(hierarchy, values):
+    """Largest absolute gap between the nodes and the aggregates of their bottom series"""
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    return float(np.abs(values - hierarchy["S"] @ values[hierarchy["bottom"]]).max()) if len(values) else 0.0
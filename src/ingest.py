@@ -0,0 +1,240 @@
+"""
+Bulk ingestion of curated enrichment records
+
+Reads CSV or JSONL files of records in the unified schema in chunks. Each
+chunk is type-coerced, checked against the schema and reference_codes.xlsx
+with whole-column operations, given record IDs in bulk and reindexed to the
+main / impact_links column layout. Rows that fail a check are dropped and
+reported in a violations table.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from enrich_data import RecordIdAllocator
+from validation import RuleSet
+
+
+# Record ID prefix by record_type
+ID_PREFIXES = {
+    "observation": "REC",
+    "target": "REC",
+    "baseline": "REC",
+    "forecast": "REC",
+    "event": "EVT",
+    "impact_link": "IMP",
+}
+
+# Fields every record of a type must fill in
+REQUIRED_FIELDS = {
+    "observation": ["indicator_code", "observation_date"],
+    "target": ["indicator_code", "observation_date"],
+    "baseline": ["indicator_code", "observation_date"],
+    "forecast": ["indicator_code", "observation_date"],
+    "event": ["indicator", "category", "observation_date"],
+    "impact_link": ["parent_id", "related_indicator", "impact_direction"],
+}
+
+NUMERIC_FIELDS = ["value_numeric", "impact_estimate", "lag_months"]
+DATE_FIELDS = ["observation_date", "period_start", "period_end", "collection_date"]
+
+VIOLATION_COLUMNS = ["row", "record_id", "record_type", "field", "value", "issue"]
+
+
+def read_chunks(filepath, chunksize=10_000):
+    """
+    Stream a CSV or JSONL file as DataFrames of at most chunksize rows.
+
+    Values are read as text; ingest_chunk coerces the typed fields.
+    """
+    filepath = Path(filepath)
+    suffix = filepath.suffix.lower()
+    if suffix == ".csv":
+        reader = pd.read_csv(filepath, chunksize=chunksize, dtype=str)
+    elif suffix in (".jsonl", ".ndjson"):
+        reader = pd.read_json(filepath, lines=True, chunksize=chunksize, dtype=False,
+                              convert_dates=False)
+    else:
+        raise ValueError(f"Unsupported ingestion file type: {filepath.suffix} (use .csv or .jsonl)")
+    with reader:
+        yield from reader
+
+
+def _violations(rows, chunk, mask, field, issue):
+    """Violation records for the rows of chunk selected by mask"""
+    mask = np.asarray(mask, dtype=bool)
+    if not mask.any():
+        return pd.DataFrame(columns=VIOLATION_COLUMNS)
+    selected = chunk[mask]
+    values = selected[field] if field in selected.columns else pd.Series(np.nan, index=selected.index)
+    return pd.DataFrame({
+        "row": rows[mask],
+        "record_id": selected["record_id"].to_numpy() if "record_id" in selected.columns else np.nan,
+        "record_type": selected["record_type"].to_numpy(),
+        "field": field,
+        "value": values.to_numpy(dtype=object),
+        "issue": issue,
+    })
+
+
+def _coerce_types(chunk, rows):
+    """Parse numeric and date fields; unparseable values become violations"""
+    found = []
+    for field in NUMERIC_FIELDS:
+        if field in chunk.columns:
+            parsed = pd.to_numeric(chunk[field], errors="coerce")
+            found.append(_violations(rows, chunk, (parsed.isna() & chunk[field].notna()).to_numpy(),
+                                     field, "not a number"))
+            chunk[field] = parsed
+    for field in DATE_FIELDS:
+        if field in chunk.columns:
+            parsed = pd.to_datetime(chunk[field], errors="coerce", format="mixed")
+            found.append(_violations(rows, chunk, (parsed.isna() & chunk[field].notna()).to_numpy(),
+                                     field, "not a date"))
+            chunk[field] = parsed
+    if "fiscal_year" in chunk.columns:
+        # plain years are stored as ints, labels such as 'FY2024/25' as text
+        years = pd.to_numeric(chunk["fiscal_year"], errors="coerce")
+        is_year = (years.notna() & (years == years.round())).to_numpy()
+        fiscal = chunk["fiscal_year"].astype(object).to_numpy(copy=True)
+        fiscal[is_year] = years[is_year].astype(int).to_numpy(dtype=object)
+        chunk["fiscal_year"] = pd.Series(fiscal, index=chunk.index, dtype=object)
+    return [v for v in found if len(v) > 0]
+
+
+def ingest_chunk(chunk, main_columns, link_columns, allocator, known_events, rules=None, start_row=0):
+    """
+    Validate one chunk and shape it into new main-table and impact-link rows.
+
+    Args:
+        chunk: Raw records (one record per row, unified schema field names)
+        main_columns: Column order of the main table
+        link_columns: Column order of the impact_links table
+        allocator: RecordIdAllocator shared across chunks
+        known_events: set of event record_ids impact links may point at;
+            updated with the events accepted from this chunk
+        rules: validation.RuleSet to check coded fields against, or None
+        start_row: Position of the chunk's first row in the input file
+
+    Returns:
+        tuple: (main rows DataFrame, impact link rows DataFrame, violations DataFrame)
+    """
+    chunk = chunk.replace("", np.nan).reset_index(drop=True)
+    rows = start_row + np.arange(len(chunk))
+    if "record_type" not in chunk.columns:
+        raise ValueError("Ingestion input needs a record_type column")
+
+    unknown_type = ~chunk["record_type"].isin(list(ID_PREFIXES)).to_numpy()
+    found = [_violations(rows, chunk, unknown_type, "record_type", "unknown record type")]
+
+    for record_type, fields in REQUIRED_FIELDS.items():
+        of_type = (chunk["record_type"] == record_type).to_numpy()
+        if not of_type.any():
+            continue
+        for field in fields:
+            missing = chunk[field].isna().to_numpy() if field in chunk.columns else np.ones(len(chunk), dtype=bool)
+            found.append(_violations(rows, chunk, of_type & missing, field, "required field missing"))
+
+    found.extend(_coerce_types(chunk, rows))
+    if rules is not None:
+        for field, mask in rules.check(chunk).items():
+            found.append(_violations(rows, chunk, mask, field, "not in reference codes"))
+
+    # Supplied record IDs must be new and unique within the file
+    if "record_id" in chunk.columns:
+        supplied = chunk["record_id"].notna().to_numpy()
+        ids = chunk["record_id"].astype(object).to_numpy()
+        clash = supplied & (allocator.is_taken(ids) | pd.Series(ids).where(supplied).duplicated(keep="first").to_numpy())
+        found.append(_violations(rows, chunk, clash, "record_id", "record_id already in use"))
+    else:
+        chunk["record_id"] = np.nan
+
+    found = [v for v in found if len(v) > 0]
+    violations = pd.concat(found, ignore_index=True) if found else pd.DataFrame(columns=VIOLATION_COLUMNS)
+    valid = ~np.isin(rows, violations["row"].to_numpy())
+
+    is_event = valid & (chunk["record_type"] == "event").to_numpy()
+
+    # Bulk ID assignment, one allocation per prefix
+    ids = chunk["record_id"].astype(object).to_numpy(copy=True)
+    needs_id = valid & pd.isna(ids)
+    prefixes = chunk["record_type"].map(ID_PREFIXES).to_numpy()
+    for prefix in pd.unique(prefixes[needs_id]):
+        positions = np.flatnonzero(needs_id & (prefixes == prefix))
+        ids[positions] = allocator.allocate(prefix, len(positions))
+    allocator.observe(pd.Series(ids[valid & ~needs_id]))
+    chunk["record_id"] = ids
+    # Links may point at events accepted earlier in the file or in this chunk
+    known_events.update(ids[is_event])
+
+    is_link = valid & (chunk["record_type"] == "impact_link").to_numpy()
+    if is_link.any():
+        orphan = is_link & ~chunk["parent_id"].isin(known_events).to_numpy()
+        if orphan.any():
+            violations = pd.concat([violations, _violations(rows, chunk, orphan, "parent_id", "unknown event")],
+                                   ignore_index=True)
+            is_link &= ~orphan
+
+    main_rows = chunk[valid & ~(chunk["record_type"] == "impact_link").to_numpy()].reindex(columns=main_columns)
+    link_rows = chunk[is_link].reindex(columns=link_columns)
+    return main_rows, link_rows, violations
+
+
+def ingest_files(paths, main_data, impact_links, ref_codes=None, allocator=None, chunksize=10_000):
+    """
+    Ingest curated record files into new main-table and impact-link rows.
+
+    Args:
+        paths: CSV / JSONL file paths
+        main_data: Existing main table (for column layout, IDs and events)
+        impact_links: Existing impact links (for column layout and IDs)
+        ref_codes: Reference codes sheet (or a compiled RuleSet), or None to
+            skip the code checks
+        allocator: RecordIdAllocator to draw IDs from (default: seeded from
+            main_data and impact_links)
+        chunksize: Rows read per chunk
+
+    Returns:
+        dict: 'observations' (observation/target/baseline/forecast rows),
+            'events', 'impact_links' and 'violations' DataFrames
+    """
+    allocator = allocator or RecordIdAllocator(main_data, impact_links)
+    if ref_codes is None or isinstance(ref_codes, RuleSet):
+        rules = ref_codes
+    else:
+        rules = RuleSet.from_reference_codes(ref_codes)
+    known_events = set(main_data.loc[main_data["record_type"] == "event", "record_id"].dropna())
+
+    main_parts, link_parts, violation_parts = [], [], []
+    for path in paths:
+        start_row = 0
+        for chunk in read_chunks(path, chunksize=chunksize):
+            main_rows, link_rows, violations = ingest_chunk(
+                chunk, main_data.columns, impact_links.columns, allocator, known_events,
+                rules=rules, start_row=start_row)
+            # empty frames would make concat warn about all-NA column dtypes
+            if len(main_rows) > 0:
+                main_parts.append(main_rows)
+            if len(link_rows) > 0:
+                link_parts.append(link_rows)
+            if len(violations) > 0:
+                violation_parts.append(violations.assign(file=str(path)))
+            start_row += len(chunk)
+
+    main_rows = (pd.concat(main_parts, ignore_index=True) if main_parts
+                 else pd.DataFrame(columns=main_data.columns))
+    is_event = (main_rows["record_type"] == "event").to_numpy()
+    return {
+        "observations": main_rows[~is_event].reset_index(drop=True),
+        "events": main_rows[is_event].reset_index(drop=True),
+        "impact_links": (pd.concat(link_parts, ignore_index=True) if link_parts
+                         else pd.DataFrame(columns=impact_links.columns)),
+        "violations": (pd.concat(violation_parts, ignore_index=True) if violation_parts
+                       else pd.DataFrame(columns=VIOLATION_COLUMNS + ["file"])),
+    }
@@ -0,0 +1,283 @@
+"""
+Mixed-frequency panel on a common monthly index
+
+Findex points arrive every three years, operator and NBE series monthly or per
+fiscal year. MonthlyPanel puts every observed series on one monthly grid so the
+dense series can be used as covariates of the sparse ones:
+
+- stocks and rates (accounts, users, %, per 10k adults) are placed in the month
+  of their observation_date
+- flows (transaction counts and ETB values) reported over a period are spread
+  evenly over the calendar months whose 15th falls inside
+  period_start..period_end, so the monthly amounts add up to the period
+  total; flows without a period are taken as the 12 months ending at
+  observation_date
+
+Values are held in a float32 (n_series, n_months) array with a boolean mask of
+observed months; gaps are filled by vectorized interpolation over all series at
+once (linear between observations, or carried forward). As in the forecasting
+scripts, Global Findex rows are preferred for series that have any, and the max
+value is kept per month.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+KEYS = ("indicator_code", "gender", "location")
+# units of amounts that accumulate over a reporting period
+FLOW_UNITS = ("transactions", "ETB")
+INTERPOLATIONS = ("linear", "ffill", "none")
+
+_MID_MONTH = np.timedelta64(14, "D")  # the 15th of a month, from its first day
+
+
+def to_months(dates):
+    """Dates as datetime64[M] (NaT stays NaT)"""
+    return pd.to_datetime(pd.Index(np.atleast_1d(dates))).to_numpy(dtype="datetime64[M]")
+
+
+def observation_months(obs):
+    """
+    Calendar months covered by each observation.
+
+    Args:
+        obs: Observation records in the typed schema (parsed
+            observation_date, period_start and period_end) with a unit column
+
+    Returns:
+        tuple: (row, month, value) arrays, one entry per (observation, month);
+        flow values are divided evenly over the months they cover
+    """
+    is_flow = obs["unit"].isin(FLOW_UNITS).to_numpy()
+    # date columns come parsed from the typed loader (data_loader.apply_schema)
+    date = obs["observation_date"]
+    end = obs["period_end"].fillna(date).to_numpy(dtype="datetime64[D]")
+    start = obs["period_start"].to_numpy(dtype="datetime64[D]")
+    # flows without a period: the 12 months ending at the observation date
+    start = np.where(np.isnat(start), end - np.timedelta64(365, "D") + np.timedelta64(1, "D"), start)
+
+    last = np.where(is_flow, end, date.to_numpy(dtype="datetime64[D]")).astype("datetime64[M]")
+    first = np.where(is_flow, start.astype("datetime64[M]"), last)
+    # a month counts when its 15th lies inside the period
+    first = np.where(is_flow & (first.astype("datetime64[D]") + _MID_MONTH < start), first + 1, first)
+    last = np.where(is_flow & (last.astype("datetime64[D]") + _MID_MONTH > end), last - 1, last)
+    last = np.where(last < first, first, last)  # periods shorter than a month keep one
+
+    valid = ~np.isnat(first) & ~np.isnat(last)
+    n_months = np.where(valid, (last - first).astype(int) + 1, 0)
+    rows = np.repeat(np.arange(len(obs)), n_months)
+    offsets = np.arange(n_months.sum()) - np.repeat(np.cumsum(n_months) - n_months, n_months)
+    months = first[rows] + offsets
+
+    values = obs["value_numeric"].to_numpy(dtype=float)
+    # flows as a monthly amount: period total over the months it is spread on,
+    # so the amounts add up to the total
+    per_month = np.where(is_flow, values / np.maximum(n_months, 1), values)
+    return rows, months, per_month[rows]
+
+
+def _fill(values, observed, method):
+    """Fill unobserved cells of (n_series, n_months) arrays along the month axis"""
+    if method not in INTERPOLATIONS:
+        raise ValueError(f"Unknown interpolation {method!r}; expected one of {INTERPOLATIONS}")
+    values = values.astype(float)
+    if method == "none" or values.size == 0:
+        return np.where(observed, values, np.nan)
+    n_series, n_months = values.shape
+    idx = np.arange(n_months)
+    rows = np.arange(n_series)[:, None]
+    prev = np.maximum.accumulate(np.where(observed, idx, -1), axis=1)
+    prev_val = np.where(prev >= 0, values[rows, np.maximum(prev, 0)], np.nan)
+    if method == "ffill":
+        return prev_val
+    nxt = np.minimum.accumulate(np.where(observed, idx, n_months)[:, ::-1], axis=1)[:, ::-1]
+    next_val = np.where(nxt < n_months, values[rows, np.minimum(nxt, n_months - 1)], np.nan)
+    frac = (idx - prev) / np.maximum(nxt - prev, 1)
+    return np.where(observed, values, prev_val + (next_val - prev_val) * frac)
+
+
+class MonthlyPanel:
+    """
+    Dense monthly panel of many series.
+
+    Rows of `values` and `observed` line up with the rows of `series`, columns
+    with `months`. Unobserved cells of `values` hold NaN; use interpolate() or
+    covariates() for filled values.
+
+    Args:
+        series: DataFrame with the KEYS columns, unit, kind ('flow' or 'stock')
+            and n_obs, one row per series
+        months: datetime64[M] array of consecutive months
+        values: (n_series, n_months) array of monthly values
+        observed: (n_series, n_months) boolean mask of observed months
+    """
+
+    def __init__(self, series, months, values, observed):
+        self.series = series.reset_index(drop=True)
+        self.months = np.asarray(months, dtype="datetime64[M]")
+        self.observed = np.asarray(observed, dtype=bool)
+        self.values = np.where(self.observed, values, np.nan).astype(np.float32)
+
+    @classmethod
+    def from_data(cls, df, start=None, end=None):
+        """
+        Build the panel from the observation records of the main table.
+
+        Args:
+            df: Unified main table (all record types) in the typed schema
+            start: First month (default: earliest observed month)
+            end: Last month (default: latest observed month)
+        """
+        keys = list(KEYS)
+        obs = df[(df["record_type"] == "observation") & df["value_numeric"].notna()
+                 & df["indicator_code"].notna()].reset_index(drop=True)
+        obs[keys] = obs[keys].astype(object).fillna("all")
+        rows, months, values = observation_months(obs)
+
+        cells = obs.loc[rows, keys + ["unit", "source_name"]].reset_index(drop=True)
+        # months as integer codes (months since 1970-01) so pandas keeps them as is
+        cells["month"] = months.astype(np.int64)
+        cells["value"] = values
+        is_findex = cells["source_name"].astype(object).str.contains("Global Findex", na=False)
+        has_findex = is_findex.groupby([cells[k] for k in keys]).transform("any")
+        cells = cells[is_findex | ~has_findex]
+        cells = (cells.groupby(keys + ["month"], as_index=False)
+                      .agg(value=("value", "max"), unit=("unit", "first")))
+
+        first = to_months(start)[0].astype(np.int64) if start is not None else cells["month"].min()
+        last = to_months(end)[0].astype(np.int64) if end is not None else cells["month"].max()
+        if not len(cells):
+            first, last = 0, -1
+        cells = cells[(cells["month"] >= first) & (cells["month"] <= last)]
+        grid = np.arange(first, last + 1).astype("datetime64[M]")
+
+        series_id = cells.groupby(keys, sort=True).ngroup().to_numpy()
+        series = cells.drop_duplicates(keys).sort_values(keys)[keys + ["unit"]].reset_index(drop=True)
+        series["kind"] = np.where(series["unit"].isin(FLOW_UNITS), "flow", "stock")
+        month_pos = (cells["month"] - first).to_numpy(dtype=int)
+
+        values = np.full((len(series), len(grid)), np.nan, dtype=np.float32)
+        observed = np.zeros(values.shape, dtype=bool)
+        values[series_id, month_pos] = cells["value"].to_numpy()
+        observed[series_id, month_pos] = True
+        series["n_obs"] = observed.sum(axis=1)
+        return cls(series, grid, values, observed)
+
+    @property
+    def nbytes(self):
+        """Memory held by the value and mask arrays"""
+        return self.values.nbytes + self.observed.nbytes
+
+    def labels(self):
+        """Series labels: indicator_code for national all-gender series, else 'code/gender/location'"""
+        code, gender, location = (self.series[k].astype(str) for k in KEYS)
+        headline = (gender == "all") & location.isin(["national", "all"])
+        return np.where(headline, code, code + "/" + gender + "/" + location).astype(object)
+
+    def interpolate(self, method="linear"):
+        """
+        Fill gaps between observations.
+
+        Args:
+            method: 'linear' (between neighbouring observations), 'ffill'
+                (last observation carried forward, no look-ahead) or 'none'
+
+        Returns:
+            float32 (n_series, n_months) array; months before a series' first
+            observation (and after its last, for 'linear') stay NaN
+        """
+        return _fill(self.values, self.observed, method).astype(np.float32)
+
+    def covariates(self, codes=None, months=None, method="linear"):
+        """
+        Monthly covariate matrix for the forecasting models.
+
+        Args:
+            codes: Series labels to include (see labels(); default: all)
+            months: Months to return (default: the panel's months); months
+                outside the panel are NaN
+            method: Interpolation method (see interpolate())
+
+        Returns:
+            DataFrame indexed by month with one float32 column per series
+        """
+        labels = self.labels()
+        pick = np.arange(len(labels)) if codes is None else np.array(
+            [np.flatnonzero(labels == code)[0] if code in labels else -1 for code in codes], dtype=int)
+        filled = self.interpolate(method)
+        grid = self.months if months is None else to_months(months)
+        pos = (grid - self.months[0]).astype(int) if len(self.months) else np.full(len(grid), -1)
+        inside = (pos >= 0) & (pos < len(self.months))
+        out = np.full((len(grid), len(pick)), np.nan, dtype=np.float32)
+        have = pick >= 0
+        out[np.ix_(inside, have)] = filled[np.ix_(pick[have], pos[inside])].T
+        columns = labels[pick].tolist() if codes is None else list(codes)
+        return pd.DataFrame(out, index=pd.PeriodIndex(grid, freq="M"), columns=columns)
+
+    def annual(self, method="linear"):
+        """
+        Calendar-year values aligned with the yearly Findex points.
+
+        Stocks take their value in the latest month of the year that has one
+        (December once interpolated, the survey month for the latest Findex
+        round), flows the sum of their 12 monthly amounts (NaN unless all 12
+        are available).
+
+        Returns:
+            DataFrame indexed by year with one column per series label
+        """
+        filled = self.interpolate(method).astype(float)
+        years = self.months.astype("datetime64[Y]").astype(int) + 1970
+        year_values, first = np.unique(years, return_index=True)
+        n_months = np.diff(np.append(first, len(years)))
+        flow = (self.series["kind"] == "flow").to_numpy()
+
+        # sums over each year's months; NaN propagates, so partial years stay NaN
+        totals = np.add.reduceat(filled, first, axis=1) if len(first) else filled[:, :0]
+        totals[:, n_months < 12] = np.nan
+        # latest filled month of each year per series
+        pos = np.where(np.isnan(filled), -1, np.arange(len(years)))
+        latest = np.maximum.reduceat(pos, first, axis=1) if len(first) else pos[:, :0]
+        rows = np.arange(len(self.series))[:, None]
+        stocks = np.where(latest >= first, filled[rows, np.maximum(latest, 0)], np.nan)
+        out = np.where(flow[:, None], totals, stocks).T
+        return pd.DataFrame(out, index=pd.Index(year_values, name="year"), columns=self.labels())
+
+    def to_frame(self, method="linear"):
+        """Long format: KEYS, unit, kind, month, value (interpolated) and observed, for filled cells"""
+        filled = self.interpolate(method)
+        keep = ~np.isnan(filled)
+        series_pos, month_pos = np.nonzero(keep)
+        out = self.series.iloc[series_pos][list(KEYS) + ["unit", "kind"]].reset_index(drop=True)
+        out["month"] = pd.PeriodIndex(self.months[month_pos], freq="M").to_timestamp()
+        out["value"] = filled[keep]
+        out["observed"] = self.observed[keep]
+        return out
+
+
+if __name__ == "__main__":
+    from data_loader import load_enriched_data
+
+    parser = argparse.ArgumentParser(description="Align all observations on a common monthly index")
+    parser.add_argument("--method", choices=INTERPOLATIONS, default="linear", help="gap filling")
+    parser.add_argument("--out", default=None, help="write the long-format panel to this CSV")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="re-read the Excel workbooks instead of the Parquet cache")
+    args = parser.parse_args()
+
+    main_df, _ = load_enriched_data(use_cache=not args.no_cache)
+    panel = MonthlyPanel.from_data(main_df)
+    print(f"{len(panel.series)} series x {len(panel.months)} months "
+          f"({panel.months[0]} to {panel.months[-1]}), {int(panel.observed.sum())} observed cells, "
+          f"{panel.nbytes / 1024:.1f} KiB")
+    print(panel.annual(args.method).T.to_string())
+    if args.out:
+        panel.to_frame(args.method).to_csv(args.out, index=False)
+        print(f"Panel written to {args.out}")
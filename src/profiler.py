@@ -0,0 +1,228 @@
+"""
+Data-quality profile of the unified dataset
+
+profile_table computes missingness, cardinality, value distributions per
+record type, indicator coverage, temporal ranges, observation-year gaps and
+duplicate record ids with whole-table operations (one isna / nunique pass and
+one grouped count per profiled column) instead of filtering the table once per
+record type. The result is a plain JSON-serializable dict, written to
+reports/data_profile.json so the exploration scripts, notebooks and dashboard
+can read it instead of recomputing.
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from data_loader import load_enriched_data, load_unified_data
+
+
+PROFILE_FILENAME = "data_profile.json"
+
+# Columns whose value counts are profiled (overall and per record type)
+COUNT_COLUMNS = ["record_type", "pillar", "source_type", "confidence", "category",
+                 "impact_direction", "impact_magnitude", "relationship_type"]
+
+
+def get_profile_path():
+    """Get the default profile path (reports/data_profile.json)"""
+    project_root = Path(__file__).parent.parent
+    return project_root / "reports" / PROFILE_FILENAME
+
+
+def _counts(series):
+    """Value counts as a {value: count} dict, largest first"""
+    counts = series.sort_values(ascending=False, kind="stable")
+    return {str(key): int(n) for key, n in counts.items()}
+
+
+def _bound(value):
+    return None if pd.isna(value) else str(value)
+
+
+def _temporal_values(values):
+    """Column as datetime64 when every value parses, else as text"""
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values
+    values = values.dropna()
+    parsed = pd.to_datetime(values.astype(object), errors="coerce", format="mixed")
+    if parsed.notna().all():
+        return parsed
+    # e.g. the raw main sheet's collection_date holds collector names
+    return values.astype(str)
+
+
+def profile_table(df, record_type_col="record_type", indicator_col="indicator_code",
+                  date_col="observation_date", id_col="record_id"):
+    """
+    Profile one table of the unified schema.
+
+    Args:
+        df: Main data or impact_links table
+        record_type_col: Column used to group the per-record-type sections
+        indicator_col: Indicator code column for the coverage section
+        date_col: Date column the observation years are taken from
+        id_col: Record id column checked for duplicates
+
+    Returns:
+        dict with keys n_rows, columns (dtype, missing, missing_pct, n_unique
+        per column), value_counts, value_counts_by_record_type, indicators,
+        temporal, years and duplicates
+    """
+    n_rows = len(df)
+    missing = df.isna().sum()
+    n_unique = df.nunique()
+    columns = {
+        col: {
+            "dtype": str(df[col].dtype),
+            "missing": int(missing[col]),
+            "missing_pct": round(100 * missing[col] / n_rows, 2) if n_rows else 0.0,
+            "n_unique": int(n_unique[col]),
+        }
+        for col in df.columns
+    }
+
+    has_types = record_type_col in df.columns
+    record_types = df[record_type_col] if has_types else None
+
+    value_counts = {}
+    by_record_type = {}
+    for col in COUNT_COLUMNS:
+        if col not in df.columns or missing[col] == n_rows:
+            continue
+        values = df[col]
+        if has_types and col != record_type_col:
+            # one grouped count gives both the per-type and the overall counts
+            grouped = values.groupby([record_types, values], observed=True).size()
+            by_record_type[col] = {str(rt): _counts(grouped.xs(rt, level=0))
+                                   for rt in grouped.index.get_level_values(0).unique()}
+            value_counts[col] = _counts(grouped.groupby(level=1).sum())
+        else:
+            value_counts[col] = _counts(values.groupby(values, observed=True).size())
+
+    indicators = None
+    if indicator_col in df.columns:
+        codes = df[indicator_col]
+        indicators = {"n_unique": int(n_unique[indicator_col]), "by_record_type": {}}
+        if has_types:
+            grouped = codes.groupby([record_types, codes], observed=True).size()
+            for rt in record_types.dropna().unique():
+                per_type = grouped.xs(rt, level=0) if rt in grouped.index.get_level_values(0) else pd.Series(dtype=int)
+                indicators["by_record_type"][str(rt)] = {str(code): int(n) for code, n in per_type.sort_index().items()}
+        indicators["counts"] = {str(code): int(n) for code, n in codes.groupby(codes, observed=True).size().sort_index().items()}
+
+    temporal = {}
+    for col in df.columns:
+        if "date" not in col.lower() or missing[col] == n_rows:
+            continue
+        values = _temporal_values(df[col])
+        temporal[col] = {"min": _bound(values.min()), "max": _bound(values.max()),
+                         "n_unique": int(values.nunique())}
+
+    years = None
+    if date_col in df.columns and has_types:
+        dates = df.loc[(record_types == "observation").to_numpy(), date_col]
+        if not pd.api.types.is_datetime64_any_dtype(dates.dtype):
+            dates = pd.to_datetime(dates.astype(object), errors="coerce", format="mixed")
+        observed = dates.dt.year
+        observed = sorted(int(y) for y in observed.dropna().unique())
+        gaps = [[a, b] for a, b in zip(observed[:-1], observed[1:]) if b - a > 1]
+        years = {"observed": observed, "gaps": gaps}
+
+    duplicates = None
+    if id_col in df.columns:
+        ids = df[id_col].astype(object)
+        dup = ids.duplicated(keep=False).to_numpy()
+        # only the duplicated rows are grouped, one entry per repeated id
+        dup_ids = ids[dup]
+        dup_types = record_types[dup] if has_types else pd.Series("", index=dup_ids.index)
+        grouped = dup_types.groupby(dup_ids.to_numpy(), sort=True)
+        duplicates = {
+            "n_rows": int(dup.sum()),
+            "record_ids": {str(record_id): {"count": int(n), "record_types": sorted(map(str, types.dropna().unique()))}
+                           for (record_id, types), n in zip(grouped, grouped.size())},
+        }
+
+    return {
+        "n_rows": n_rows,
+        "columns": columns,
+        "value_counts": value_counts,
+        "value_counts_by_record_type": by_record_type,
+        "indicators": indicators,
+        "temporal": temporal,
+        "years": years,
+        "duplicates": duplicates,
+    }
+
+
+def profile_data(main_data, impact_links, source="unified"):
+    """
+    Profile the main table and the impact links.
+
+    Returns:
+        dict: {'source', 'generated', 'tables': {'main': ..., 'impact_links': ...}}
+    """
+    return {
+        "source": source,
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "tables": {
+            "main": profile_table(main_data),
+            "impact_links": profile_table(impact_links, indicator_col="related_indicator"),
+        },
+    }
+
+
+def write_profile(profile, path=None):
+    """Write a profile as JSON (default: reports/data_profile.json)"""
+    path = Path(path) if path is not None else get_profile_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as fh:
+        json.dump(profile, fh, indent=2)
+    return path
+
+
+def load_profile(path=None):
+    """Read a profile written by write_profile, or None if there is none"""
+    path = Path(path) if path is not None else get_profile_path()
+    if not path.exists():
+        return None
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def missing_table(table_profile):
+    """Missing count / % per column with missing values, most missing first"""
+    missing = pd.DataFrame({
+        "Missing Count": {col: info["missing"] for col, info in table_profile["columns"].items()},
+        "Missing %": {col: info["missing_pct"] for col, info in table_profile["columns"].items()},
+    })
+    return missing[missing["Missing Count"] > 0].sort_values("Missing Count", ascending=False, kind="stable")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile the unified dataset")
+    parser.add_argument("--enriched", action="store_true",
+                        help="profile the enriched data instead of the raw unified data")
+    parser.add_argument("--out", default=None,
+                        help=f"output path (default: reports/{PROFILE_FILENAME})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="re-read the Excel workbooks instead of the Parquet cache")
+    args = parser.parse_args()
+
+    loader = load_enriched_data if args.enriched else load_unified_data
+    main_data, impact_links = loader(use_cache=not args.no_cache)
+    profile = profile_data(main_data, impact_links, source="enriched" if args.enriched else "unified")
+    path = write_profile(profile, args.out)
+
+    main = profile["tables"]["main"]
+    print(f"Profiled {main['n_rows']} records and {profile['tables']['impact_links']['n_rows']} impact links")
+    print(f"Observation years: {main['years']['observed']}")
+    print(f"Duplicate record_id rows: {main['duplicates']['n_rows']}")
+    print(f"Profile written to: {path}")
@@ -0,0 +1,149 @@
+"""
+Reference-code validation for the unified schema
+
+RuleSet compiles reference_codes.xlsx once into per-field lookup tables
+(allowed codes plus the record types each field applies to). Checking a
+table is one vectorized isin per coded column; categorical columns test
+only their categories and map the result back through the integer codes.
+Only the offending rows are grouped for the report.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+VIOLATION_COLUMNS = ["field", "value", "record_type", "count", "first_row", "example_id"]
+
+
+def _not_allowed(values, allowed):
+    """Boolean ndarray: non-missing values that are not in allowed"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # test each category once and map back through the integer codes
+        bad = np.append(~values.cat.categories.astype(str).isin(allowed), False)
+        return bad[values.cat.codes.to_numpy()]
+    if pd.api.types.is_numeric_dtype(values.dtype) or pd.api.types.is_datetime64_any_dtype(values.dtype):
+        # codes are text; any value in a numeric / date column is invalid
+        return values.notna().to_numpy()
+    return values.notna().to_numpy() & ~values.isin(allowed).to_numpy()
+
+
+class RuleSet:
+    """
+    Allowed reference codes per field.
+
+    Args:
+        allowed: dict of field -> iterable of allowed codes
+        applies_to: dict of field -> set of record types the field is
+            checked for (None or missing = every record type)
+    """
+
+    def __init__(self, allowed, applies_to=None):
+        applies_to = applies_to or {}
+        self.allowed = {field: pd.Index(sorted(set(map(str, codes)))) for field, codes in allowed.items()}
+        self.applies_to = {field: (frozenset(applies_to[field]) if applies_to.get(field) else None)
+                           for field in self.allowed}
+
+    @classmethod
+    def from_reference_codes(cls, ref_codes):
+        """
+        Compile the reference codes sheet (columns field, code, applies_to).
+
+        applies_to values such as 'observation/target/impact_link' scope a
+        field to those record types; 'All' applies it everywhere.
+        """
+        allowed = {}
+        applies_to = {}
+        for field, group in ref_codes.groupby("field"):
+            allowed[field] = group["code"].dropna()
+            scopes = set()
+            if "applies_to" in group.columns:
+                for value in group["applies_to"].dropna().astype(str):
+                    scopes.update(part.strip() for part in value.split("/"))
+            applies_to[field] = None if not scopes or "All" in scopes else scopes
+        return cls(allowed, applies_to)
+
+    @property
+    def fields(self):
+        return list(self.allowed)
+
+    def __repr__(self):
+        return f"RuleSet({len(self.allowed)} fields, {sum(len(c) for c in self.allowed.values())} codes)"
+
+    def _invalid(self, df, record_type_col="record_type"):
+        """Yield (field, violating-row mask) per checked field"""
+        scope_masks = {}
+        for field, allowed in self.allowed.items():
+            if field not in df.columns:
+                continue
+            mask = _not_allowed(df[field], allowed)
+            scope = self.applies_to[field]
+            if scope is not None and record_type_col in df.columns:
+                if scope not in scope_masks:
+                    scope_masks[scope] = df[record_type_col].isin(list(scope)).to_numpy()
+                mask = mask & scope_masks[scope]
+            yield field, mask
+
+    def check(self, df, record_type_col="record_type"):
+        """
+        Row-level result.
+
+        Returns:
+            dict: field -> boolean ndarray marking violating rows, for fields
+                with at least one violation
+        """
+        return {field: mask for field, mask in self._invalid(df, record_type_col) if mask.any()}
+
+    def validate(self, df, record_type_col="record_type", id_col="record_id"):
+        """
+        Compact violation report: one row per (field, value, record type).
+
+        Returns:
+            DataFrame with columns field, value, record_type, count,
+            first_row (position of the first offending row) and example_id
+        """
+        parts = []
+        for field, mask in self._invalid(df, record_type_col):
+            rows = np.flatnonzero(mask)
+            if len(rows) == 0:
+                continue
+            # only the offending rows are grouped, so this stays small
+            bad = pd.DataFrame({
+                "value": df[field].iloc[rows].astype(object).to_numpy(),
+                "record_type": (df[record_type_col].iloc[rows].astype(object).to_numpy()
+                                if record_type_col in df.columns else np.nan),
+                "row": rows,
+            })
+            grouped = bad.groupby(["value", "record_type"], dropna=False, sort=False)["row"]
+            summary = grouped.agg(["size", "min"]).reset_index()
+            parts.append(pd.DataFrame({
+                "field": field,
+                "value": summary["value"].to_numpy(),
+                "record_type": summary["record_type"].to_numpy(),
+                "count": summary["size"].to_numpy(),
+                "first_row": summary["min"].to_numpy(),
+                "example_id": (df[id_col].iloc[summary["min"]].to_numpy()
+                               if id_col in df.columns else np.nan),
+            }))
+        if not parts:
+            return pd.DataFrame(columns=VIOLATION_COLUMNS)
+        return (pd.concat(parts, ignore_index=True)
+                .sort_values(["field", "count"], ascending=[True, False], kind="stable")
+                .reset_index(drop=True))
+
+
+def validate_tables(main_data, impact_links, rules):
+    """
+    Validate the main table and impact links against a RuleSet.
+
+    Returns:
+        DataFrame of violations (VIOLATION_COLUMNS plus a 'table' column)
+    """
+    parts = []
+    for table, df in [("main", main_data), ("impact_links", impact_links)]:
+        if df is not None and len(df) > 0:
+            report = rules.validate(df)
+            if len(report) > 0:
+                parts.append(report.assign(table=table))
+    if not parts:
+        return pd.DataFrame(columns=VIOLATION_COLUMNS + ["table"])
+    return pd.concat(parts, ignore_index=True)
@@ -3,6 +3,7 @@ Task 1: Data Exploration Script
 Standalone script to explore the Ethiopia Financial Inclusion dataset
 """
 
+import argparse
 import pandas as pd
 import sys
 from pathlib import Path
@@ -11,6 +12,16 @@ from pathlib import Path
 project_root = Path(__file__).parent
 data_dir = project_root / "data" / "raw"
 
+sys.path.insert(0, str(project_root / "src"))
+
+from data_loader import read_excel_cached
+
+parser = argparse.ArgumentParser(description="Explore the Ethiopia Financial Inclusion dataset")
+parser.add_argument("--no-cache", action="store_true",
+                    help="re-read the Excel workbooks instead of the Parquet cache")
+args = parser.parse_args()
+use_cache = not args.no_cache
+
 print("=" * 80)
 print("ETHIOPIA FINANCIAL INCLUSION DATA EXPLORATION")
 print("=" * 80)
@@ -20,19 +31,20 @@ print("\nLoading unified data...")
 unified_file = data_dir / "ethiopia_fi_unified_data.xlsx"
 
 try:
-    # Check available sheets
-    xl_file = pd.ExcelFile(unified_file)
-    print(f"Available sheets: {xl_file.sheet_names}")
+    # Load all sheets and check which are available
+    sheets = read_excel_cached(unified_file, sheet_name=None, use_cache=use_cache)
+    sheet_names = list(sheets.keys())
+    print(f"Available sheets: {sheet_names}")
     
     # Load main data (first sheet)
-    main_data = pd.read_excel(unified_file, sheet_name=0)
+    main_data = sheets[sheet_names[0]]
     print(f"\nMain data shape: {main_data.shape}")
     print(f"Columns: {main_data.columns.tolist()}")
     
     # Try to load second sheet if it exists
     impact_links = None
-    if len(xl_file.sheet_names) > 1:
-        impact_links = pd.read_excel(unified_file, sheet_name=1)
+    if len(sheet_names) > 1:
+        impact_links = sheets[sheet_names[1]]
         print(f"\nImpact links shape: {impact_links.shape}")
     else:
         # Check if impact_links are in main data
@@ -44,7 +56,7 @@ try:
     # Load reference codes
     print("\nLoading reference codes...")
     ref_file = data_dir / "reference_codes.xlsx"
-    ref_codes = pd.read_excel(ref_file)
+    ref_codes = read_excel_cached(ref_file, use_cache=use_cache)
     print(f"Reference codes shape: {ref_codes.shape}")
     
     # EXPLORATION
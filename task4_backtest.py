@@ -0,0 +1,240 @@
+"""Task 4 backtests and automatic model selection.
+
+Every candidate model in `task4_forecast.CANDIDATE_MODELS` (linear, logit-linear,
+damped trend, logistic and Gompertz growth curves) is scored on held-out points
+of each series:
+
+- `rolling` (default): rolling origin. For each origin k >= --min-train the model
+  is fitted on the first k points and forecasts all later points; the horizon is
+  the distance in years from the last training year.
+- `loo`: leave one out. Each point is predicted from all the others.
+
+Series are the two headline series of `reports/forecasts_task4.csv`, plus every
+indicator_code/gender/location series of the panel with --all-series. Series
+are backtested in parallel on a process pool. Fold forecasts are cached in
+`models/backtest_folds.parquet`, keyed by a hash of MODEL_VERSION, the model,
+the training points and the target years, so a rerun only fits folds whose
+data or model code changed.
+
+Models are compared on the held-out points every one of them could forecast
+(growth curves need three training points), ranked by MAE with RMSE and the
+candidate order breaking ties. Outputs:
+
+- `reports/model_scores.csv`: series, model, n_points, mae, rmse, rank
+- `reports/model_selection.csv`: the winner per series, read by
+  `task4_forecast.py --model auto` and shown by the dashboard's model picker.
+  Series with fewer than MIN_HELD_OUT (3) held-out points keep the default
+  model ("insufficient history").
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from task4_forecast import (CANDIDATE_MODELS, DEFAULT_MODEL, HEADLINE_SERIES, MODEL_VERSION, SERIES_KEYS,
+                            build_series_panel, fit_predict, headline_history, load_data)
+
+FOLD_CACHE = Path('models/backtest_folds.parquet')
+SCORE_COLUMNS = ['series', 'model', 'n_points', 'mae', 'rmse', 'rank']
+SELECTION_COLUMNS = ['series', 'model', 'mae', 'n_points', 'reason']
+# held-out points a winner needs before it replaces DEFAULT_MODEL; one or two
+# errors are too few to tell the candidates apart
+MIN_HELD_OUT = 3
+
+
+def iter_folds(years, scheme='rolling', min_train=2):
+    # (train index, test index) pairs over a series sorted by year
+    n = len(years)
+    if scheme == 'rolling':
+        for k in range(min_train, n):
+            yield np.arange(k), np.arange(k, n)
+    elif scheme == 'loo':
+        if n - 1 >= min_train:
+            for i in range(n):
+                yield np.delete(np.arange(n), i), np.array([i])
+    else:
+        raise ValueError(f'Unknown backtest scheme {scheme!r}')
+
+
+def fold_key(model, train_years, train_vals, test_years):
+    # content hash of a fold: same model code, model and data -> same cached forecast
+    payload = json.dumps([MODEL_VERSION, model, np.asarray(train_years, dtype=float).tolist(),
+                          np.asarray(train_vals, dtype=float).tolist(),
+                          np.asarray(test_years, dtype=float).tolist()])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def load_fold_cache(path=FOLD_CACHE):
+    # fold key -> forecasts of its test years (NaN: the model could not be fitted)
+    if not Path(path).exists():
+        return {}
+    cached = pd.read_parquet(path)
+    return {key: d['forecast'].to_numpy() for key, d in cached.groupby('key', sort=False)}
+
+
+def save_fold_cache(cache, path=FOLD_CACHE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rows = pd.DataFrame({'key': np.repeat(list(cache), [len(v) for v in cache.values()]),
+                         'forecast': np.concatenate(list(cache.values())) if cache else np.array([])})
+    tmp_path = path.with_name(path.name + '.tmp')
+    rows.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def backtest_series(series, years, vals, scheme='rolling', min_train=2, cached=None):
+    """Forecast every held-out point of one series with every candidate model.
+
+    Returns (rows, new_folds, n_cached): one row per (model, fold, test point),
+    the fold forecasts that were not in `cached` and the number that were.
+    """
+    cached = cached or {}
+    order = np.argsort(years, kind='stable')
+    years = np.asarray(years, dtype=float)[order]
+    vals = np.asarray(vals, dtype=float)[order]
+    rows, new_folds, n_cached = [], {}, 0
+    for train, test in iter_folds(years, scheme, min_train):
+        for model in CANDIDATE_MODELS:
+            key = fold_key(model, years[train], vals[train], years[test])
+            forecast = cached.get(key)
+            if forecast is not None:
+                n_cached += 1
+            else:
+                try:
+                    forecast, _ = fit_predict(model, years[train], vals[train], years[test])
+                except (ValueError, RuntimeError):
+                    forecast = np.full(len(test), np.nan)
+                forecast = np.asarray(forecast, dtype=float)
+                new_folds[key] = forecast
+            origin = years[train].max()
+            for y, actual, f in zip(years[test], vals[test], forecast):
+                if np.isfinite(f):
+                    rows.append({'series': series, 'model': model, 'origin': int(origin), 'year': int(y),
+                                 'horizon': int(y - origin), 'actual': actual, 'forecast': f})
+    return rows, new_folds, n_cached
+
+
+def _backtest_task(task):
+    return backtest_series(*task)
+
+
+def backtest_inputs(df, all_series=False):
+    # (series label, years, values) for every series to backtest
+    inputs = []
+    for series in HEADLINE_SERIES:
+        years, vals = headline_history(df, series)
+        inputs.append((series, years, vals))
+    if all_series:
+        panel = build_series_panel(df)
+        for i, key in enumerate(panel['series'][SERIES_KEYS].itertuples(index=False)):
+            m = panel['mask'][i]
+            inputs.append(('/'.join(map(str, key)), panel['years'][i][m], panel['values'][i][m]))
+    return inputs
+
+
+def score_folds(folds):
+    """MAE/RMSE per (series, model) on the held-out points all models forecast, ranked."""
+    if folds.empty:
+        return pd.DataFrame(columns=SCORE_COLUMNS)
+    folds = folds.copy()
+    n_models = folds.groupby('series')['model'].transform('nunique')
+    n_forecasts = folds.groupby(['series', 'origin', 'year'])['model'].transform('size')
+    common = folds[n_forecasts == n_models].copy()
+    common['abs_err'] = (common['forecast'] - common['actual']).abs()
+    common['sq_err'] = common['abs_err'] ** 2
+    scores = (common.groupby(['series', 'model'], sort=False)
+                    .agg(n_points=('abs_err', 'size'), mae=('abs_err', 'mean'), rmse=('sq_err', 'mean'))
+                    .reset_index())
+    scores['rmse'] = np.sqrt(scores['rmse'])
+    scores['order'] = scores['model'].map({m: i for i, m in enumerate(CANDIDATE_MODELS)})
+    scores = scores.sort_values(['series', 'mae', 'rmse', 'order'], kind='stable')
+    scores['rank'] = scores.groupby('series', sort=False).cumcount() + 1
+    return scores[SCORE_COLUMNS].reset_index(drop=True)
+
+
+def select_models(scores, series, min_points=MIN_HELD_OUT):
+    # winner per series; series scored on fewer than min_points held-out points keep the default model
+    winners = scores[scores['rank'] == 1].set_index('series')
+    default = scores[scores['model'] == DEFAULT_MODEL].set_index('series')
+    rows = []
+    for s in series:
+        n_points = int(winners.loc[s, 'n_points']) if s in winners.index else 0
+        if n_points >= min_points:
+            w = winners.loc[s]
+            rows.append({'series': s, 'model': w['model'], 'mae': w['mae'], 'n_points': n_points,
+                         'reason': f'lowest MAE on {n_points} held-out points'})
+        else:
+            rows.append({'series': s, 'model': DEFAULT_MODEL,
+                         'mae': default.loc[s, 'mae'] if s in default.index else np.nan, 'n_points': n_points,
+                         'reason': 'insufficient history'})
+    return pd.DataFrame(rows, columns=SELECTION_COLUMNS)
+
+
+def run_backtest(inputs, scheme='rolling', min_train=2, workers=None, use_fold_cache=True,
+                 cache_path=FOLD_CACHE):
+    """Backtest every series and return the fold-level forecasts."""
+    cached = load_fold_cache(cache_path)
+    lookup = cached if use_fold_cache else {}
+    tasks = [(series, years, vals, scheme, min_train, lookup) for series, years, vals in inputs]
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    if workers <= 1 or len(tasks) <= 1:
+        results = [_backtest_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(_backtest_task, tasks, chunksize=max(1, len(tasks) // (4 * workers))))
+
+    rows, new_folds = [], {}
+    for series_rows, series_folds, _ in results:
+        rows.extend(series_rows)
+        new_folds.update(series_folds)
+    if new_folds:
+        cached.update(new_folds)
+        save_fold_cache(cached, cache_path)
+    print(f'{len(new_folds)} folds fitted, {sum(r[2] for r in results)} reused from the fold cache')
+    columns = ['series', 'model', 'origin', 'year', 'horizon', 'actual', 'forecast']
+    return pd.DataFrame(rows, columns=columns)
+
+
+def main(all_series=False, scheme='rolling', min_train=2, workers=None, use_cache=True,
+         use_fold_cache=True, out_dir='reports', min_points=MIN_HELD_OUT):
+    df, _ = load_data(use_cache=use_cache)
+
+    inputs = backtest_inputs(df, all_series=all_series)
+    folds = run_backtest(inputs, scheme=scheme, min_train=min_train, workers=workers,
+                         use_fold_cache=use_fold_cache)
+    scores = score_folds(folds)
+    selection = select_models(scores, [series for series, _, _ in inputs], min_points=min_points)
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    scores.to_csv(out_dir / 'model_scores.csv', index=False)
+    selection.to_csv(out_dir / 'model_selection.csv', index=False)
+    print(f'{len(inputs)} series backtested ({scheme}), scores written to {out_dir / "model_scores.csv"}')
+    print(selection[selection['series'].isin(HEADLINE_SERIES)].to_string(index=False))
+    print(f"{int((selection['reason'] == 'insufficient history').sum())} series kept {DEFAULT_MODEL} "
+          f'(fewer than {min_points} held-out points); selection written to {out_dir / "model_selection.csv"}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backtest Task 4 candidate models and select one per series')
+    parser.add_argument('--all-series', action='store_true',
+                        help='also backtest every indicator_code/gender/location series')
+    parser.add_argument('--scheme', choices=['rolling', 'loo'], default='rolling',
+                        help='rolling origin (default) or leave one out')
+    parser.add_argument('--min-train', type=int, default=2, help='minimum training points per fold')
+    parser.add_argument('--min-points', type=int, default=MIN_HELD_OUT,
+                        help=f'held-out points a winner needs to replace {DEFAULT_MODEL}')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (1 = run inline)')
+    parser.add_argument('--no-fold-cache', action='store_true',
+                        help=f'refit every fold instead of reusing {FOLD_CACHE}')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='re-read the Excel workbook instead of the Parquet cache')
+    args = parser.parse_args()
+    main(all_series=args.all_series, scheme=args.scheme, min_train=args.min_train, workers=args.workers,
+         use_cache=not args.no_cache, use_fold_cache=not args.no_fold_cache, min_points=args.min_points)
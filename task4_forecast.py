@@ -1,20 +1,49 @@
 """Task 4: Forecast Account Ownership (Access) and Digital Payment Usage (2025-2027).
 
 This script:
-- loads the unified enriched Excel in `data/processed`
+- loads the enriched data (`data/processed`; enrichment store batches take precedence)
 - extracts 'Account Ownership Rate' (Global Findex) and a proxy for digital payments
-- fits a linear trend and a logit-trend (bounded) model for each series
-- forecasts 2025-2027: baseline (trend), event-augmented (NFIS target interpolation),
-  and three scenarios (optimistic/base/pessimistic)
+- fits the candidate models (linear and logit-linear trends, damped trend, logistic and
+  Gompertz growth curves from `src/growth_models.py`) and uses the backtest winner of each
+  series (`task4_backtest.py`) as its baseline, logit-linear by default
+- forecasts 2025-2027: baseline (trend), event-augmented (trend plus event effects
+  fitted jointly in `src/event_regression.py`), the NFIS target path, and three
+  scenarios (optimistic/base/pessimistic)
 - writes results to `reports/forecasts_task4.csv` and prints a short summary.
+- with `--all-series`, fits every indicator_code x gender x location series in one
+  batched pass and writes a long-format table to `reports/forecasts_all_series.csv`.
+- with `--hierarchical`, forecasts every gender / location / region group and reconciles
+  the groups with their totals (bottom-up, OLS, MinT; `src/hierarchy.py`) to
+  `reports/forecasts_hierarchical.csv`.
+- aligns every observation (Findex points, monthly and fiscal-year operator / NBE
+  series) on a common monthly index (`src/mixed_frequency.py`) and stores it with the run.
+- records each run (model version, parameters, output tables) in the artifact
+  store under `reports/artifacts/` (see `src/artifact_store.py`); the dashboard
+  reads the latest run from there.
 
 Limitations are explicitly noted in the printed summary.
 """
 
+import argparse
+import hashlib
+import sys
 from pathlib import Path
 import numpy as np
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+import artifact_store
+import event_regression
+import fit_cache
+import growth_models
+import hierarchy
+import mixed_frequency
+from data_loader import load_enriched_data, parquet_available
+
+# Bump when the forecasting method changes so stored runs stay comparable
+MODEL_VERSION = 'model-select-v6'
+
 
 def safe_logit(p, eps=1e-6):
     p = np.clip(p, eps, 1 - eps)
@@ -32,14 +61,23 @@ def fit_linear(years, y):
     resid = y - y_hat
     s2 = (resid ** 2).sum() / max(1, (len(y) - X.shape[1]))
     XtX_inv = np.linalg.pinv(X.T.dot(X))
-    return {'beta': beta, 's2': s2, 'XtX_inv': XtX_inv}
+    return {'beta': beta, 's2': s2, 'XtX_inv': XtX_inv, 'n': len(y)}
 
 
 def predict_linear(model, years_pred):
-    Xp = np.vstack([np.ones_like(years_pred), years_pred]).T
-    y_pred = Xp.dot(model['beta'])
-    # prediction se: sqrt(s2 * (1 + x0' (X'X)^{-1} x0))
-    se = np.sqrt(np.array([model['s2'] * (1 + x.dot(model['XtX_inv']).dot(x)) for x in Xp]))
+    """Point forecasts and prediction standard errors for a linear trend.
+
+    `model` is either a single fit (beta (2,), XtX_inv (2, 2), scalar s2) or a
+    stack from `fit_linear_batch` (beta (S, 2), XtX_inv (S, 2, 2), s2 (S,)).
+    `years_pred` may hold fractional years (e.g. monthly steps), shared as
+    (H,) or per series as (S, H); a scalar year is treated as (1,).
+    """
+    t = np.atleast_1d(np.asarray(years_pred, dtype=float))
+    Xp = np.stack([np.ones_like(t), t], axis=-1)
+    y_pred = np.einsum('...hj,...j->...h', Xp, np.asarray(model['beta']))
+    # prediction se: sqrt(s2 * (1 + x0' (X'X)^{-1} x0)) for every x0 at once
+    quad = np.einsum('...hj,...jk,...hk->...h', Xp, np.asarray(model['XtX_inv']), Xp)
+    se = np.sqrt(np.asarray(model['s2'])[..., None] * (1 + quad))
     return y_pred, se
 
 
@@ -58,9 +96,107 @@ def predict_logit_linear(model, years_pred):
     return p_pred * 100.0, se_p * 100.0
 
 
-def load_series(path):
-    df = pd.read_excel(path, sheet_name='ethiopia_fi_unified_data')
-    return df
+# --- Further candidate models, scored against the two above by task4_backtest.py ---
+
+DAMPING = 0.8  # per-year damping factor of the trend in `damped_trend`
+
+
+def fit_damped_trend(years, y, phi=DAMPING):
+    # linear-trend slope, anchored at the last observation and damped by phi per year
+    model = fit_linear(years, y)
+    last = int(np.argmax(years))
+    model.update({'phi': phi, 'last_year': float(years[last]), 'level': float(y[last])})
+    return model
+
+
+def predict_damped_trend(model, years_pred):
+    h = np.maximum(np.asarray(years_pred, dtype=float) - model['last_year'], 0.0)
+    phi = model['phi']
+    steps = h if phi == 1 else phi * (1 - phi ** h) / (1 - phi)
+    # damped design: x0 = (0, steps) around the anchored level, so the slope
+    # uncertainty grows with the damped steps rather than the full horizon;
+    # the level (last observation) is treated as known
+    se = np.sqrt(model['s2'] * (1 + steps ** 2 * np.asarray(model['XtX_inv'])[1, 1]))
+    return model['level'] + model['beta'][1] * steps, se
+
+
+def fit_growth_curve(years, y_pct, curve='logistic', target=None, ceiling_max=100.0):
+    # saturating curve (src/growth_models.py) with a fitted ceiling between
+    # max(highest observation, target) and ceiling_max
+    if len(y_pct) < growth_models.MIN_POINTS:
+        raise ValueError('{} needs at least {} points'.format(curve, growth_models.MIN_POINTS))
+    model = growth_models.fit_growth_batch(years, y_pct, curve=curve,
+                                           target=None if target is None else [target], ceiling_max=ceiling_max)
+    if not model['converged'][0]:
+        raise RuntimeError('{} fit did not converge'.format(curve))
+    return model
+
+
+def fit_logistic(years, y_pct):
+    return fit_growth_curve(years, y_pct, 'logistic')
+
+
+def fit_gompertz(years, y_pct):
+    return fit_growth_curve(years, y_pct, 'gompertz')
+
+
+def predict_growth_curve(model, years_pred):
+    y_pred, se = growth_models.predict_growth_batch(model, years_pred)
+    return y_pred[0], se[0]
+
+
+# name -> (fit(years, y), predict(model, years_pred) -> (forecast, se))
+CANDIDATE_MODELS = {
+    'linear': (fit_linear, predict_linear),
+    'logit_linear': (fit_logit_linear, predict_logit_linear),
+    'damped_trend': (fit_damped_trend, predict_damped_trend),
+    'logistic': (fit_logistic, predict_growth_curve),
+    'gompertz': (fit_gompertz, predict_growth_curve),
+}
+DEFAULT_MODEL = 'logit_linear'
+
+
+# hyperparameters of each model, part of its fit cache key
+FIT_PARAMS = {'damped_trend': {'phi': DAMPING}}
+
+_fit_cache = None  # set by open_fit_cache; fits are computed directly otherwise
+
+
+def open_fit_cache(enabled=True, path=None, max_bytes=fit_cache.DEFAULT_MAX_BYTES):
+    # route fit_model through the on-disk fit cache (src/fit_cache.py), or stop doing so
+    global _fit_cache
+    if _fit_cache is not None:
+        _fit_cache.close()
+    _fit_cache = fit_cache.FitCache(path, max_bytes=max_bytes) if enabled else None
+    return _fit_cache
+
+
+def fit_model(model_name, years, y):
+    # fit a candidate model, reusing the cached fit when the series and model are unchanged
+    fit = CANDIDATE_MODELS[model_name][0]
+    years, y = np.asarray(years, dtype=float), np.asarray(y, dtype=float)
+    if _fit_cache is None:
+        return fit(years, y)
+    return _fit_cache.fit(model_name, fit, years, y, params=FIT_PARAMS.get(model_name), version=MODEL_VERSION)
+
+
+def fit_predict(model_name, years, y, years_pred):
+    return CANDIDATE_MODELS[model_name][1](fit_model(model_name, years, y), years_pred)
+
+
+def load_data(use_cache=True):
+    # enriched main data and impact links in the typed schema (dates parsed once);
+    # batches appended with `enrich_data.py --incremental` take precedence over the workbook
+    return load_enriched_data(use_cache=use_cache)
+
+
+def data_fingerprint(*frames):
+    # SHA-256 of the rows the forecasts were made from, whether they came from
+    # the workbook or the enrichment store
+    digest = hashlib.sha256()
+    for frame in frames:
+        digest.update(pd.util.hash_pandas_object(frame.astype(str), index=False).to_numpy().tobytes())
+    return digest.hexdigest()
 
 
 def select_findex(df, indicator_name):
@@ -78,58 +214,320 @@ def select_findex(df, indicator_name):
     return sel['fiscal_year'].astype(int).values, sel['value_numeric'].values
 
 
-def main():
-    root = Path('data/processed')
-    path = root / 'ethiopia_fi_unified_data_enriched.xlsx'
-    if not path.exists():
-        raise FileNotFoundError(path)
+# Series reported in reports/forecasts_task4.csv
+HEADLINE_SERIES = ['Account Ownership Rate', 'Digital Payment Usage (proxy)']
+# indicator_code of each headline series in the event regression
+HEADLINE_CODES = {'Account Ownership Rate': 'ACC_OWNERSHIP', 'Digital Payment Usage (proxy)': 'ACC_MM_ACCOUNT'}
 
-    df = load_series(path)
 
-    # --- Account Ownership (Access) ---
-    years_acc, vals_acc = select_findex(df, 'Account Ownership Rate')
-
-    # remove NFIS target rows (source not Global Findex) if present
-    mask_history = years_acc <= 2024
-    years_acc = years_acc[mask_history]
-    vals_acc = vals_acc[mask_history]
+def headline_history(df, series):
+    # observed (years, values) behind a headline series
+    if series == 'Account Ownership Rate':
+        years, vals = select_findex(df, 'Account Ownership Rate')
+        # remove NFIS target rows (source not Global Findex) if present
+        keep = years <= 2024
+        return years[keep], vals[keep]
+    # Proxy: Mobile Money Account Rate (Global Findex) and fallback to Mobile Money Activity Rate
+    years, vals = select_findex(df, 'Mobile Money Account Rate')
+    if len(years) == 0:
+        years, vals = select_findex(df, 'Mobile Money Activity Rate')
+    return years, vals
+
+
+def load_model_selection(path=Path('reports/model_selection.csv')):
+    # series -> winning model from task4_backtest.py, empty if it has not run
+    if not Path(path).exists():
+        return {}
+    sel = pd.read_csv(path)
+    return dict(zip(sel['series'], sel['model']))
+
+
+def nfis_target(df, indicator_name):
+    # latest NFIS target (year, value) for an indicator, or None
+    nfis = df[(df['indicator'] == indicator_name) & (df['source_name'].str.contains('NFIS', na=False))]
+    if nfis.empty:
+        return None
+    target_row = nfis.sort_values('fiscal_year').iloc[-1]
+    return int(target_row['fiscal_year']), float(target_row['value_numeric'])
+
+
+def target_path(years, last_year, last_val, target_year, target_val):
+    # linear interpolation from the last observation to a target, flat before
+    # last_year and after target_year; all arguments broadcast, so many
+    # (target_year, target_val) pairs can be evaluated at once
+    years = np.asarray(years, dtype=float)
+    span = np.asarray(target_year, dtype=float) - last_year
+    frac = np.where(span > 0,
+                    np.clip((years - last_year) / np.where(span > 0, span, 1.0), 0.0, 1.0),
+                    (years > last_year).astype(float))
+    return last_val + frac * (np.asarray(target_val, dtype=float) - last_val)
+
+
+# --- Batched engine: every indicator_code x gender x location in one pass ---
+
+SERIES_KEYS = ['indicator_code', 'gender', 'location']
+
+
+def observation_year(df):
+    # calendar year of each record; fiscal_year mixes 2024 and 'FY2024/25'
+    # style labels, so prefer the observation date (parsed by the typed loader)
+    # and fall back to it
+    years = df['observation_date'].dt.year
+    return years.fillna(pd.to_numeric(df['fiscal_year'], errors='coerce'))
+
+
+def build_series_panel(df, min_obs=2, keys=SERIES_KEYS):
+    """Stack every observed series into padded (n_series, max_len) arrays.
+
+    Series are keyed on `keys` (default SERIES_KEYS). As in `select_findex`,
+    Global Findex rows are preferred when a series has any, and the max value
+    is kept per year.
+    Ragged lengths are handled with a boolean `mask`; padded cells hold 0.
+    """
+    obs = df[(df['record_type'] == 'observation') & df['value_numeric'].notna()].copy()
+    obs['year'] = observation_year(obs)
+    obs = obs.dropna(subset=['year'])
+    obs[keys] = obs[keys].astype(object).fillna('all')
+
+    is_findex = obs['source_name'].str.contains('Global Findex', na=False)
+    has_findex = is_findex.groupby([obs[k] for k in keys]).transform('any')
+    obs = obs[is_findex | ~has_findex]
+
+    pts = (obs.groupby(keys + ['year'], as_index=False)
+              .agg(value=('value_numeric', 'max'), unit=('unit', 'first')))
+    n_obs = pts.groupby(keys)['year'].transform('size')
+    pts = pts[n_obs >= min_obs].sort_values(keys + ['year'])
+
+    series_id = pts.groupby(keys, sort=False).ngroup().to_numpy()
+    pos = pts.groupby(keys, sort=False).cumcount().to_numpy()
+    series = pts.drop_duplicates(keys)[keys + ['unit']].reset_index(drop=True)
+    n_series = len(series)
+    max_len = int(pos.max()) + 1 if len(pos) else 0
+
+    years = np.zeros((n_series, max_len))
+    values = np.zeros((n_series, max_len))
+    mask = np.zeros((n_series, max_len), dtype=bool)
+    years[series_id, pos] = pts['year'].to_numpy(dtype=float)
+    values[series_id, pos] = pts['value'].to_numpy(dtype=float)
+    mask[series_id, pos] = True
+
+    series['n_obs'] = mask.sum(axis=1)
+    series['last_year'] = np.where(mask, years, -np.inf).max(axis=1)
+    return {'series': series, 'years': years, 'values': values, 'mask': mask}
+
+
+def fit_linear_batch(years, y, mask):
+    # masked normal equations for all series at once; pinv matches the
+    # minimum-norm solution lstsq gives in `fit_linear`
+    w = mask.astype(float)
+    X = np.stack([w, years * w], axis=-1)
+    yw = np.where(mask, y, 0.0)
+    XtX_inv = np.linalg.pinv(np.einsum('stj,stk->sjk', X, X))
+    beta = np.einsum('sjk,sk->sj', XtX_inv, np.einsum('stj,st->sj', X, yw))
+    resid = np.where(mask, y - beta[:, :1] - beta[:, 1:] * years, 0.0)
+    n = mask.sum(axis=1)
+    s2 = (resid ** 2).sum(axis=1) / np.maximum(1, n - X.shape[-1])
+    return {'beta': beta, 's2': s2, 'XtX_inv': XtX_inv, 'n': n}
+
+
+def fit_logit_linear_batch(years, y_pct, mask):
+    z = safe_logit(np.clip(y_pct / 100.0, 1e-6, 1 - 1e-6))
+    return fit_linear_batch(years, z, mask)
+
+
+def series_targets(df, series):
+    # latest target value of each panel series (NaN where it has none)
+    tgt = df[(df['record_type'] == 'target') & df['value_numeric'].notna()].copy()
+    tgt[SERIES_KEYS] = tgt[SERIES_KEYS].astype(object).fillna('all')
+    tgt['year'] = observation_year(tgt)
+    latest = tgt.sort_values('year').groupby(SERIES_KEYS, as_index=False)['value_numeric'].last()
+    keys = series[SERIES_KEYS].astype(object)
+    return keys.merge(latest, on=SERIES_KEYS, how='left')['value_numeric'].to_numpy(dtype=float)
+
+
+def forecast_all_series(df, years_fore, min_obs=2):
+    """Fit every series in a few vectorized passes and return a long-format
+    forecast table: linear and logit-linear trends in one least-squares solve,
+    and logistic / Gompertz curves (percentage series with enough points,
+    ceiling bounded below by the series' target) in one batched
+    Levenberg-Marquardt solve per curve."""
+    panel = build_series_panel(df, min_obs=min_obs)
+    series = panel['series']
+    years, values, mask = panel['years'], panel['values'], panel['mask']
+    n_series = len(series)
+
+    # the logit model only makes sense for bounded percentage series
+    bounded = (series['unit'] == '%').to_numpy()
+
+    # stack linear and logit targets so both families share one solve
+    z = safe_logit(np.clip(values / 100.0, 1e-6, 1 - 1e-6))
+    fits = fit_linear_batch(np.concatenate([years, years]),
+                            np.concatenate([values, z]),
+                            np.concatenate([mask, mask]))
+    pred, se = predict_linear(fits, years_fore)
+
+    lin_pred, lin_se = pred[:n_series], se[:n_series]
+    p = safe_inv_logit(pred[n_series:])
+    logit_pred, logit_se = p * 100.0, se[n_series:] * p * (1 - p) * 100.0
+
+    results = [('linear', np.arange(n_series), lin_pred, lin_se),
+               ('logit_linear', np.flatnonzero(bounded), logit_pred[bounded], logit_se[bounded])]
+
+    growth = np.flatnonzero(bounded & (series['n_obs'].to_numpy() >= growth_models.MIN_POINTS))
+    if len(growth):
+        targets = series_targets(df, series)[growth]
+        for curve in growth_models.CURVES:
+            fit = growth_models.fit_growth_batch(years[growth], values[growth], mask[growth],
+                                                 curve=curve, target=targets)
+            y_hat, y_se = growth_models.predict_growth_batch(fit, years_fore)
+            ok = fit['converged']
+            results.append((curve, growth[ok], y_hat[ok], y_se[ok]))
+
+    frames = []
+    for model, idx, y_hat, y_se in results:
+        out = series.iloc[np.repeat(idx, len(years_fore))].reset_index(drop=True)
+        out.insert(len(SERIES_KEYS), 'model', model)
+        out['year'] = np.tile(np.asarray(years_fore), len(idx))
+        out['forecast'] = y_hat.ravel()
+        out['se'] = y_se.ravel()
+        out['ci95_low'] = out['forecast'] - 1.96 * out['se']
+        out['ci95_high'] = out['forecast'] + 1.96 * out['se']
+        frames.append(out)
+    return pd.concat(frames, ignore_index=True)
+
+
+# --- Hierarchical forecasts: gender x location x region groups reconciled to their totals ---
+
+HIERARCHY_KEYS = SERIES_KEYS + ['region']
+
+
+def hierarchy_base_forecasts(panel, years_fore):
+    # independent base forecast of every panel series: logit-linear for
+    # percentages, linear otherwise, last value (variance unknown) for
+    # single observations
+    series = panel['series']
+    years, values, mask = panel['years'], panel['values'], panel['mask']
+    bounded = (series['unit'] == '%').to_numpy()
+    z = np.where(bounded[:, None], safe_logit(np.clip(values / 100.0, 1e-6, 1 - 1e-6)), values)
+    pred, se = predict_linear(fit_linear_batch(years, z, mask), years_fore)
+    p = safe_inv_logit(pred)
+    pred = np.where(bounded[:, None], p * 100.0, pred)
+    se = np.where(bounded[:, None], se * p * (1 - p) * 100.0, se)
+
+    single = series['n_obs'].to_numpy() < 2
+    last = np.where(mask, values, np.nan)[np.arange(len(series)), mask.sum(axis=1) - 1]
+    pred[single] = last[single, None]
+    se[single] = np.nan
+    return pred, se
+
+
+def forecast_hierarchy(df, years_fore, shares=None):
+    """Coherent forecasts of every indicator's gender / location / region groups.
+
+    Each observed series gets an independent base forecast; `src/hierarchy.py`
+    then builds one grouped hierarchy per indicator and reconciles all of them
+    in a single sparse solve per year (bottom-up, OLS and MinT). Returns a
+    long-format table with one row per node and year.
+    """
+    panel = build_series_panel(df, min_obs=1, keys=HIERARCHY_KEYS)
+    base, se = hierarchy_base_forecasts(panel, years_fore)
+    h = hierarchy.build_hierarchy(panel['series'], shares=shares)
+    nodes = h['nodes']
+
+    has_data = nodes['series_idx'].to_numpy() >= 0
+    node_base = np.full((len(nodes), len(years_fore)), np.nan)
+    node_var = np.full_like(node_base, np.nan)
+    node_base[has_data] = base[nodes.loc[has_data, 'series_idx']]
+    node_var[has_data] = se[nodes.loc[has_data, 'series_idx']] ** 2
+    n_obs = np.zeros(len(nodes), dtype=int)
+    n_obs[has_data] = panel['series']['n_obs'].to_numpy()[nodes.loc[has_data, 'series_idx']]
+
+    out = nodes.drop(columns='series_idx').iloc[np.repeat(np.arange(len(nodes)), len(years_fore))]
+    out = out.reset_index(drop=True)
+    out['n_obs'] = np.repeat(n_obs, len(years_fore))
+    out['year'] = np.tile(np.asarray(years_fore), len(nodes))
+    out['base'] = node_base.ravel()
+    out['base_se'] = np.sqrt(node_var).ravel()
+    for method in hierarchy.METHODS:
+        out[method] = hierarchy.reconcile(h, node_base, node_var, method=method).ravel()
+    return out
+
+
+def baseline_forecast(series, years, vals, years_fore, model='auto', selection=None):
+    # forecast of the model chosen for a series: the backtest winner for 'auto'
+    name = (selection or {}).get(series, DEFAULT_MODEL) if model == 'auto' else model
+    try:
+        y_pred, se = fit_predict(name, years, vals, years_fore)
+    except (ValueError, RuntimeError) as e:
+        print('{}: {} not usable ({}); using {}'.format(series, name, e, DEFAULT_MODEL))
+        name = DEFAULT_MODEL
+        y_pred, se = fit_predict(name, years, vals, years_fore)
+    return name, y_pred, se
+
+
+def candidate_forecasts(series, years, vals, years_fore, chosen):
+    # every candidate model's forecast for a series (for the dashboard model picker)
+    rows = []
+    for name in CANDIDATE_MODELS:
+        try:
+            y_pred, se = fit_predict(name, years, vals, years_fore)
+        except (ValueError, RuntimeError):
+            continue
+        for y, f, e in zip(years_fore, y_pred, se):
+            rows.append({'series': series, 'model': name, 'selected': name == chosen, 'year': int(y),
+                         'forecast': float(f), 'se': float(e),
+                         'ci95_low': float(f - 1.96 * e), 'ci95_high': float(f + 1.96 * e)})
+    return rows
+
+
+# observations an indicator needs before its event effects are estimated rather than taken from the priors
+MIN_EVENT_OBS = 3
+
+
+def event_forecast(fit, series, years_fore, baseline):
+    # trend + event effects of the event regression at year end, None if the series is not in the fit.
+    # With fewer than MIN_EVENT_OBS observations the joint fit interpolates the points
+    # exactly (zero residual variance), so the baseline plus the prior effects still
+    # to come after the last observation is used instead
+    code = HEADLINE_CODES[series]
+    dates = ['{}-12-31'.format(int(y)) for y in years_fore]
+    try:
+        if fit['n_obs'][list(fit['indicators']).index(code)] < MIN_EVENT_OBS:
+            return np.asarray(baseline, dtype=float) + event_regression.prior_lift(fit, code, dates)
+        pred = event_regression.predict_event_regression(fit, code, dates)
+    except (KeyError, ValueError):
+        return None
+    return pred['forecast'].to_numpy()
+
+
+def main(use_cache=True, all_series=False, store=True, model='auto', hierarchical=False, use_fit_cache=True):
+    df, links = load_data(use_cache=use_cache)
+    cache = open_fit_cache(use_fit_cache)
+
+    selection = load_model_selection() if model == 'auto' else {}
+    # trends and event effects fitted jointly, shrunk toward the impact_links priors
+    events_fit = event_regression.fit_events(df, links)
 
-    # Fit models
-    lin_acc = fit_linear(years_acc, vals_acc)
-    logit_acc = fit_logit_linear(years_acc, vals_acc)
+    # --- Account Ownership (Access) ---
+    years_acc, vals_acc = headline_history(df, 'Account Ownership Rate')
 
     years_fore = np.array([2025, 2026, 2027])
 
-    y_lin_pred, se_lin = predict_linear(lin_acc, years_fore)
-    y_logit_pred, se_logit = predict_logit_linear(logit_acc, years_fore)
+    # Baseline: backtest winner (reports/model_selection.csv), else logit (bounded)
+    model_acc, baseline_acc, baseline_se_acc = baseline_forecast(
+        'Account Ownership Rate', years_acc, vals_acc, years_fore, model, selection)
 
-    # Choose baseline = logit (bounded) for Access
-    baseline_acc = y_logit_pred
-    baseline_se_acc = se_logit
-
-    # Event-augmented: use NFIS-II target if present in dataset as an upper-bound path
-    nfis = df[(df['indicator'] == 'Account Ownership Rate') & (df['source_name'].str.contains('NFIS', na=False))]
-    event_acc = None
-    if not nfis.empty:
+    # Event-augmented: event regression path; the NFIS-II target path is reported alongside
+    event_acc = event_forecast(events_fit, 'Account Ownership Rate', years_fore, baseline_acc)
+    target = nfis_target(df, 'Account Ownership Rate')
+    target_acc = None
+    if target is not None:
         # take numeric target if exists (e.g., 70 in 2025), interpolate from last observed 2024
-        target_row = nfis.sort_values('fiscal_year').iloc[-1]
-        target_year = int(target_row['fiscal_year'])
-        target_val = float(target_row['value_numeric'])
+        target_year, target_val = target
         last_year = max(years_acc)
         last_val = float(vals_acc[years_acc.argmax()])
-        # linear interpolation from last_year->target_year, and extend to 2027
-        interp_years = np.concatenate(([last_year], years_fore, [target_year]))
-        # create simple linear path from last_val to target
-        def event_path(y):
-            if y <= last_year:
-                return last_val
-            elif y >= target_year:
-                return target_val
-            else:
-                frac = (y - last_year) / (target_year - last_year)
-                return last_val + frac * (target_val - last_val)
-
-        event_acc = np.array([event_path(y) for y in years_fore])
+        # linear path from last_val to target, held flat after the target year
+        target_acc = target_path(years_fore, last_year, last_val, target_year, target_val)
 
     # Scenario bands (optimistic/base/pessimistic) around baseline using baseline_se_acc
     opt_acc = baseline_acc + 1.5 * baseline_se_acc
@@ -137,25 +535,12 @@ def main():
     pess_acc = baseline_acc - 1.5 * baseline_se_acc
 
     # --- Digital Payment Usage ---
-    # Proxy: Mobile Money Account Rate (Global Findex) and fallback to Mobile Money Activity Rate
-    years_mm, vals_mm = select_findex(df, 'Mobile Money Account Rate')
-    if len(years_mm) == 0:
-        years_mm, vals_mm = select_findex(df, 'Mobile Money Activity Rate')
-
-    # Fit same models for digital proxy
-    lin_mm = fit_linear(years_mm, vals_mm)
-    logit_mm = fit_logit_linear(years_mm, vals_mm)
-    y_lin_mm, se_lin_mm = predict_linear(lin_mm, years_fore)
-    y_logit_mm, se_logit_mm = predict_logit_linear(logit_mm, years_fore)
-    baseline_mm = y_logit_mm
-    baseline_se_mm = se_logit_mm
-
-    # Event-augmented for digital payments: if Fayda Digital ID or Payment system launch exists, create modest lift
-    ev = df[df['indicator'].str.contains('Fayda|Instant Payment System|QR Code', na=False)]
-    event_mm = None
-    if not ev.empty:
-        # modest +5 percentage points in 2025, +3 in 2026, +2 in 2027
-        event_mm = baseline_mm + np.array([5.0, 3.0, 2.0])
+    years_mm, vals_mm = headline_history(df, 'Digital Payment Usage (proxy)')
+
+    model_mm, baseline_mm, baseline_se_mm = baseline_forecast(
+        'Digital Payment Usage (proxy)', years_mm, vals_mm, years_fore, model, selection)
+
+    event_mm = event_forecast(events_fit, 'Digital Payment Usage (proxy)', years_fore, baseline_mm)
 
     opt_mm = baseline_mm + 1.5 * baseline_se_mm
     base_mm = baseline_mm
@@ -164,16 +549,18 @@ def main():
     # collate results
     rows = []
     for i, y in enumerate(years_fore):
-        rows.append({'series': 'Account Ownership Rate', 'year': int(y), 'baseline': float(base_acc[i]),
+        rows.append({'series': 'Account Ownership Rate', 'model': model_acc, 'year': int(y), 'baseline': float(base_acc[i]),
                      'ci95_low': float(base_acc[i] - 1.96 * baseline_se_acc[i]),
                      'ci95_high': float(base_acc[i] + 1.96 * baseline_se_acc[i]),
                      'optimistic': float(opt_acc[i]), 'pessimistic': float(pess_acc[i]),
-                     'event_augmented': float(event_acc[i]) if event_acc is not None else None})
-        rows.append({'series': 'Digital Payment Usage (proxy)', 'year': int(y), 'baseline': float(base_mm[i]),
+                     'event_augmented': float(event_acc[i]) if event_acc is not None else None,
+                     'nfis_target_path': float(target_acc[i]) if target_acc is not None else None})
+        rows.append({'series': 'Digital Payment Usage (proxy)', 'model': model_mm, 'year': int(y), 'baseline': float(base_mm[i]),
                      'ci95_low': float(base_mm[i] - 1.96 * baseline_se_mm[i]),
                      'ci95_high': float(base_mm[i] + 1.96 * baseline_se_mm[i]),
                      'optimistic': float(opt_mm[i]), 'pessimistic': float(pess_mm[i]),
-                     'event_augmented': float(event_mm[i]) if event_mm is not None else None})
+                     'event_augmented': float(event_mm[i]) if event_mm is not None else None,
+                     'nfis_target_path': None})
 
     out = pd.DataFrame(rows)
     outdir = Path('reports')
@@ -185,10 +572,66 @@ def main():
     print('\nKey choices:')
     print('- Access series: `Account Ownership Rate` (Global Findex historical points used: {})'.format(list(years_acc)))
     print('- Digital series: proxy used = `Mobile Money Account Rate` (Findex)')
-    print('\nBaseline model: logit-transformed linear trend (bounded 0-100).')
-    print('Event-augmented paths: NFIS-II target used for Access when available; payment system / digital ID events used for digital proxy.')
+    print('\nBaseline model: Access = {}, Digital = {} ({}).'.format(
+        model_acc, model_mm, 'backtest winners' if selection else 'logit-transformed linear trend, bounded 0-100'))
+    print('Event-augmented paths: trend and impact_links event effects fitted jointly, shrunk toward the impact_estimate priors '
+          '(baseline plus the prior effects still to come for series with fewer than {} observations); '
+          'NFIS-II target path for Access in nfis_target_path.'.format(MIN_EVENT_OBS))
+    artifacts = {'forecasts': out,
+                 'model_forecasts': pd.DataFrame(
+                     candidate_forecasts('Account Ownership Rate', years_acc, vals_acc, years_fore, model_acc)
+                     + candidate_forecasts('Digital Payment Usage (proxy)', years_mm, vals_mm, years_fore, model_mm)),
+                 'event_effects': events_fit['coefficients'],
+                 # every observation on one monthly grid, for use as covariates
+                 'monthly_panel': mixed_frequency.MonthlyPanel.from_data(df).to_frame()}
+    # backtest results behind the selection (written by task4_backtest.py)
+    for name in ('model_selection', 'model_scores'):
+        if Path('reports/{}.csv'.format(name)).exists():
+            artifacts[name] = pd.read_csv('reports/{}.csv'.format(name))
+    if all_series:
+        table = forecast_all_series(df, years_fore)
+        table.to_csv(outdir / 'forecasts_all_series.csv', index=False)
+        n = table.groupby(SERIES_KEYS).ngroups
+        print('\nAll-series forecasts ({} series, linear, logit-linear and growth curves) written to reports/forecasts_all_series.csv'.format(n))
+        artifacts['all_series'] = table
+    if hierarchical:
+        table = forecast_hierarchy(df, years_fore)
+        table.to_csv(outdir / 'forecasts_hierarchical.csv', index=False)
+        print('\nHierarchical forecasts ({} indicators, {} nodes; base, bottom_up, ols and mint) written to reports/forecasts_hierarchical.csv'.format(
+            table['indicator_code'].nunique(), len(table) // len(years_fore)))
+        artifacts['hierarchical'] = table
+
+    if store and parquet_available():
+        run_id = artifact_store.write_run(
+            artifacts, model_version=MODEL_VERSION, script='task4_forecast.py',
+            params={'all_series': all_series, 'hierarchical': hierarchical, 'model': model, 'years': [int(y) for y in years_fore],
+                    'data_sha256': data_fingerprint(df, links)},
+            series_cols={'all_series': 'indicator_code', 'hierarchical': 'indicator_code',
+                         'monthly_panel': 'indicator_code'})
+        print('\nRun {} recorded in reports/artifacts (model {})'.format(run_id, MODEL_VERSION))
+
+    if cache is not None:
+        print('\nModel fits: {} reused from {}, {} fitted'.format(cache.hits, cache.path, cache.misses))
+
     print('\nLimitations: sparse historical points (4 Findex obs), heterogeneous sources, and proxy usage for digital payments. Treat numeric forecasts as indicative ranges, not precise predictions.')
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Task 4 forecasts (2025-2027)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='re-read the Excel workbook instead of the Parquet cache')
+    parser.add_argument('--all-series', action='store_true',
+                        help='also forecast every indicator/gender/location series to reports/forecasts_all_series.csv')
+    parser.add_argument('--hierarchical', action='store_true',
+                        help='also forecast every gender/location/region group and reconcile them with their '
+                             'totals to reports/forecasts_hierarchical.csv')
+    parser.add_argument('--model', default='auto', choices=['auto'] + list(CANDIDATE_MODELS),
+                        help='baseline model; auto uses the winners in reports/model_selection.csv '
+                             '(see task4_backtest.py) and falls back to {}'.format(DEFAULT_MODEL))
+    parser.add_argument('--no-fit-cache', action='store_true',
+                        help='refit every model instead of reusing models/{}'.format(fit_cache.CACHE_NAME))
+    parser.add_argument('--no-store', action='store_true',
+                        help='do not record the run in the artifact store (reports/artifacts)')
+    args = parser.parse_args()
+    main(use_cache=not args.no_cache, all_series=args.all_series, store=not args.no_store, model=args.model,
+         hierarchical=args.hierarchical, use_fit_cache=not args.no_fit_cache)
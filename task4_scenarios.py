@@ -0,0 +1,269 @@
+"""Task 4 scenario sweeps over a configurable grid.
+
+`task4_forecast.py` reports one optimistic/base/pessimistic band (+/-1.5 SE) and one
+event-regression path. This script sweeps many settings at once:
+
+- `series`: indicator names (as used by `select_findex`)
+- `model`: `logit_linear` and/or `linear`
+- `band`: SE multipliers for the optimistic/pessimistic bands
+- `event_lift`: lift vectors (pp) added to the baseline, one value per forecast year
+- `target_year` / `target_value`: NFIS-style target paths (defaults to the NFIS
+  target found in the data for the series)
+- `years`: forecast horizon (shared by every scenario, not swept)
+
+The grid is the cartesian product of the swept lists, read from a YAML or JSON file:
+
+    series: [Account Ownership Rate, Mobile Money Account Rate]
+    model: [logit_linear, linear]
+    band: [1.0, 1.5, 2.0]
+    event_lift: [[5, 3, 2], [0, 0, 0]]
+    target_year: [2025, 2027, 2030]
+
+Each (series, model) pair is fitted once and its forecast reused by every scenario.
+The fits and then the scenario chunks run on a process pool; grids of up to
+INLINE_MAX_SCENARIOS scenarios run inline unless `--workers` asks for a pool,
+since starting one costs more than they do. Each finished chunk is written as a
+row group to `reports/scenarios/part-<run id>.parquet`, so memory stays flat
+however large the grid is. Read all runs back with
+`pd.read_parquet('reports/scenarios')`.
+"""
+
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import yaml
+
+from task4_forecast import (fit_model, load_data, nfis_target, open_fit_cache, predict_linear,
+                            predict_logit_linear, select_findex, target_path)
+
+DEFAULT_GRID = {
+    'series': ['Account Ownership Rate', 'Mobile Money Account Rate'],
+    'model': ['logit_linear', 'linear'],
+    'band': [1.0, 1.5, 2.0],
+    'event_lift': [[5.0, 3.0, 2.0], [0.0, 0.0, 0.0]],
+    'target_year': [None],
+    'target_value': [None],
+    'years': [2025, 2026, 2027],
+}
+
+# grids up to this many scenarios run inline by default
+INLINE_MAX_SCENARIOS = 10_000
+
+# order of the swept dimensions; scenario ids follow itertools.product order
+SWEPT_KEYS = ['series', 'model', 'band', 'event_lift', 'target_year', 'target_value']
+
+# model -> predict(fit, years); fits go through task4_forecast.fit_model (and its fit cache)
+MODELS = {
+    'linear': predict_linear,
+    'logit_linear': predict_logit_linear,
+}
+
+
+def load_grid(path):
+    """Read a scenario grid from YAML or JSON, filling unset keys from DEFAULT_GRID."""
+    path = Path(path)
+    with open(path) as fh:
+        if path.suffix.lower() in ('.yaml', '.yml'):
+            grid = yaml.safe_load(fh) or {}
+        else:
+            grid = json.load(fh)
+    unknown = set(grid) - set(DEFAULT_GRID)
+    if unknown:
+        raise ValueError(f"Unknown scenario grid keys: {sorted(unknown)}")
+    merged = dict(DEFAULT_GRID)
+    merged.update(grid)
+    for key in SWEPT_KEYS:
+        if not isinstance(merged[key], list):
+            merged[key] = [merged[key]]
+    unknown_models = set(merged['model']) - set(MODELS)
+    if unknown_models:
+        raise ValueError(f"Unknown models in grid: {sorted(unknown_models)}")
+    return merged
+
+
+def grid_size(grid):
+    return int(np.prod([len(grid[key]) for key in SWEPT_KEYS]))
+
+
+def iter_chunks(grid, chunk_size):
+    # lazily expand the cartesian product into (first scenario id, scenarios) chunks
+    product = itertools.product(*(grid[key] for key in SWEPT_KEYS))
+    start = 0
+    while True:
+        chunk = list(itertools.islice(product, chunk_size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def _fit_forecast(model, years, vals, years_fore):
+    # one (series, model) fit and its forecast; runs in a pool worker
+    return MODELS[model](fit_model(model, years, vals), years_fore)
+
+
+def fit_grid_models(df, grid, history_max_year=2024, pool=None):
+    """Fit each (series, model) pair of the grid once and forecast the horizon.
+
+    The series are selected here; the fits run on `pool` when one is given.
+
+    Returns a dict keyed by (series, model) holding the baseline forecast, its SE,
+    the last observation and the NFIS target (if any) for the series.
+    """
+    years_fore = np.asarray(grid['years'], dtype=float)
+    fitted, forecasts = {}, {}
+    for series in grid['series']:
+        years, vals = select_findex(df, series)
+        keep = years <= history_max_year
+        years, vals = years[keep], vals[keep]
+        if len(years) < 2:
+            raise ValueError(f"Series {series!r} has fewer than two historical points")
+        target = nfis_target(df, series)
+        for model in grid['model']:
+            args = (model, years, vals, years_fore)
+            forecasts[(series, model)] = pool.submit(_fit_forecast, *args) if pool else _fit_forecast(*args)
+            fitted[(series, model)] = {
+                'last_year': float(years.max()),
+                'last_val': float(vals[years.argmax()]),
+                'nfis_year': np.nan if target is None else target[0],
+                'nfis_val': np.nan if target is None else target[1],
+            }
+    for key, forecast in forecasts.items():
+        fitted[key]['baseline'], fitted[key]['se'] = forecast.result() if pool else forecast
+    return fitted
+
+
+def _lift_matrix(lifts, horizon):
+    # pad/truncate each lift vector to the horizon (missing years get no lift)
+    out = np.zeros((len(lifts), horizon))
+    for i, lift in enumerate(lifts):
+        lift = np.atleast_1d(np.asarray(lift if lift is not None else [], dtype=float))[:horizon]
+        out[i, :len(lift)] = lift
+    return out
+
+
+def evaluate_chunk(start, scenarios, fitted, years_fore):
+    """Evaluate a chunk of scenarios against pre-fitted models.
+
+    Scenarios sharing a (series, model) pair are evaluated together, so the work
+    per chunk is a handful of (n_scenarios, horizon) array operations.
+    """
+    horizon = len(years_fore)
+
+    sc = pd.DataFrame(scenarios, columns=SWEPT_KEYS)
+    sc['scenario_id'] = np.arange(start, start + len(sc))
+
+    frames = []
+    for (series, model), group in sc.groupby(['series', 'model'], sort=False):
+        fit = fitted[(series, model)]
+        n = len(group)
+        band = group['band'].to_numpy(dtype=float)[:, None]
+        lift = _lift_matrix(group['event_lift'].tolist(), horizon)
+        t_year = pd.to_numeric(group['target_year']).fillna(fit['nfis_year']).to_numpy(dtype=float)[:, None]
+        t_val = pd.to_numeric(group['target_value']).fillna(fit['nfis_val']).to_numpy(dtype=float)[:, None]
+
+        baseline = np.broadcast_to(fit['baseline'], (n, horizon))
+        se = np.broadcast_to(fit['se'], (n, horizon))
+        path = target_path(years_fore, fit['last_year'], fit['last_val'], t_year, t_val)
+
+        frames.append(pd.DataFrame({
+            'scenario_id': np.repeat(group['scenario_id'].to_numpy(), horizon),
+            'series': series,
+            'model': model,
+            'band': np.repeat(band[:, 0], horizon),
+            'event_lift': np.repeat(['/'.join(f'{v:g}' for v in row) for row in lift], horizon),
+            'target_year': np.repeat(t_year[:, 0], horizon),
+            'target_value': np.repeat(t_val[:, 0], horizon),
+            'year': np.tile(years_fore, n),
+            'baseline': baseline.ravel(),
+            'se': se.ravel(),
+            'optimistic': (baseline + band * se).ravel(),
+            'pessimistic': (baseline - band * se).ravel(),
+            'event_augmented': (baseline + lift).ravel(),
+            'target_path': path.ravel(),
+        }))
+    return pd.concat(frames, ignore_index=True).sort_values(['scenario_id', 'year'], kind='stable')
+
+
+def run_grid(df, grid, out_dir='reports/scenarios', workers=None, chunk_size=1000, run_id=None):
+    """Run every scenario in the grid and stream the results to Parquet.
+
+    Returns the path of the Parquet file written for this run.
+    """
+    run_id = run_id or datetime.now().strftime('%Y%m%dT%H%M%S')
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / f'part-{run_id}.parquet'
+
+    years_fore = np.asarray(grid['years'], dtype=np.int64)
+    chunks = iter_chunks(grid, chunk_size)
+    if workers is None:
+        workers = 1 if grid_size(grid) <= INLINE_MAX_SCENARIOS else (os.cpu_count() or 1)
+
+    writer = None
+    try:
+        def write(frame):
+            nonlocal writer
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(out_path, table.schema)
+            writer.write_table(table)
+
+        if workers <= 1:
+            fitted = fit_grid_models(df, grid)
+            for start, scenarios in chunks:
+                write(evaluate_chunk(start, scenarios, fitted, years_fore))
+        else:
+            # keep a bounded number of chunks in flight so memory stays flat
+            max_pending = 2 * workers
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                fitted = fit_grid_models(df, grid, pool=pool)
+                pending = set()
+                for start, scenarios in chunks:
+                    pending.add(pool.submit(evaluate_chunk, start, scenarios, fitted, years_fore))
+                    if len(pending) >= max_pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            write(future.result())
+                for future in pending:
+                    write(future.result())
+    finally:
+        if writer is not None:
+            writer.close()
+    return out_path
+
+
+def main(grid_path=None, out_dir='reports/scenarios', workers=None, chunk_size=1000, use_cache=True,
+         use_fit_cache=True):
+    df, _ = load_data(use_cache=use_cache)
+    open_fit_cache(use_fit_cache)
+
+    grid = load_grid(grid_path) if grid_path else dict(DEFAULT_GRID)
+    out_path = run_grid(df, grid, out_dir=out_dir, workers=workers, chunk_size=chunk_size)
+    print(f'{grid_size(grid)} scenarios x {len(grid["years"])} years written to {out_path}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sweep Task 4 forecast scenarios over a grid')
+    parser.add_argument('grid', nargs='?', help='YAML or JSON scenario grid (default: built-in grid)')
+    parser.add_argument('--out', default='reports/scenarios', help='output directory for Parquet parts')
+    parser.add_argument('--workers', type=int, default=None,
+                        help=f'worker processes (1 = run inline; default: inline up to {INLINE_MAX_SCENARIOS} '
+                             'scenarios, else one per CPU)')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='scenarios per chunk')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='re-read the Excel workbook instead of the Parquet cache')
+    parser.add_argument('--no-fit-cache', action='store_true',
+                        help='refit every (series, model) pair instead of reusing models/fit_cache.sqlite')
+    args = parser.parse_args()
+    main(args.grid, out_dir=args.out, workers=args.workers, chunk_size=args.chunk_size,
+         use_cache=not args.no_cache, use_fit_cache=not args.no_fit_cache)
@@ -0,0 +1,269 @@
+"""Task 4 Monte Carlo forecast simulation.
+
+The `ci95_low` / `ci95_high` columns of `reports/forecasts_task4.csv` come from a
+normal approximation (and, for the logit model, a delta-method SE). With only four
+Findex points that is a poor guide to the forecast distribution. This script instead
+simulates forecast paths:
+
+- trend coefficients are drawn from the OLS posterior under a flat prior:
+  sigma^2 ~ (n - 2) s2 / chi2(n - 2), beta | sigma^2 ~ N(beta_hat, sigma^2 (X'X)^-1),
+  plus observation noise, so the draws are from the posterior predictive;
+- event impacts are drawn from triangular distributions spanning the
+  `impact_magnitude` range of each impact link (with `impact_estimate` as the mode),
+  for links whose effect starts (event date + `lag_months`) after the last
+  observation, so effects already in the history are not double counted. Each
+  impact phases in with the response curve of its event category
+  (`event_effects.CATEGORY_EFFECT_TYPES`), evaluated at the end of each year.
+
+Paths are clipped to 0-100%. A trend fitted to fewer than MIN_POINTS points has no
+residual variance, so its quantiles are reported as NaN rather than as a
+zero-width interval.
+
+Every path in a chunk of draws is evaluated in one set of array operations. Chunks
+are folded into fixed-size per-year histograms, so 1e5+ draws per series run in a
+fixed memory budget and any quantile can be read off at the end.
+
+Writes `reports/forecasts_task4_simulated.csv`.
+"""
+
+import argparse
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from task4_forecast import (fit_linear, fit_logit_linear, predict_linear, safe_inv_logit,
+                            select_findex)
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from data_loader import load_enriched_data
+from event_effects import (CATEGORY_EFFECT_TYPES, DAYS_PER_MONTH, EFFECT_TYPES, RAMP_MONTHS,
+                           response_shape)
+
+# Percentage-point ranges behind the impact_magnitude codes in reference_codes.xlsx
+# ('high' is open-ended there; 30pp caps it)
+IMPACT_MAGNITUDE_RANGES = {
+    'negligible': (0.0, 1.0),
+    'low': (1.0, 5.0),
+    'medium': (5.0, 15.0),
+    'high': (15.0, 30.0),
+}
+
+DEFAULT_QUANTILES = (0.025, 0.05, 0.25, 0.5, 0.75, 0.95, 0.975)
+# a trend fitted to fewer points has no residual degrees of freedom (s2 = 0),
+# so its posterior would be a point mass
+MIN_POINTS = 3
+
+
+def decimal_year(dates):
+    dates = pd.to_datetime(pd.Series(dates), errors='coerce')
+    return (dates.dt.year + (dates.dt.dayofyear - 1) / 365.25).to_numpy(dtype=float)
+
+
+def event_impact_ranges(events, impact_links, indicator_code, after_year, default_effect_type='gradual'):
+    """Triangular impact ranges for the links on an indicator that start after `after_year`.
+
+    Returns a DataFrame with signed `low`, `mode` and `high` impacts (pp), the
+    decimal `event_year` and `onset_year` (event date + lag), `lag_months` and the
+    `ramp_months` of each link's response curve (from its event category;
+    `default_effect_type` for other categories).
+    """
+    links = impact_links[(impact_links['related_indicator'] == indicator_code)
+                         & impact_links['impact_estimate'].notna()]
+    # record_ids are not guaranteed unique in older enriched files; keep the first
+    events = events.drop_duplicates('record_id')
+    links = links.merge(events[['record_id', 'observation_date', 'category']].rename(
+        columns={'record_id': 'parent_id', 'observation_date': 'event_date', 'category': 'event_category'}),
+        on='parent_id', how='inner')
+    event_date = pd.to_datetime(links['event_date'], errors='coerce')
+    lag = links['lag_months'].fillna(0).to_numpy(dtype=float)
+    onset = event_date + pd.to_timedelta(lag * DAYS_PER_MONTH, unit='D')
+    effect_type = links['event_category'].astype(object).map(CATEGORY_EFFECT_TYPES).fillna(default_effect_type)
+    links = links.assign(event_year=decimal_year(event_date), onset_year=decimal_year(onset), lag_months=lag,
+                         ramp_months=RAMP_MONTHS[[EFFECT_TYPES.index(t) for t in effect_type]])
+    links = links[links['onset_year'] > after_year]
+
+    mode = links['impact_estimate'].to_numpy(dtype=float)
+    bounds = np.array([IMPACT_MAGNITUDE_RANGES.get(m, (abs(v), abs(v)))
+                       for m, v in zip(links['impact_magnitude'], mode)]).reshape(-1, 2)
+    low = np.minimum(bounds[:, 0], np.abs(mode))
+    high = np.maximum(bounds[:, 1], np.abs(mode))
+    # numpy's triangular sampler needs low < high
+    high = np.maximum(high, low + 1e-9)
+    sign = np.where(mode < 0, -1.0, 1.0)
+    return pd.DataFrame({
+        'record_id': links['record_id'].to_numpy(),
+        'low': np.minimum(sign * low, sign * high),
+        'mode': mode,
+        'high': np.maximum(sign * low, sign * high),
+        'event_year': links['event_year'].to_numpy(),
+        'onset_year': links['onset_year'].to_numpy(),
+        'lag_months': links['lag_months'].to_numpy(),
+        'ramp_months': links['ramp_months'].to_numpy(dtype=float),
+    })
+
+
+def _cov_factor(cov):
+    # symmetric square root; (X'X)^-1 from pinv can be singular, so no Cholesky
+    w, v = np.linalg.eigh(cov)
+    return v * np.sqrt(np.clip(w, 0.0, None))
+
+
+def _chunk_size(horizon, n_impacts, memory_budget_mb):
+    # rough per-draw footprint of the arrays alive while a chunk is evaluated
+    per_draw = 8 * (8 * horizon + 2 * n_impacts + 8)
+    return max(1, int(memory_budget_mb * 2 ** 20 // per_draw))
+
+
+def simulate_forecast(model, years_pred, n_draws=100_000, logit=False, impacts=None,
+                      quantiles=DEFAULT_QUANTILES, memory_budget_mb=64, n_bins=20_000, seed=None,
+                      bounds=(0.0, 100.0)):
+    """Simulate forecast paths for one fitted trend and summarise them.
+
+    Args:
+        model: fit from `fit_linear` / `fit_logit_linear`
+        years_pred: forecast years (may be fractional)
+        n_draws: number of simulated paths
+        logit: True if `model` is a logit-linear fit (paths are returned in %)
+        impacts: DataFrame from `event_impact_ranges`, or None
+        quantiles: quantiles to report
+        memory_budget_mb: working memory for draws; sets the chunk size
+        n_bins: histogram resolution per forecast year
+        seed: seed for the random generator
+        bounds: (low, high) range the paths are clipped to (the 0-100% of a
+            rate), or None
+
+    Returns:
+        DataFrame with one row per forecast year: mean, sd and one column per
+        quantile; all NaN (with a warning) when the trend has fewer than
+        MIN_POINTS observations
+    """
+    rng = np.random.default_rng(seed)
+    years_pred = np.asarray(years_pred, dtype=float)
+    horizon = len(years_pred)
+    if model['n'] < MIN_POINTS:
+        warnings.warn(f"Trend fitted to {model['n']} points (< {MIN_POINTS}): no residual variance to "
+                      "simulate from, quantiles are NaN")
+        out = pd.DataFrame({'year': years_pred, 'mean': np.nan, 'sd': np.nan})
+        for q in quantiles:
+            out[f'q{q:g}'] = np.nan
+        return out
+    Xp = np.stack([np.ones_like(years_pred), years_pred], axis=-1)
+    dof = model['n'] - 2
+    factor = _cov_factor(np.asarray(model['XtX_inv']))
+
+    if impacts is None or impacts.empty:
+        tri_low = tri_mode = tri_high = np.zeros(0)
+        active = np.zeros((0, horizon))
+    else:
+        tri_low, tri_mode, tri_high = (impacts[c].to_numpy(dtype=float) for c in ('low', 'mode', 'high'))
+        # share of each impact reached by the end of each year, on its response curve
+        months_after = ((years_pred[None, :] + 1 - impacts['event_year'].to_numpy()[:, None])
+                        * 365.25 / DAYS_PER_MONTH)
+        active = response_shape(months_after, impacts['lag_months'].to_numpy()[:, None],
+                                impacts['ramp_months'].to_numpy()[:, None])
+
+    # fixed histogram support per year: [0, 100] for logit paths, otherwise
+    # +/-20 analytic SEs around the trend widened by the largest possible lift
+    if logit:
+        lo = np.zeros(horizon)
+        hi = np.full(horizon, 100.0)
+    else:
+        center, se = predict_linear(model, years_pred)
+        spread = 20 * np.maximum(se, 1e-9)
+        lo = center - spread + np.minimum(tri_low, 0) @ active
+        hi = center + spread + np.maximum(tri_high, 0) @ active
+        if bounds is not None:
+            lo = np.clip(lo, *bounds)
+            hi = np.maximum(np.clip(hi, *bounds), lo + 1e-9)
+    width = (hi - lo) / n_bins
+    counts = np.zeros(horizon * (n_bins + 2), dtype=np.int64)
+    offsets = np.arange(horizon) * (n_bins + 2)
+    total = np.zeros(horizon)
+    total_sq = np.zeros(horizon)
+
+    chunk = _chunk_size(horizon, len(tri_mode), memory_budget_mb)
+    done = 0
+    while done < n_draws:
+        c = min(chunk, n_draws - done)
+        sigma2 = dof * model['s2'] / rng.chisquare(dof, size=c)
+        sigma = np.sqrt(sigma2)[:, None]
+        beta = model['beta'] + sigma * (rng.standard_normal((c, 2)) @ factor.T)
+        paths = beta @ Xp.T + sigma * rng.standard_normal((c, horizon))
+        if logit:
+            paths = safe_inv_logit(paths) * 100.0
+        if len(tri_mode):
+            paths += rng.triangular(tri_low, tri_mode, tri_high, size=(c, len(tri_mode))) @ active
+        if bounds is not None:
+            paths = np.clip(paths, *bounds)
+
+        total += paths.sum(axis=0)
+        total_sq += (paths ** 2).sum(axis=0)
+        # bin 0 / n_bins + 1 collect draws below / above the support
+        idx = np.clip(np.floor((paths - lo) / width), -1, n_bins).astype(np.int64) + 1
+        counts += np.bincount((idx + offsets).ravel(), minlength=counts.size)
+        done += c
+
+    counts = counts.reshape(horizon, n_bins + 2)
+    mean = total / n_draws
+    out = pd.DataFrame({'year': years_pred, 'mean': mean,
+                        'sd': np.sqrt(np.maximum(total_sq / n_draws - mean ** 2, 0.0))})
+    cdf = np.cumsum(counts, axis=1) / n_draws
+    for q in quantiles:
+        # locate the bin holding quantile q and interpolate linearly inside it
+        b_in = np.clip((cdf < q).sum(axis=1), 1, n_bins)
+        prev = cdf[np.arange(horizon), b_in - 1]
+        mass = counts[np.arange(horizon), b_in] / n_draws
+        frac = np.where(mass > 0, (q - prev) / np.where(mass > 0, mass, 1.0), 0.5)
+        out[f'q{q:g}'] = lo + width * (b_in - 1 + np.clip(frac, 0.0, 1.0))
+    return out
+
+
+def main(n_draws=100_000, quantiles=DEFAULT_QUANTILES, memory_budget_mb=64, seed=None, use_cache=True):
+    df, impact_links = load_enriched_data(use_cache=use_cache)
+    events = df[df['record_type'] == 'event']
+    years_fore = np.array([2025, 2026, 2027])
+
+    rows = []
+    for label, indicator in [('Account Ownership Rate', 'Account Ownership Rate'),
+                             ('Digital Payment Usage (proxy)', 'Mobile Money Account Rate')]:
+        years, vals = select_findex(df, indicator)
+        keep = years <= 2024
+        years, vals = years[keep], vals[keep]
+        code = df.loc[df['indicator'] == indicator, 'indicator_code'].iloc[0]
+        last_obs = df.loc[(df['indicator_code'] == code) & (df['record_type'] == 'observation'),
+                          'observation_date'].max()
+        impacts = event_impact_ranges(events, impact_links, code, decimal_year([last_obs])[0])
+
+        for model_name, fit, logit in [('logit_linear', fit_logit_linear, True), ('linear', fit_linear, False)]:
+            sim = simulate_forecast(fit(years, vals), years_fore, n_draws=n_draws, logit=logit,
+                                    impacts=impacts, quantiles=quantiles,
+                                    memory_budget_mb=memory_budget_mb, seed=seed)
+            sim.insert(0, 'series', label)
+            sim.insert(1, 'model', model_name)
+            sim.insert(2, 'n_event_links', len(impacts))
+            rows.append(sim)
+
+    out = pd.concat(rows, ignore_index=True)
+    out['year'] = out['year'].astype(int)
+    outdir = Path('reports')
+    outdir.mkdir(parents=True, exist_ok=True)
+    out.to_csv(outdir / 'forecasts_task4_simulated.csv', index=False)
+    print(f'Simulated {n_draws} paths per series/model; summary written to reports/forecasts_task4_simulated.csv')
+    print(out.to_string(index=False, float_format=lambda v: f'{v:.2f}'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Monte Carlo simulation of the Task 4 forecasts')
+    parser.add_argument('--draws', type=int, default=100_000, help='simulated paths per series and model')
+    parser.add_argument('--quantiles', type=float, nargs='+', default=list(DEFAULT_QUANTILES))
+    parser.add_argument('--memory-mb', type=float, default=64, help='working memory budget for draws')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--no-cache', action='store_true',
+                        help='re-read the Excel workbook instead of the Parquet cache')
+    args = parser.parse_args()
+    main(n_draws=args.draws, quantiles=args.quantiles, memory_budget_mb=args.memory_mb,
+         seed=args.seed, use_cache=not args.no_cache)
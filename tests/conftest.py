@@ -0,0 +1,28 @@
+"""Shared test setup: the project modules on sys.path (as the scripts set it) and small tables."""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT, ROOT / "dashboard", ROOT / "src"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+def _forecasts(offset=0.0):
+    rows = [(series, year, 50.0 + i * 10 + (year - 2025) * 3 + offset)
+            for i, series in enumerate(["Account Ownership Rate", "Digital Payment Usage (proxy)"])
+            for year in (2025, 2026, 2027)]
+    fore = pd.DataFrame(rows, columns=["series", "year", "baseline"])
+    fore["ci95_low"] = fore["baseline"] - 5
+    fore["ci95_high"] = fore["baseline"] + 5
+    return fore
+
+
+@pytest.fixture
+def make_forecasts():
+    """Small forecasts table (two series, 2025-2027); offset shifts every baseline"""
+    return _forecasts
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+import api
+import artifact_store
+
+
+def get(path, query="", etag=None):
+    """One in-process GET through the ASGI app: (status, headers, body)"""
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": query.encode(), "headers": headers}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(api.app(scope, receive, send))
+    return sent[0]["status"], dict(sent[0]["headers"]), sent[1]["body"]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, make_forecasts):
+    monkeypatch.setattr(artifact_store, "get_store_dir", lambda: tmp_path)
+    monkeypatch.setattr(api, "cache", api.ResponseCache())
+    monkeypatch.setattr(api, "_latest", {"checked": float("-inf"), "run": None})
+    api.run_forecasts.cache_clear()
+    artifact_store.write_run({"forecasts": make_forecasts()}, run_id="run-1")
+    yield tmp_path
+    api.run_forecasts.cache_clear()
+
+
+def test_response_cache_lru_and_ttl(monkeypatch):
+    cache = api.ResponseCache(max_entries=2, ttl=10)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    now = time.monotonic()
+    monkeypatch.setattr(api.time, "monotonic", lambda: now + 11)
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2
+
+
+def test_endpoints_serve_the_latest_run(store):
+    status, _, body = get("/series")
+    assert status == 200
+    assert json.loads(body) == ["Account Ownership Rate", "Digital Payment Usage (proxy)"]
+
+    status, _, body = get("/latest", "run=run-1")
+    assert json.loads(body)["Account Ownership Rate"] == {"year": 2027, "baseline": 56.0}
+
+    status, _, body = get("/band", "series=Account%20Ownership%20Rate")
+    band = json.loads(body)
+    assert len(band["x"]) == len(band["y"]) == 6
+
+
+def test_etag_revalidation_and_cache_hits(store):
+    status, headers, body = get("/trends", "run=run-1")
+    etag = headers[b"etag"].decode()
+    assert status == 200 and body
+
+    status, headers, body = get("/trends", "run=run-1", etag=etag)
+    assert status == 304 and body == b""
+    assert headers[b"etag"].decode() == etag
+
+    status, _, body = get("/trends", "run=run-1", etag='"stale"')
+    assert status == 200 and body
+    assert api.cache.stats()["misses"] == 1 and api.cache.stats()["hits"] == 2
+
+
+def test_new_run_gets_a_new_etag(store, monkeypatch, make_forecasts):
+    _, headers, _ = get("/latest")
+    artifact_store.write_run({"forecasts": make_forecasts(offset=1.0)}, run_id="run-2")
+    monkeypatch.setattr(api, "_latest", {"checked": float("-inf"), "run": None})
+
+    status, new_headers, body = get("/latest", etag=headers[b"etag"].decode())
+    assert status == 200
+    assert new_headers[b"etag"] != headers[b"etag"]
+    assert json.loads(body)["Account Ownership Rate"]["baseline"] == 57.0
+
+
+def test_errors(store):
+    assert get("/nope")[0] == 404
+    assert get("/band")[0] == 400
+    assert get("/band", "series=Unknown")[0] == 404
+    assert get("/target", "target=abc")[0] == 400
+    assert get("/latest", "run=missing")[0] == 404
@@ -0,0 +1,46 @@
+import pandas.testing as tm
+import pytest
+
+import artifact_store
+
+
+
+def test_round_trip(tmp_path, make_forecasts):
+    fore = make_forecasts()
+    params = {"model": "auto", "all_series": False}
+    run_id = artifact_store.write_run({"forecasts": fore}, model_version="v1", script="task4_forecast.py",
+                                      params=params, store_dir=tmp_path)
+
+    assert artifact_store.store_exists(tmp_path)
+    assert artifact_store.latest_run(store_dir=tmp_path) == run_id
+    runs = artifact_store.list_runs(tmp_path)
+    assert runs.loc[0, "model_version"] == "v1" and runs.loc[0, "script"] == "task4_forecast.py"
+    assert artifact_store.list_series(run_id, store_dir=tmp_path) == sorted(fore["series"].unique())
+
+    tm.assert_frame_equal(artifact_store.read_artifact(run_id, store_dir=tmp_path), fore)
+    one = artifact_store.read_artifact(run_id, series="Digital Payment Usage (proxy)", columns=["year", "baseline"],
+                                       store_dir=tmp_path)
+    expected = fore.loc[fore["series"] == "Digital Payment Usage (proxy)", ["year", "baseline"]]
+    tm.assert_frame_equal(one, expected.reset_index(drop=True))
+
+
+def test_identical_tables_share_one_object(tmp_path, make_forecasts):
+    first = artifact_store.write_run({"forecasts": make_forecasts()}, run_id="run-1", store_dir=tmp_path)
+    second = artifact_store.write_run({"forecasts": make_forecasts()}, run_id="run-2", store_dir=tmp_path)
+    artifact_store.write_run({"forecasts": make_forecasts(offset=1.0)}, run_id="run-3", store_dir=tmp_path)
+
+    objects = list((tmp_path / artifact_store.OBJECTS_DIRNAME).rglob("*.parquet"))
+    assert len(objects) == 2
+    tm.assert_frame_equal(artifact_store.read_artifact(first, store_dir=tmp_path),
+                          artifact_store.read_artifact(second, store_dir=tmp_path))
+    assert artifact_store.series_runs("Account Ownership Rate", store_dir=tmp_path)["run_id"].tolist() == [
+        "run-3", "run-2", "run-1"]
+
+
+def test_errors(tmp_path, make_forecasts):
+    assert not artifact_store.store_exists(tmp_path)
+    artifact_store.write_run({"forecasts": make_forecasts()}, run_id="run-1", store_dir=tmp_path)
+    with pytest.raises(ValueError, match="already exists"):
+        artifact_store.write_run({"forecasts": make_forecasts()}, run_id="run-1", store_dir=tmp_path)
+    with pytest.raises(KeyError):
+        artifact_store.read_artifact("run-1", name="model_scores", store_dir=tmp_path)
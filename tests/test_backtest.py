@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from task4_backtest import MIN_HELD_OUT, backtest_series, iter_folds, score_folds, select_models
+from task4_forecast import (CANDIDATE_MODELS, DEFAULT_MODEL, fit_damped_trend, predict_damped_trend,
+                            predict_linear)
+
+YEARS = np.array([2011, 2014, 2017, 2021, 2022, 2024], dtype=float)
+VALUES = np.array([14.0, 22.0, 35.0, 46.0, 47.5, 49.0])
+
+
+def scores_table(rows):
+    scores = pd.DataFrame(rows, columns=["series", "model", "mae", "n_points"])
+    scores["rank"] = scores.groupby("series").cumcount() + 1
+    return scores
+
+
+def test_folds():
+    assert [len(test) for _, test in iter_folds(YEARS, "rolling", min_train=3)] == [3, 2, 1]
+    assert sum(1 for _ in iter_folds(YEARS, "loo")) == len(YEARS)
+    with pytest.raises(ValueError, match="Unknown backtest scheme"):
+        list(iter_folds(YEARS, "expanding"))
+
+
+def test_winner_needs_enough_held_out_points():
+    scores = scores_table([
+        ("Short", "damped_trend", 16.5, 1), ("Short", DEFAULT_MODEL, 21.8, 1),
+        ("Long", "gompertz", 1.2, MIN_HELD_OUT), ("Long", DEFAULT_MODEL, 2.5, MIN_HELD_OUT),
+    ])
+    selection = select_models(scores, ["Short", "Long", "Unscored"]).set_index("series")
+
+    assert selection.loc["Short", "model"] == DEFAULT_MODEL
+    assert selection.loc["Short", "reason"] == "insufficient history"
+    assert (selection.loc["Short", "mae"], selection.loc["Short", "n_points"]) == (21.8, 1)
+    assert selection.loc["Long", "model"] == "gompertz"
+    assert selection.loc["Long", "reason"] == f"lowest MAE on {MIN_HELD_OUT} held-out points"
+    assert selection.loc["Unscored", "model"] == DEFAULT_MODEL
+    assert selection.loc["Unscored", "n_points"] == 0 and np.isnan(selection.loc["Unscored", "mae"])
+
+    relaxed = select_models(scores, ["Short"], min_points=1)
+    assert relaxed.loc[0, "model"] == "damped_trend"
+
+
+def test_scores_rank_models_on_common_points():
+    rows, new_folds, n_cached = backtest_series("Access", YEARS, VALUES, min_train=3)
+    scores = score_folds(pd.DataFrame(rows))
+
+    assert n_cached == 0 and len(new_folds) == 3 * len(CANDIDATE_MODELS)
+    assert scores["n_points"].nunique() == 1
+    assert scores["rank"].tolist() == list(range(1, len(scores) + 1))
+    assert scores["mae"].is_monotonic_increasing
+
+    _, _, n_cached = backtest_series("Access", YEARS, VALUES, min_train=3, cached=new_folds)
+    assert n_cached == len(new_folds)
+
+
+def test_damped_trend_se_follows_the_damped_steps():
+    model = fit_damped_trend(YEARS, VALUES)
+    years_pred = np.arange(2024, 2041, dtype=float)
+    forecast, se = predict_damped_trend(model, years_pred)
+
+    assert forecast[0] == VALUES[-1]
+    assert se[0] == pytest.approx(np.sqrt(model["s2"]))
+    assert np.all(np.diff(se) > 0)
+    # damping bounds the steps, so the SE levels off below the linear trend's
+    _, se_linear = predict_linear(model, years_pred)
+    assert se[-1] < se_linear[-1]
+    limit = model["phi"] / (1 - model["phi"])
+    assert se[-1] < np.sqrt(model["s2"] * (1 + limit ** 2 * model["XtX_inv"][1, 1]))
+
+    undamped = dict(model, phi=1.0)
+    h = years_pred - model["last_year"]
+    _, se_undamped = predict_damped_trend(undamped, years_pred)
+    np.testing.assert_allclose(se_undamped, np.sqrt(model["s2"] * (1 + h ** 2 * model["XtX_inv"][1, 1])))
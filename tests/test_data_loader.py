@@ -0,0 +1,173 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+import pytest
+
+import data_loader
+from data_loader import (IMPACT_SHEET, MAIN_SHEET, apply_schema, get_cache_dir, load_workbook_data,
+                         read_excel_cached, read_workbook, split_unified_sheets)
+
+
+def write_unified_workbook(path):
+    main = pd.DataFrame({
+        "record_id": ["REC_0001", "REC_0002", "EVT_0001"],
+        "record_type": ["observation", "observation", "event"],
+        "indicator_code": ["ACC_OWNERSHIP", "ACC_OWNERSHIP", None],
+        "value_numeric": [46.0, 49.0, None],
+        "observation_date": ["2021-12-31", "2024-11-29", "2021-05-11"],
+        # mixed Python types: ints and fiscal-year labels
+        "fiscal_year": [2021, "FY2024/25", None],
+    })
+    links = pd.DataFrame({"record_id": ["IMP_0001"], "parent_id": ["EVT_0001"],
+                          "related_indicator": ["ACC_OWNERSHIP"], "impact_estimate": [5.0]})
+    with pd.ExcelWriter(path) as writer:
+        main.to_excel(writer, sheet_name=MAIN_SHEET, index=False)
+        links.to_excel(writer, sheet_name=IMPACT_SHEET, index=False)
+    return path
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    return write_unified_workbook(tmp_path / "unified.xlsx")
+
+
+def test_cached_load_equals_uncached(workbook):
+    uncached = load_workbook_data(workbook, use_cache=False, typed=False)
+    built = load_workbook_data(workbook, typed=False)  # builds the cache
+    cached = load_workbook_data(workbook, typed=False)
+
+    assert (get_cache_dir(workbook) / "manifest.json").exists()
+    for expected, first, second in zip(uncached, built, cached):
+        tm.assert_frame_equal(first, expected)
+        tm.assert_frame_equal(second, expected)
+
+
+def test_mixed_type_column_survives_the_cache(workbook):
+    read_excel_cached(workbook, sheet_name=None)
+    main = read_excel_cached(workbook, sheet_name=MAIN_SHEET)
+
+    fiscal = main["fiscal_year"].tolist()
+    assert fiscal[:2] == [2021, "FY2024/25"] and pd.isna(fiscal[2])
+    assert type(fiscal[0]) is int
+    assert "fiscal_year__pytype" not in main.columns
+
+
+def test_stale_cache_is_rebuilt(workbook):
+    read_excel_cached(workbook, sheet_name=None)
+    main = pd.read_excel(workbook, sheet_name=MAIN_SHEET)
+    main.loc[0, "value_numeric"] = 50.0
+    links = pd.read_excel(workbook, sheet_name=IMPACT_SHEET)
+    with pd.ExcelWriter(workbook) as writer:
+        main.to_excel(writer, sheet_name=MAIN_SHEET, index=False)
+        links.to_excel(writer, sheet_name=IMPACT_SHEET, index=False)
+
+    assert read_excel_cached(workbook, sheet_name=MAIN_SHEET).loc[0, "value_numeric"] == 50.0
+
+
+def test_touched_workbook_keeps_its_cache(workbook, monkeypatch):
+    read_excel_cached(workbook, sheet_name=None)
+    stat = workbook.stat()
+    os.utime(workbook, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cache rebuilt for an unchanged workbook")
+
+    monkeypatch.setattr(data_loader, "build_cache", fail)
+    assert len(read_excel_cached(workbook, sheet_name=0)) == 3
+
+
+def test_cache_files_are_replaced_whole(workbook, monkeypatch):
+    # readers in another process only ever see complete files
+    moved = []
+    replace = os.replace
+    monkeypatch.setattr(os, "replace", lambda src, dst: moved.append(os.path.basename(dst)) or replace(src, dst))
+    data_loader.build_cache(workbook)
+
+    assert moved == ["sheet_00.parquet", "sheet_01.parquet", "manifest.json"]
+    assert not list(get_cache_dir(workbook).glob("*.tmp"))
+
+
+def test_read_workbook_parses_requested_sheets_in_order(workbook):
+    sheets = read_workbook(workbook)
+    assert list(sheets) == [MAIN_SHEET, IMPACT_SHEET]
+    assert list(read_workbook(workbook, sheet_names=[IMPACT_SHEET, "missing"])) == [IMPACT_SHEET]
+
+
+def test_split_unified_sheets():
+    main = pd.DataFrame({"record_type": ["observation", "impact_link", "event"], "record_id": ["R1", "I1", "E1"]})
+    links = pd.DataFrame({"record_id": ["I2"]})
+
+    named_main, named_links = split_unified_sheets({IMPACT_SHEET: links, MAIN_SHEET: main})
+    assert named_main is main and named_links is links
+
+    # unnamed sheets: the first two in workbook order
+    first, second = split_unified_sheets({"data": main, "links": links})
+    assert first is main and second is links
+
+    # a single sheet has its impact_link records split out
+    only_main, only_links = split_unified_sheets({"data": main})
+    assert only_main["record_id"].tolist() == ["R1", "E1"]
+    assert only_links["record_id"].tolist() == ["I1"]
+
+    with pytest.raises(ValueError, match="no sheets"):
+        split_unified_sheets({})
+
+
+def test_cached_sheet_lookup(workbook):
+    tm.assert_frame_equal(read_excel_cached(workbook, sheet_name=1),
+                          read_excel_cached(workbook, sheet_name=IMPACT_SHEET))
+    with pytest.raises(KeyError):
+        read_excel_cached(workbook, sheet_name="missing")
+
+
+def test_schema_dtypes():
+    df = pd.DataFrame({
+        "record_type": ["observation", "observation", "event"],
+        "pillar": ["ACCESS", "USAGE", None],
+        "observation_date": ["2021-12-31", "2024-11-29", "2021-05-11"],
+        # a text column collected only by another collector reads back as object ...
+        "collection_date": ["Jane", None, None],
+        "value_numeric": [46.0, 49.5, np.nan],
+        "lag_months": [12, 6, 0],
+        "confidence_score": [0.1, 0.2, 0.3],
+        # ... and columns with no values at all read back as float64
+        "impact_direction": [np.nan] * 3,
+        "related_indicator": [np.nan] * 3,
+        "period_start": [np.nan] * 3,
+    })
+    typed = apply_schema(df)
+
+    assert isinstance(typed["record_type"].dtype, pd.CategoricalDtype)
+    assert isinstance(typed["pillar"].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(typed["observation_date"])
+    assert pd.api.types.is_datetime64_any_dtype(typed["period_start"])
+    assert typed["collection_date"].tolist() == df["collection_date"].tolist()
+    assert typed["value_numeric"].dtype == np.float32
+    assert typed["lag_months"].dtype == np.int8
+    # 0.1 is not exact in float32, so the column stays float64
+    assert typed["confidence_score"].dtype == np.float64
+    assert isinstance(typed["impact_direction"].dtype, pd.CategoricalDtype)
+    assert typed["related_indicator"].dtype == object
+    assert typed["impact_direction"].isna().all() and typed["related_indicator"].isna().all()
+
+
+def test_typed_load_keeps_empty_text_columns(tmp_path):
+    path = tmp_path / "unified.xlsx"
+    main = pd.DataFrame({"record_id": ["REC_0001", "REC_0002"], "record_type": ["observation", "observation"],
+                         "pillar": ["ACCESS", "USAGE"], "impact_direction": [None, None],
+                         "related_indicator": [None, None]})
+    links = pd.DataFrame({"record_id": ["IMP_0001"], "impact_direction": ["increase"]})
+    with pd.ExcelWriter(path) as writer:
+        main.to_excel(writer, sheet_name=MAIN_SHEET, index=False)
+        links.to_excel(writer, sheet_name=IMPACT_SHEET, index=False)
+
+    uncached, _ = load_workbook_data(path, use_cache=False)
+    load_workbook_data(path)  # builds the cache
+    cached, _ = load_workbook_data(path)
+    tm.assert_frame_equal(cached, uncached)
+    assert isinstance(cached["impact_direction"].dtype, pd.CategoricalDtype)
+    assert cached["related_indicator"].dtype == object
+    # grouping the empty categorical with observed=True keeps to the rows present
+    assert len(cached.groupby(["pillar", "impact_direction"], observed=True, dropna=False)) == 2
@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+import data_loader
+import enrichment_store
+from data_loader import IMPACT_SHEET, MAIN_SHEET
+from enrich_data import drop_existing_records
+
+
+@pytest.fixture
+def base_workbook(tmp_path, monkeypatch):
+    main = pd.DataFrame({
+        "record_id": ["REC_0001", "EVT_0001"],
+        "record_type": ["observation", "event"],
+        "indicator": ["Account Ownership Rate", "Telebirr launch"],
+        "indicator_code": ["ACC_OWNERSHIP", "EVT_TELEBIRR"],
+        "value_numeric": [46.0, None],
+        "observation_date": ["2021-12-31", "2021-05-11"],
+        "source_name": ["Global Findex", None],
+    })
+    links = pd.DataFrame({"record_id": ["IMP_0001"], "parent_id": ["EVT_0001"],
+                          "related_indicator": ["ACC_OWNERSHIP"], "impact_estimate": [5.0]})
+    path = tmp_path / "ethiopia_fi_unified_data.xlsx"
+    with pd.ExcelWriter(path) as writer:
+        main.to_excel(writer, sheet_name=MAIN_SHEET, index=False)
+        links.to_excel(writer, sheet_name=IMPACT_SHEET, index=False)
+    monkeypatch.setattr(data_loader, "get_data_path", lambda filename: path)
+    monkeypatch.setattr(enrichment_store, "get_data_path", lambda filename: path)
+    return path
+
+
+def new_records(suffix):
+    # what one enrichment run adds; a rerun allocates fresh ids for the same records
+    observations = pd.DataFrame({
+        "record_id": [f"REC_{suffix}"], "record_type": ["observation"],
+        "indicator": ["Account Ownership Rate"], "indicator_code": ["ACC_OWNERSHIP"],
+        "value_numeric": [49.0], "observation_date": [pd.Timestamp("2024-11-29")],
+        "source_name": ["Global Findex"],
+    })
+    events = pd.DataFrame({
+        "record_id": [f"EVT_{suffix}"], "record_type": ["event"], "indicator": ["Fayda rollout"],
+        "indicator_code": ["EVT_FAYDA"], "observation_date": [pd.Timestamp("2023-01-01")],
+    })
+    links = pd.DataFrame({"record_id": [f"IMP_{suffix}"], "parent_id": [f"EVT_{suffix}"],
+                          "related_indicator": ["ACC_OWNERSHIP"], "impact_estimate": [2.0]})
+    return observations, events, links
+
+
+def test_append_and_materialize(tmp_path, base_workbook):
+    store = tmp_path / "store"
+    observations, events, links = new_records("0002")
+    assert not enrichment_store.store_exists(store)
+    entry = enrichment_store.append_batch("b1", observations=observations, events=events,
+                                          impact_links=links, store_dir=store)
+
+    assert entry["rows"] == {"observations": 1, "events": 1, "impact_links": 1}
+    assert [b["batch_id"] for b in enrichment_store.list_batches(store)] == ["b1"]
+    main, impact_links = enrichment_store.materialize(store, typed=False)
+    assert main["record_id"].tolist() == ["REC_0001", "EVT_0001", "REC_0002", "EVT_0002"]
+    assert impact_links["record_id"].tolist() == ["IMP_0001", "IMP_0002"]
+
+    # the cached view is served until another batch is appended
+    cached, _ = enrichment_store.materialize(store, typed=False)
+    pd.testing.assert_frame_equal(cached, main)
+    later = new_records("0003")[0].assign(value_numeric=50.0, observation_date=pd.Timestamp("2025-06-30"))
+    enrichment_store.append_batch("b2", observations=later, store_dir=store)
+    main, _ = enrichment_store.materialize(store, typed=False)
+    assert main["record_id"].tolist() == ["REC_0001", "EVT_0001", "REC_0002", "REC_0003", "EVT_0002"]
+
+    with pytest.raises(ValueError, match="already exists"):
+        enrichment_store.append_batch("b1", observations=observations, store_dir=store)
+
+
+def test_rerun_adds_nothing(tmp_path, base_workbook):
+    store = tmp_path / "store"
+    enrichment_store.append_batch("b1", *new_records("0002"), store_dir=store)
+    main, impact_links = enrichment_store.materialize(store)
+
+    observations, events, links = drop_existing_records(main, impact_links, *new_records("0003"))
+    assert len(observations) == len(events) == len(links) == 0
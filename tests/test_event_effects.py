@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from event_effects import build_link_arrays, combine_event_effects, compute_event_effects, event_effects_tensor
+
+
+def loop_event_effect(impact_estimate, lag_months, effect_type, months_after_event):
+    # the row-by-row version from notebooks/task3_event_impact_modeling.ipynb
+    effective_months = months_after_event - lag_months
+    if effective_months < 0:
+        return 0
+    if effect_type == "immediate":
+        return impact_estimate
+    ramp_up_period = 12 if effect_type == "gradual" else 24
+    if effective_months < ramp_up_period:
+        return impact_estimate * (effective_months / ramp_up_period)
+    return impact_estimate
+
+
+def loop_combined_effect(events_df, target_date, target_indicator, effect_type="gradual"):
+    total_effect = 0
+    for _, row in events_df[events_df["related_indicator"] == target_indicator].iterrows():
+        event_date = pd.to_datetime(row["observation_date"])
+        if pd.isna(event_date) or pd.isna(row["impact_estimate"]) or pd.isna(row["lag_months"]):
+            continue
+        months_after = (target_date - event_date).days / 30.44
+        category = row["event_category"]
+        if category in ["infrastructure", "policy"]:
+            event_effect_type = "delayed"
+        elif category in ["product_launch", "market_entry"]:
+            event_effect_type = "gradual"
+        else:
+            event_effect_type = effect_type
+        total_effect += loop_event_effect(row["impact_estimate"], row["lag_months"], event_effect_type, months_after)
+    return total_effect
+
+
+@pytest.fixture
+def joined_links():
+    rng = np.random.default_rng(7)
+    n = 40
+    return pd.DataFrame({
+        "record_id": [f"IMP_{i:04d}" for i in range(n)],
+        "parent_id": [f"EVT_{i % 9:04d}" for i in range(n)],
+        "event_name": [f"Event {i % 9}" for i in range(n)],
+        "related_indicator": rng.choice(["ACC_OWNERSHIP", "USG_DIGITAL_PAYMENT", "ACC_MM_ACCOUNT"], n),
+        "observation_date": pd.to_datetime("2015-01-01") + pd.to_timedelta(rng.integers(0, 3000, n), unit="D"),
+        "event_category": rng.choice(["infrastructure", "policy", "product_launch", "market_entry", "partnership"], n),
+        "impact_estimate": np.round(rng.uniform(-5, 10, n), 1),
+        "lag_months": rng.integers(0, 24, n).astype(float),
+        "impact_direction": "increase",
+    })
+
+
+def test_vectorized_effects_match_loop(joined_links):
+    dates = pd.date_range("2014-01-01", "2030-12-01", freq="7MS")
+    links = build_link_arrays(joined_links)
+    combined = compute_event_effects(links, dates)
+
+    for indicator in combined.columns:
+        expected = [loop_combined_effect(joined_links, date, indicator) for date in dates]
+        np.testing.assert_allclose(combined[indicator].to_numpy(), expected, atol=1e-9)
+
+    tensor, indicators = event_effects_tensor(links, dates)
+    np.testing.assert_allclose(tensor.sum(axis=2).T, combined[list(indicators)].to_numpy())
+
+
+def test_notebook_wrapper_matches_loop(joined_links):
+    target = pd.Timestamp("2024-06-30")
+    for indicator in joined_links["related_indicator"].unique():
+        for effect_type in ("immediate", "gradual", "delayed"):
+            total, effects = combine_event_effects(joined_links, target, indicator, effect_type=effect_type)
+            assert total == pytest.approx(loop_combined_effect(joined_links, target, indicator, effect_type))
+            assert len(effects) == (joined_links["related_indicator"] == indicator).sum()
+
+
+def test_links_without_estimate_or_date_are_dropped(joined_links):
+    joined_links.loc[0, "impact_estimate"] = np.nan
+    joined_links.loc[1, "observation_date"] = pd.NaT
+    links = build_link_arrays(joined_links)
+    assert len(links["impact"]) == len(joined_links) - 2
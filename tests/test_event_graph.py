@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from event_graph import EventLinkIndex
+
+
+def make_tables():
+    events = pd.DataFrame({
+        "record_id": ["EVT_0001", "EVT_0002", "EVT_0003"],
+        "record_type": "event",
+        "indicator": ["Telebirr launch", "M-Pesa entry", "Fayda rollout"],
+    })
+    links = pd.DataFrame({
+        "record_id": ["IMP_0001", "IMP_0002", "IMP_0003", "IMP_0004"],
+        "parent_id": ["EVT_0001", "EVT_0001", "EVT_0002", "EVT_0099"],
+        "related_indicator": ["ACC_OWNERSHIP", "USG_DIGITAL_PAYMENT", "ACC_OWNERSHIP", "ACC_MM_ACCOUNT"],
+        "impact_direction": ["increase", "increase", "decrease", "increase"],
+        "impact_estimate": [5.0, np.nan, 2.0, 1.0],
+    })
+    return events, links
+
+
+def test_neighbor_lookups_match_table_filters():
+    events, links = make_tables()
+    index = EventLinkIndex(events, links)
+
+    for event_id in events["record_id"]:
+        expected = np.flatnonzero(links["parent_id"] == event_id)
+        assert sorted(index.links_for_event(event_id)) == list(expected)
+    for code in links["related_indicator"].unique():
+        expected = np.flatnonzero(links["related_indicator"] == code)
+        assert sorted(index.links_for_indicator(code)) == list(expected)
+
+    assert index.indicators_for_event("EVT_0001") == ["ACC_OWNERSHIP", "USG_DIGITAL_PAYMENT"]
+    assert index.events_for_indicator("ACC_OWNERSHIP") == ["EVT_0001", "EVT_0002"]
+    assert len(index.links_for_event("EVT_9999")) == 0
+    assert index.event_row("EVT_0002") == 1
+    assert index.event_row("EVT_0099") is None
+    assert index.link_row("IMP_0003") == 2
+
+
+def test_unlinked_events_and_orphan_links():
+    events, links = make_tables()
+    index = EventLinkIndex(events, links)
+
+    assert index.unlinked_events()["record_id"].tolist() == ["EVT_0003"]
+    assert index.orphan_links()["record_id"].tolist() == ["IMP_0004"]
+    assert index.event_degree().tolist() == [2, 1, 0]
+
+
+def test_appends_update_the_index():
+    events, links = make_tables()
+    index = EventLinkIndex(events, links)
+    index.append_events(pd.DataFrame({"record_id": ["EVT_0099"], "record_type": "event",
+                                      "indicator": ["Late event"]}))
+    index.append_links(pd.DataFrame({"record_id": ["IMP_0005"], "parent_id": ["EVT_0003"],
+                                     "related_indicator": ["ACC_OWNERSHIP"], "impact_direction": ["increase"],
+                                     "impact_estimate": [3.0]}))
+
+    assert index.orphan_links().empty
+    assert index.unlinked_events().empty
+    assert index.events_for_indicator("ACC_OWNERSHIP") == ["EVT_0001", "EVT_0002", "EVT_0003"]
+    assert index.event_row("EVT_0099") == 3
+
+
+def test_event_indicator_matrix_signs_estimates():
+    events, links = make_tables()
+    matrix = EventLinkIndex(events, links).event_indicator_matrix(label="record_id")
+
+    assert matrix.loc["EVT_0001", "ACC_OWNERSHIP"] == 5.0
+    assert matrix.loc["EVT_0002", "ACC_OWNERSHIP"] == -2.0
+    # no estimate: +/-1 from the direction
+    assert matrix.loc["EVT_0001", "USG_DIGITAL_PAYMENT"] == 1.0
+    assert np.isnan(matrix.loc["EVT_0002", "USG_DIGITAL_PAYMENT"])
+
+    counts = EventLinkIndex(events, links).event_indicator_matrix(values="count", label="record_id")
+    assert counts.to_numpy().sum() == len(links)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from event_effects import response_shape
+from event_regression import (build_design, decimal_years, fit_event_regression, fit_events,
+                              observation_table, predict_event_regression, prior_lift)
+
+DATES = pd.to_datetime([f"{y}-12-31" for y in range(2014, 2025)])
+EVENT_DATE = pd.Timestamp("2020-06-30")
+TRUE_EFFECT = 6.0
+
+
+def make_data(prior=4.0):
+    # a 2pp/year trend plus a gradual (12-month ramp) launch effect
+    months = (DATES - EVENT_DATE).days.to_numpy() / 30.44
+    account = 20.0 + 2.0 * (decimal_years(DATES) - 2020.0) + TRUE_EFFECT * response_shape(months, 0.0, 12.0)
+    obs = pd.DataFrame({
+        "record_id": [f"REC_{i:04d}" for i in range(2 * len(DATES))],
+        "record_type": "observation",
+        "indicator_code": ["ACC_OWNERSHIP"] * len(DATES) + ["ACC_AGENTS"] * len(DATES),
+        "value_numeric": np.concatenate([account, 1000.0 + 50.0 * np.arange(len(DATES))]),
+        "observation_date": np.concatenate([DATES, DATES]),
+        "unit": ["%"] * len(DATES) + ["count"] * len(DATES),
+        "source_name": "Global Findex",
+        "gender": "all",
+        "location": "national",
+    })
+    event = pd.DataFrame({"record_id": ["EVT_0001"], "record_type": ["event"], "indicator": ["Telebirr launch"],
+                          "category": ["product_launch"], "observation_date": [EVENT_DATE]})
+    links = pd.DataFrame({"record_id": ["IMP_0001", "IMP_0002"], "parent_id": ["EVT_0001", "EVT_0001"],
+                          "related_indicator": ["ACC_OWNERSHIP", "ACC_AGENTS"], "impact_direction": "increase",
+                          "impact_estimate": [prior, 3.0], "lag_months": [0.0, 0.0]})
+    return pd.concat([obs, event], ignore_index=True), links
+
+
+def test_fit_matches_dense_ridge_solution():
+    df, links = make_data()
+    design = build_design(observation_table(df), links, df[df["record_type"] == "event"])
+    fit = fit_event_regression(design, alpha=2.0)
+
+    # the ACC_AGENTS count series gets no column for its percentage-point prior
+    assert design["columns"]["kind"].tolist() == ["intercept", "slope", "intercept", "slope", "event"]
+    assert design["columns"]["link_id"].iloc[-1] == "IMP_0001"
+    X = design["X"].toarray()
+    penalty = np.diag([0.0, 1e-6, 0.0, 1e-6, 2.0])
+    expected = np.linalg.solve(X.T @ X + penalty, X.T @ design["y"] + penalty @ design["prior"])
+    np.testing.assert_allclose(fit["beta"], expected, rtol=1e-8, atol=1e-8)
+
+
+def test_alpha_moves_the_effect_between_data_and_prior():
+    df, links = make_data(prior=1.0)
+    weak = fit_events(df, links, alpha=1e-8)["coefficients"]
+    strong = fit_events(df, links, alpha=1e8)["coefficients"]
+    assert weak.loc[weak["kind"] == "event", "estimate"].item() == pytest.approx(TRUE_EFFECT, abs=1e-4)
+    assert strong.loc[strong["kind"] == "event", "estimate"].item() == pytest.approx(1.0, abs=1e-4)
+
+
+def test_forecast_and_prior_lift():
+    df, links = make_data()
+    fit = fit_events(df, links, alpha=1e-8)
+    dates = ["2025-12-31", "2026-12-31"]
+    forecast = predict_event_regression(fit, "ACC_OWNERSHIP", dates)
+
+    # the ramp is complete, so the forecast is the trend plus the full effect
+    expected = 20.0 + 2.0 * (decimal_years(dates) - 2020.0) + TRUE_EFFECT
+    np.testing.assert_allclose(forecast["forecast"], expected, atol=1e-4)
+    np.testing.assert_allclose(forecast["forecast"], forecast["trend"] + forecast["event_effect"])
+    assert (forecast["se"] >= 0).all()
+    # the effect had fully accrued by the last observation
+    np.testing.assert_allclose(prior_lift(fit, "ACC_OWNERSHIP", dates), 0.0, atol=1e-12)
+    np.testing.assert_allclose(prior_lift(fit, "ACC_AGENTS", dates), 0.0)
+
+    # a history that ends before the launch gets the whole prior as a lift
+    early = fit_events(df[(df["record_type"] == "event") | (df["observation_date"] < EVENT_DATE)], links)
+    months = (pd.Timestamp("2020-12-31") - EVENT_DATE).days / 30.44
+    np.testing.assert_allclose(prior_lift(early, "ACC_OWNERSHIP", ["2020-12-31", "2026-12-31"]),
+                               [4.0 * months / 12.0, 4.0])
+
+    with pytest.raises(KeyError, match="no observations"):
+        predict_event_regression(fit, "USG_DIGITAL_PAYMENT", dates)
@@ -0,0 +1,115 @@
+import warnings
+
+import numpy as np
+
+import fit_cache
+from fit_cache import FitCache, decode_fit, encode_fit, fit_key
+
+
+def linear_fit(years, values):
+    beta = np.polyfit(np.asarray(years, dtype=float), np.asarray(values, dtype=float), 1)
+    return {"beta": beta, "s2": 0.5, "n": len(years)}
+
+
+class CountingFit:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, years, values):
+        self.calls += 1
+        return linear_fit(years, values)
+
+
+def test_key_depends_on_inputs_not_container():
+    key = fit_key("linear", [2014, 2017], [22, 35], version="v1")
+    assert key == fit_key("linear", np.array([2014.0, 2017.0]), (22.0, 35.0), version="v1")
+    assert key != fit_key("linear", [2014, 2017], [22, 36], version="v1")
+    assert key != fit_key("linear", [2014, 2017], [22, 35], version="v2")
+    assert key != fit_key("linear", [2014, 2017], [22, 35], params={"phi": 0.8}, version="v1")
+
+
+def test_encode_round_trip():
+    fit = {"beta": np.array([1.5, -2.0]), "XtX_inv": np.eye(2), "s2": 0.25, "n": 4}
+    decoded = decode_fit(encode_fit(fit))
+    assert decoded["s2"] == 0.25 and decoded["n"] == 4
+    np.testing.assert_array_equal(decoded["XtX_inv"], np.eye(2))
+
+
+def test_hit_after_miss_across_instances(tmp_path):
+    path = tmp_path / "fits.sqlite"
+    fit_func = CountingFit()
+    cache = FitCache(path)
+    first = cache.fit("linear", fit_func, [2014, 2017, 2021], [22, 35, 46], version="v1")
+    again = cache.fit("linear", fit_func, [2014, 2017, 2021], [22, 35, 46], version="v1")
+    cache.close()
+
+    reopened = FitCache(path)
+    stored = reopened.fit("linear", fit_func, [2014, 2017, 2021], [22, 35, 46], version="v1")
+    reopened.fit("linear", fit_func, [2014, 2017, 2021], [22, 35, 47], version="v1")
+
+    assert fit_func.calls == 2
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert (reopened.hits, reopened.misses) == (1, 1)
+    np.testing.assert_allclose(stored["beta"], first["beta"])
+    np.testing.assert_allclose(again["beta"], first["beta"])
+    assert reopened.stats()["entries"] == 2
+
+
+def test_least_recently_used_fit_is_evicted(tmp_path):
+    path = tmp_path / "fits.sqlite"
+    size = len(encode_fit(linear_fit([1, 2], [1, 2])))
+    cache = FitCache(path, max_bytes=int(size * 2.5))
+    keys = [fit_key("linear", [1, 2], [1, value]) for value in (2, 3, 4)]
+    cache.put(keys[0], "linear", linear_fit([1, 2], [1, 2]))
+    cache.put(keys[1], "linear", linear_fit([1, 2], [1, 3]))
+    assert cache.get(keys[0]) is not None  # keys[1] is now the least recently used
+    cache.put(keys[2], "linear", linear_fit([1, 2], [1, 4]))
+    cache.close()
+
+    reopened = FitCache(path)
+    assert reopened.get(keys[0]) is not None
+    assert reopened.get(keys[1]) is None
+    assert reopened.get(keys[2]) is not None
+    assert reopened.stats()["bytes"] <= reopened.max_bytes
+
+
+def test_eviction_runs_only_past_the_cap(tmp_path, monkeypatch):
+    size = len(encode_fit(linear_fit([1, 2], [1, 2])))
+    cache = FitCache(tmp_path / "fits.sqlite", max_bytes=50 * size)
+    evictions = []
+    evict = FitCache._evict
+    monkeypatch.setattr(FitCache, "_evict", lambda self, conn: evictions.append(1) or evict(self, conn))
+    for value in range(200):
+        cache.put(fit_key("linear", [1, 2], [1, value]), "linear", linear_fit([1, 2], [1, value]))
+    # replacing an entry does not count its bytes twice
+    cache.put(fit_key("linear", [1, 2], [1, 199]), "linear", linear_fit([1, 2], [1, 199]))
+
+    stats = cache.stats()
+    assert stats["bytes"] == cache._n_bytes <= cache.max_bytes
+    assert stats["entries"] >= int(50 * fit_cache.EVICT_TO)
+    # each eviction frees room for several puts
+    assert len(evictions) <= (200 - 50) // int(50 * (1 - fit_cache.EVICT_TO)) + 1
+
+
+def test_close_evicts_what_other_writers_added(tmp_path):
+    path = tmp_path / "fits.sqlite"
+    size = len(encode_fit(linear_fit([1, 2], [1, 2])))
+    first, second = FitCache(path, max_bytes=10 * size), FitCache(path, max_bytes=10 * size)
+    for value in range(8):
+        first.put(fit_key("linear", [1, 2], [1, value]), "linear", linear_fit([1, 2], [1, value]))
+        second.put(fit_key("linear", [1, 2], [2, value]), "linear", linear_fit([1, 2], [2, value]))
+    second.close()
+    first.close()
+    assert FitCache(path).stats()["bytes"] <= 10 * size
+
+
+def test_unwritable_cache_falls_back_to_fitting(tmp_path):
+    blocker = tmp_path / "not_a_dir"
+    blocker.write_text("")
+    fit_func = CountingFit()
+    cache = FitCache(blocker / "fits.sqlite")
+    with warnings.catch_warnings(record=True):
+        warnings.simplefilter("always")
+        cache.fit("linear", fit_func, [1, 2], [1, 2])
+        cache.fit("linear", fit_func, [1, 2], [1, 2])
+    assert fit_func.calls == 2
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from task4_forecast import fit_linear, fit_linear_batch, fit_logit_linear, predict_linear, predict_logit_linear
+
+YEARS = np.array([2011, 2014, 2017, 2021, 2024], dtype=float)
+VALUES = np.array([14.0, 22.0, 35.0, 46.0, 49.0])
+
+
+def loop_predict_linear(model, years_pred):
+    # the row-by-row version predict_linear replaced
+    Xp = np.vstack([np.ones_like(years_pred), years_pred]).T
+    y_pred = Xp.dot(model["beta"])
+    se = np.sqrt(np.array([model["s2"] * (1 + x.dot(model["XtX_inv"]).dot(x)) for x in Xp]))
+    return y_pred, se
+
+
+@pytest.mark.parametrize("years_pred", [np.arange(2025, 2028, dtype=float), 2024.5 + np.arange(36) / 12])
+def test_single_fit_matches_loop(years_pred):
+    model = fit_linear(YEARS, VALUES)
+    y_pred, se = predict_linear(model, years_pred)
+    y_loop, se_loop = loop_predict_linear(model, years_pred)
+    np.testing.assert_allclose(y_pred, y_loop)
+    np.testing.assert_allclose(se, se_loop)
+
+
+def test_scalar_year():
+    model = fit_linear(YEARS, VALUES)
+    y_pred, se = predict_linear(model, 2025)
+    y_loop, se_loop = loop_predict_linear(model, np.array([2025.0]))
+    assert y_pred.shape == se.shape == (1,)
+    np.testing.assert_allclose(se, se_loop)
+    p_pred, _ = predict_logit_linear(fit_logit_linear(YEARS, VALUES), 2025.25)
+    assert p_pred.shape == (1,)
+
+
+def test_stacked_fits_match_single_fits():
+    rng = np.random.default_rng(1)
+    years = np.tile(np.arange(2011, 2025, 1.0), (8, 1))
+    values = 10 + 2.5 * (years - 2011) + rng.normal(0, 1, years.shape)
+    mask = np.arange(years.shape[1])[None, :] >= rng.integers(0, 8, len(years))[:, None]
+    stacked = fit_linear_batch(years, values, mask)
+
+    shared = 2024.5 + np.arange(30) / 12
+    per_series = shared[None, :] + rng.uniform(0, 1, (len(years), 1))
+    y_shared, se_shared = predict_linear(stacked, shared)
+    y_own, se_own = predict_linear(stacked, per_series)
+    _, se_scalar = predict_linear(stacked, 2026)
+    assert se_scalar.shape == (len(years), 1)
+    for i in range(len(years)):
+        single = fit_linear(years[i, mask[i]], values[i, mask[i]])
+        for pred, se, t in [(y_shared[i], se_shared[i], shared), (y_own[i], se_own[i], per_series[i])]:
+            y_loop, se_loop = loop_predict_linear(single, t)
+            np.testing.assert_allclose(pred, y_loop, rtol=1e-6)
+            np.testing.assert_allclose(se, se_loop, rtol=1e-6)
@@ -0,0 +1,72 @@
+import warnings
+
+import numpy as np
+import pytest
+from scipy.optimize import curve_fit
+
+from growth_models import MIN_POINTS, curve_values, fit_growth_batch, predict_growth_batch
+
+
+def synthetic_panel(n_series=30, seed=3):
+    rng = np.random.default_rng(seed)
+    years = np.tile(np.arange(2011, 2025, 1.0), (n_series, 1))
+    ceiling = rng.uniform(40, 95, n_series)
+    rate = rng.uniform(0.15, 0.6, n_series)
+    midpoint = rng.uniform(-4, 4, n_series)
+    t = years - years.mean(axis=1, keepdims=True)
+    y = curve_values("logistic", t, np.column_stack([ceiling, rate, midpoint]))
+    y = y + rng.normal(0, 0.5, y.shape)
+    # ragged series: drop a few years from the front of each
+    mask = np.arange(years.shape[1])[None, :] >= rng.integers(0, 5, n_series)[:, None]
+    return years, y, mask
+
+
+def test_batched_fit_matches_curve_fit_per_series():
+    years, y, mask = synthetic_panel()
+    fit = fit_growth_batch(years, y, mask, curve="logistic")
+    assert fit["converged"].all()
+
+    for i in range(len(y)):
+        t = years[i, mask[i]] - fit["t0"][i]
+        lower, upper = [max(y[i, mask[i]].max(), 1e-3), 1e-4, -100.0], [100.0, 5.0, 100.0]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            params, _ = curve_fit(lambda t, k, r, m: k / (1 + np.exp(-r * (t - m))), t, y[i, mask[i]],
+                                  p0=fit["params"][i], bounds=(lower, upper))
+        sse_ref = ((y[i, mask[i]] - params[0] / (1 + np.exp(-params[1] * (t - params[2])))) ** 2).sum()
+        assert fit["sse"][i] <= sse_ref * (1 + 1e-4) + 1e-8
+
+
+@pytest.mark.parametrize("curve", ["logistic", "gompertz"])
+def test_ceiling_stays_within_bounds(curve):
+    years, y, mask = synthetic_panel(n_series=10)
+    target = np.full(len(y), np.nan)
+    target[0] = 97.0
+    fit = fit_growth_batch(years, y, mask, curve=curve, target=target)
+
+    ceiling = fit["params"][:, 0]
+    assert (ceiling >= np.where(mask, y, -np.inf).max(axis=1) - 1e-9).all()
+    assert (ceiling <= 100.0 + 1e-9).all()
+    assert ceiling[0] >= 97.0
+
+    forecast, se = predict_growth_batch(fit, np.arange(2025, 2028))
+    assert forecast.shape == se.shape == (len(y), 3)
+    assert np.isfinite(forecast).all() and (se > 0).all()
+
+
+def test_short_series_are_not_fitted():
+    years = np.array([[2014, 2017, 2021, 2024], [2014, 2017, 0, 0]], dtype=float)
+    y = np.array([[22, 35, 46, 49], [10, 20, 0, 0]], dtype=float)
+    mask = np.array([[True] * 4, [True, True, False, False]])
+    fit = fit_growth_batch(years, y, mask)
+
+    assert fit["n"].tolist() == [4, 2] and 2 < MIN_POINTS
+    assert np.isfinite(fit["params"][0]).all()
+    assert np.isnan(fit["params"][1]).all()
+    # one spare observation: the covariance is estimable for the first series only
+    assert np.isfinite(fit["cov"][0]).all() and np.isnan(fit["cov"][1]).all()
+
+
+def test_unknown_curve_is_rejected():
+    with pytest.raises(ValueError, match="Unknown growth curve"):
+        fit_growth_batch([2020, 2021, 2022], [1, 2, 3], curve="richards")
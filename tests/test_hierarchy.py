@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hierarchy import METHODS, build_hierarchy, coherence_error, reconcile
+
+
+@pytest.fixture
+def hierarchy():
+    series = pd.DataFrame({
+        "indicator_code": ["ACC"] * 5 + ["USERS"] * 3 + ["ACC"],
+        "gender": ["all", "female", "male", "all", "all", "all", "female", "male", "gap"],
+        "location": ["national", "national", "national", "rural", "urban", "national", "national", "national",
+                     "national"],
+        "region": "all",
+        "unit": ["%"] * 5 + ["count"] * 3 + ["pp"],
+    })
+    return build_hierarchy(series)
+
+
+def base_forecasts(hierarchy, horizon=3, seed=0):
+    # incoherent base forecasts for the nodes that have data, NaN elsewhere
+    rng = np.random.default_rng(seed)
+    nodes = hierarchy["nodes"]
+    base = np.where((nodes["series_idx"] >= 0).to_numpy()[:, None],
+                    np.where((nodes["kind"] == "rate").to_numpy()[:, None], 45.0, 1e6) * rng.uniform(0.9, 1.1, (len(nodes), horizon)),
+                    np.nan)
+    variance = np.abs(base) * 0.01
+    return base, variance
+
+
+def test_summing_matrix(hierarchy):
+    nodes, S = hierarchy["nodes"], hierarchy["S"].toarray()
+    assert hierarchy["skipped"].tolist() == [8]
+    # rates average their groups, counts add them up
+    rate_rows = (nodes["kind"] == "rate").to_numpy()
+    np.testing.assert_allclose(S[rate_rows].sum(axis=1), 1.0)
+    users_total = np.flatnonzero((nodes["indicator_code"] == "USERS") & (nodes["level"] == "total"))[0]
+    assert S[users_total].sum() == 2.0
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_reconciled_forecasts_are_coherent(hierarchy, method):
+    base, variance = base_forecasts(hierarchy)
+    assert coherence_error(hierarchy, np.nan_to_num(base)) > 1.0
+
+    coherent = reconcile(hierarchy, base, variance, method=method)
+    assert coherent.shape == base.shape
+    assert coherence_error(hierarchy, coherent) == pytest.approx(0.0, abs=1e-6)
+
+
+def test_coherent_base_is_unchanged(hierarchy):
+    bottom = np.array([[40.0], [60.0], [50.0], [70.0], [1e6], [2e6]])
+    coherent = hierarchy["S"] @ bottom
+    for method in METHODS:
+        np.testing.assert_allclose(reconcile(hierarchy, coherent, np.ones_like(coherent), method=method),
+                                   coherent, rtol=1e-6)
+
+
+def test_mint_needs_variances(hierarchy):
+    base, _ = base_forecasts(hierarchy)
+    with pytest.raises(ValueError, match="variances"):
+        reconcile(hierarchy, base, method="mint")
+    with pytest.raises(ValueError, match="Unknown reconciliation method"):
+        reconcile(hierarchy, base, method="top_down")
@@ -0,0 +1,119 @@
+import json
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from enrich_data import RecordIdAllocator
+from ingest import ingest_files, read_chunks
+
+MAIN_COLUMNS = ["record_id", "record_type", "category", "pillar", "indicator", "indicator_code", "value_numeric",
+                "observation_date", "source_name", "confidence"]
+LINK_COLUMNS = ["record_id", "parent_id", "record_type", "pillar", "related_indicator", "impact_direction",
+                "impact_estimate", "lag_months"]
+
+REF_CODES = pd.DataFrame({
+    "field": ["pillar", "pillar", "confidence", "confidence", "category", "category"],
+    "code": ["ACCESS", "USAGE", "high", "medium", "policy", "product_launch"],
+    "applies_to": ["All", "All", "All", "All", "event", "event"],
+})
+
+
+def existing_tables():
+    main = pd.DataFrame({
+        "record_id": ["REC_0001", "REC_0002", "EVT_0001"],
+        "record_type": ["observation", "observation", "event"],
+        "category": [np.nan, np.nan, "policy"],
+        "pillar": ["ACCESS", "USAGE", np.nan],
+        "indicator": ["Account ownership", "Digital payments", "NFIS-II launch"],
+        "indicator_code": ["ACC_OWNERSHIP", "USG_DIGITAL_PAYMENT", np.nan],
+        "value_numeric": [46.0, 21.0, np.nan],
+        "observation_date": pd.to_datetime(["2021-12-31", "2021-12-31", "2021-09-01"]),
+        "source_name": "Findex",
+        "confidence": "high",
+    }, columns=MAIN_COLUMNS)
+    links = pd.DataFrame({"record_id": ["IMP_0001"], "parent_id": ["EVT_0001"], "record_type": ["impact_link"],
+                          "pillar": ["ACCESS"], "related_indicator": ["ACC_OWNERSHIP"],
+                          "impact_direction": ["increase"], "impact_estimate": [3.0], "lag_months": [12.0]},
+                         columns=LINK_COLUMNS)
+    return main, links
+
+
+def write_records(tmp_path):
+    records = [
+        {"record_type": "observation", "pillar": "ACCESS", "indicator": "Account ownership",
+         "indicator_code": "ACC_OWNERSHIP", "value_numeric": "49", "observation_date": "2024-11-29",
+         "confidence": "high"},
+        {"record_type": "observation", "pillar": "ACCESS", "indicator_code": "ACC_OWNERSHIP",
+         "value_numeric": "forty", "observation_date": "2024-11-29", "confidence": "high"},
+        {"record_type": "observation", "pillar": "SAVINGS", "indicator_code": "ACC_OWNERSHIP",
+         "value_numeric": "50", "observation_date": "2024-11-29", "confidence": "high"},
+        {"record_type": "event", "category": "product_launch", "indicator": "Telebirr launch",
+         "observation_date": "2021-05-11", "confidence": "high"},
+        {"record_type": "event", "category": "policy", "indicator": "Missing date", "confidence": "high"},
+        {"record_type": "observation", "record_id": "REC_0002", "pillar": "USAGE",
+         "indicator_code": "USG_DIGITAL_PAYMENT", "value_numeric": "30", "observation_date": "2024-11-29",
+         "confidence": "medium"},
+        {"record_type": "survey", "indicator_code": "X"},
+    ]
+    path = tmp_path / "records.csv"
+    pd.DataFrame(records).to_csv(path, index=False)
+    # a link to the event above, in a second file
+    link = {"record_type": "impact_link", "parent_id": "EVT_0002", "pillar": "USAGE",
+            "related_indicator": "USG_DIGITAL_PAYMENT", "impact_direction": "increase", "impact_estimate": 8,
+            "lag_months": 6}
+    orphan = dict(link, parent_id="EVT_0404")
+    jsonl = tmp_path / "links.jsonl"
+    jsonl.write_text("\n".join(json.dumps(r) for r in (link, orphan)) + "\n")
+    return path, jsonl
+
+
+def test_ingest_files_splits_valid_rows_and_violations(tmp_path):
+    main, links = existing_tables()
+    csv_path, jsonl_path = write_records(tmp_path)
+    allocator = RecordIdAllocator(main, links)
+    batch = ingest_files([csv_path, jsonl_path], main, links, ref_codes=REF_CODES, allocator=allocator,
+                         chunksize=3)
+
+    assert batch["observations"]["record_id"].tolist() == ["REC_0003"]
+    assert batch["observations"]["value_numeric"].tolist() == [49.0]
+    assert batch["events"]["record_id"].tolist() == ["EVT_0002"]
+    assert batch["impact_links"]["record_id"].tolist() == ["IMP_0002"]
+    assert batch["impact_links"]["parent_id"].tolist() == ["EVT_0002"]
+    assert list(batch["observations"].columns) == MAIN_COLUMNS
+    assert list(batch["impact_links"].columns) == LINK_COLUMNS
+
+    issues = set(zip(batch["violations"]["field"], batch["violations"]["issue"]))
+    assert issues == {
+        ("value_numeric", "not a number"),
+        ("pillar", "not in reference codes"),
+        ("observation_date", "required field missing"),
+        ("record_id", "record_id already in use"),
+        ("record_type", "unknown record type"),
+        ("parent_id", "unknown event"),
+    }
+    # rows are numbered per file, across chunks
+    assert batch["violations"].loc[batch["violations"]["issue"] == "unknown record type", "row"].tolist() == [6]
+    assert allocator.peek("REC") == "REC_0004"
+
+
+def test_read_chunks(tmp_path):
+    csv_path, jsonl_path = write_records(tmp_path)
+    assert [len(chunk) for chunk in read_chunks(csv_path, chunksize=3)] == [3, 3, 1]
+    assert sum(len(chunk) for chunk in read_chunks(jsonl_path)) == 2
+
+
+def test_chunks_without_new_rows_are_skipped(tmp_path):
+    main, links = existing_tables()
+    csv_path, jsonl_path = write_records(tmp_path)
+    whole = ingest_files([csv_path, jsonl_path], main, links, ref_codes=REF_CODES)
+    with warnings.catch_warnings():
+        # pandas 2.x warns when concat gets empty or all-NA frames
+        warnings.simplefilter("error", FutureWarning)
+        # chunks of one row: most produce no main or link rows at all
+        batch = ingest_files([csv_path, jsonl_path], main, links, ref_codes=REF_CODES, chunksize=1)
+
+    # empty parts would have turned the date and id columns into object
+    for table in ("observations", "events", "impact_links"):
+        pd.testing.assert_frame_equal(batch[table], whole[table])
+    assert pd.api.types.is_datetime64_any_dtype(batch["observations"]["observation_date"])
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_loader import apply_schema
+from mixed_frequency import MonthlyPanel
+
+
+def make_table():
+    rows = [
+        # Findex stock points, plus an operator figure Findex takes precedence over
+        ("ACC_OWNERSHIP", 46.0, "%", "Global Findex", "2021-12-15", None, None),
+        ("ACC_OWNERSHIP", 49.0, "%", "Global Findex", "2024-11-29", None, None),
+        ("ACC_OWNERSHIP", 60.0, "%", "Operator report", "2023-06-30", None, None),
+        # fiscal-year flows (Ethiopian FY: July to June)
+        ("USG_P2P_COUNT", 1200.0, "transactions", "NBE", "2024-06-30", "2023-07-01", "2024-06-30"),
+        ("USG_P2P_COUNT", 2400.0, "transactions", "NBE", "2025-06-30", "2024-07-01", "2025-06-30"),
+        # a flow without a period covers the 12 months to its date
+        ("USG_P2P_VALUE", 600.0, "ETB", "NBE", "2024-12-31", None, None),
+    ]
+    df = pd.DataFrame(rows, columns=["indicator_code", "value_numeric", "unit", "source_name",
+                                     "observation_date", "period_start", "period_end"])
+    df["record_type"] = "observation"
+    df["gender"] = "all"
+    df["location"] = "national"
+    return apply_schema(df)
+
+
+def test_flows_are_spread_over_their_months():
+    panel = MonthlyPanel.from_data(make_table())
+    labels = list(panel.labels())
+    count = panel.values[labels.index("USG_P2P_COUNT")]
+    observed = panel.observed[labels.index("USG_P2P_COUNT")]
+
+    assert observed.sum() == 24
+    np.testing.assert_allclose(np.nansum(count[observed][:12]), 1200.0)
+    np.testing.assert_allclose(count[observed], np.repeat([100.0, 200.0], 12))
+    value = panel.values[labels.index("USG_P2P_VALUE")]
+    assert np.isfinite(value).sum() == 12
+    np.testing.assert_allclose(np.nansum(value), 600.0)
+    assert panel.series.set_index("indicator_code").loc["USG_P2P_COUNT", "kind"] == "flow"
+
+
+def test_annual_values():
+    annual = MonthlyPanel.from_data(make_table()).annual()
+
+    # calendar 2024: the second half of FY2023/24 and the first half of FY2024/25
+    assert annual.loc[2024, "USG_P2P_COUNT"] == pytest.approx(6 * 100.0 + 6 * 200.0)
+    assert annual.loc[2024, "USG_P2P_VALUE"] == pytest.approx(600.0)
+    # flows need all 12 months of a year
+    assert np.isnan(annual.loc[2023, "USG_P2P_COUNT"])
+    # stocks: December once interpolated (the operator's 60% is ignored), the
+    # survey month in the last Findex year
+    assert annual.loc[2021, "ACC_OWNERSHIP"] == pytest.approx(46.0)
+    assert annual.loc[2022, "ACC_OWNERSHIP"] == pytest.approx(46.0 + 3.0 * 12 / 35, rel=1e-6)
+    assert annual.loc[2024, "ACC_OWNERSHIP"] == pytest.approx(49.0)
+
+
+def test_interpolation_methods():
+    panel = MonthlyPanel.from_data(make_table())
+    row = list(panel.labels()).index("ACC_OWNERSHIP")
+    linear = panel.interpolate("linear")[row]
+    ffill = panel.interpolate("ffill")[row]
+    last_obs = np.flatnonzero(panel.observed[row])[-1]
+
+    assert np.isnan(linear[last_obs + 1:]).all()
+    assert (ffill[last_obs:] == 49.0).all()
+    with pytest.raises(ValueError, match="Unknown interpolation"):
+        panel.interpolate("cubic")
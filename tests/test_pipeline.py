@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+import pipeline
+
+# a.py copies in.txt to mid.txt and b.py mid.txt to out.txt; both log their runs
+SCRIPT = """import sys
+from pathlib import Path
+src, dst, name = sys.argv[1:]
+with open('runs.log', 'a') as fh:
+    fh.write(name + '\\n')
+if Path('fail').exists() and Path('fail').read_text() == name:
+    sys.exit(1)
+Path(dst).write_text(Path(src).read_text())
+"""
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    (tmp_path / "a.py").write_text(SCRIPT)
+    (tmp_path / "b.py").write_text(SCRIPT + "# b\n")
+    (tmp_path / "in.txt").write_text("1")
+    stages = {
+        "a": {"cmd": ["a.py", "in.txt", "mid.txt", "a"], "deps": [], "inputs": ["in.txt", "a.py"],
+              "outputs": ["mid.txt"]},
+        "b": {"cmd": ["b.py", "mid.txt", "out.txt", "b"], "deps": ["a"], "inputs": ["mid.txt", "b.py"],
+              "outputs": ["out.txt"]},
+    }
+    monkeypatch.setattr(pipeline, "ROOT", tmp_path)
+    monkeypatch.setattr(pipeline, "STAGES", stages)
+    # state, run log and stage logs are relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def statuses(run):
+    return {record["stage"]: record["status"] for record in run["stages"]}
+
+
+def runs(project):
+    log = project / "runs.log"
+    lines = log.read_text().split() if log.exists() else []
+    log.unlink(missing_ok=True)
+    return lines
+
+
+def test_unchanged_stages_are_skipped(project):
+    assert statuses(pipeline.run_pipeline()) == {"a": "ran", "b": "ran"}
+    assert runs(project) == ["a", "b"] and (project / "out.txt").read_text() == "1"
+
+    assert statuses(pipeline.run_pipeline()) == {"a": "skipped", "b": "skipped"}
+    assert runs(project) == []
+    state = json.loads((project / pipeline.STATE_PATH).read_text())
+    assert set(state["stages"]) == {"a", "b"}
+    assert len((project / pipeline.RUN_LOG).read_text().splitlines()) == 2
+
+
+def test_changes_rerun_the_stage_and_what_reads_its_outputs(project):
+    pipeline.run_pipeline()
+    runs(project)
+
+    (project / "in.txt").write_text("2")
+    assert statuses(pipeline.run_pipeline()) == {"a": "ran", "b": "ran"}
+    assert (project / "out.txt").read_text() == "2"
+    runs(project)
+
+    # code of the downstream stage only
+    (project / "b.py").write_text(SCRIPT + "# b, edited\n")
+    assert statuses(pipeline.run_pipeline()) == {"a": "skipped", "b": "ran"}
+    # a missing output reruns its stage
+    (project / "out.txt").unlink()
+    assert statuses(pipeline.run_pipeline(["b"])) == {"a": "skipped", "b": "ran"}
+    assert statuses(pipeline.run_pipeline(force=True)) == {"a": "ran", "b": "ran"}
+
+
+def test_dry_run_and_failures(project):
+    assert statuses(pipeline.run_pipeline(dry_run=True)) == {"a": "would run", "b": "would run"}
+    assert runs(project) == [] and not (project / pipeline.STATE_PATH).exists()
+
+    (project / "fail").write_text("a")
+    run = pipeline.run_pipeline()
+    assert statuses(run) == {"a": "failed", "b": "blocked"}
+    assert run["stages"][0]["returncode"] == 1
+    # a failed stage is not recorded as done, so it runs again
+    (project / "fail").unlink()
+    assert statuses(pipeline.run_pipeline()) == {"a": "ran", "b": "ran"}
+
+    with pytest.raises(ValueError, match="Unknown stage"):
+        pipeline.run_pipeline(["c"])
@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from data_loader import apply_schema
+from profiler import load_profile, profile_data, profile_table, write_profile
+
+
+def make_table():
+    return pd.DataFrame({
+        "record_id": ["REC_0001", "REC_0002", "REC_0003", "EVT_0001", "REC_0003", "TGT_0001"],
+        "record_type": ["observation", "observation", "observation", "event", "observation", "target"],
+        "pillar": ["ACCESS", "USAGE", "ACCESS", np.nan, "ACCESS", "ACCESS"],
+        "confidence": ["high", "high", "medium", "high", "low", "medium"],
+        "indicator_code": ["ACC_OWNERSHIP", "USG_DIGITAL_PAYMENT", "ACC_OWNERSHIP", "EVT_TELEBIRR",
+                           "ACC_OWNERSHIP", "ACC_OWNERSHIP"],
+        "value_numeric": [22.0, 10.0, 46.0, np.nan, 49.0, 70.0],
+        "observation_date": ["2014-12-31", "2017-12-31", "2021-12-31", "2021-05-11", "2024-11-29",
+                             "2030-12-31"],
+        "impact_direction": [np.nan] * 6,
+    })
+
+
+def test_profile_matches_per_record_type_filters():
+    df = make_table()
+    profile = profile_table(df)
+
+    assert profile["n_rows"] == 6
+    pillar = profile["columns"]["pillar"]
+    assert (pillar["missing"], pillar["missing_pct"], pillar["n_unique"]) == (1, 16.67, 2)
+    # the loop over record types that one grouped count replaced
+    for col in ("pillar", "confidence"):
+        for rt, part in df.groupby("record_type"):
+            expected = part[col].value_counts().to_dict()
+            assert profile["value_counts_by_record_type"][col].get(rt, {}) == expected
+        assert profile["value_counts"][col] == df[col].value_counts().to_dict()
+    assert "impact_direction" not in profile["value_counts"]
+
+    assert profile["indicators"]["by_record_type"]["observation"] == {"ACC_OWNERSHIP": 3, "USG_DIGITAL_PAYMENT": 1}
+    assert profile["temporal"]["observation_date"] == {"min": "2014-12-31 00:00:00", "max": "2030-12-31 00:00:00",
+                                                       "n_unique": 6}
+    assert profile["years"] == {"observed": [2014, 2017, 2021, 2024], "gaps": [[2014, 2017], [2017, 2021],
+                                                                                [2021, 2024]]}
+    assert profile["duplicates"] == {"n_rows": 2, "record_ids": {"REC_0003": {"count": 2,
+                                                                                "record_types": ["observation"]}}}
+
+
+def test_typed_table_gives_the_same_counts():
+    df = make_table()
+    plain = profile_table(df)
+    typed = profile_table(apply_schema(df))
+    for key in ("value_counts", "value_counts_by_record_type", "indicators", "years", "duplicates"):
+        assert typed[key] == plain[key]
+    assert typed["columns"]["pillar"]["dtype"] == "category"
+
+
+def test_profile_round_trip(tmp_path):
+    links = pd.DataFrame({"record_id": ["IMP_0001"], "parent_id": ["EVT_0001"], "record_type": ["impact_link"],
+                          "related_indicator": ["ACC_OWNERSHIP"], "impact_direction": ["increase"]})
+    profile = profile_data(apply_schema(make_table()), links)
+    path = write_profile(profile, tmp_path / "profile.json")
+
+    assert load_profile(path) == json.loads(json.dumps(profile))
+    assert load_profile(tmp_path / "missing.json") is None
+    assert profile["tables"]["impact_links"]["indicators"]["counts"] == {"ACC_OWNERSHIP": 1}
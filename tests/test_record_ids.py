@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from enrich_data import RecordIdAllocator, get_next_record_id
+
+
+def test_allocator_continues_after_highest_id_per_prefix():
+    main = pd.DataFrame({"record_id": ["REC_0001", "REC_0007", "EVT_0003", None]})
+    links = pd.DataFrame({"record_id": ["IMP_0012"]})
+    allocator = RecordIdAllocator(main, links)
+
+    assert allocator.peek("REC") == "REC_0008"
+    assert allocator.allocate("REC", 3) == ["REC_0008", "REC_0009", "REC_0010"]
+    assert allocator.next_id("EVT") == "EVT_0004"
+    assert allocator.next_id("IMP") == "IMP_0013"
+    assert allocator.next_id("NEW") == "NEW_0001"
+
+
+def test_allocator_never_reuses_an_id():
+    allocator = RecordIdAllocator(pd.Series(["REC_0001"]))
+    allocator.reserve("REC_0003")
+    ids = allocator.allocate("REC", 5)
+
+    assert len(set(ids)) == 5
+    assert "REC_0001" not in ids and "REC_0003" not in ids
+    assert allocator.is_taken(["REC_0003", "REC_0099"]).tolist() == [True, False]
+    with pytest.raises(ValueError, match="collision"):
+        allocator.reserve("REC_0003")
+
+
+def test_peek_does_not_reserve():
+    allocator = RecordIdAllocator(pd.Series(["EVT_0002"]))
+    assert allocator.peek("EVT") == allocator.peek("EVT") == "EVT_0003"
+    assert allocator.next_id("EVT") == "EVT_0003"
+
+
+def test_get_next_record_id_matches_allocator():
+    df = pd.DataFrame({"record_id": ["REC_0004", "REC_0010", "EVT_0001"]})
+    assert get_next_record_id(df) == "REC_0011"
+    assert get_next_record_id(df, prefix="EVT") == "EVT_0002"
@@ -0,0 +1,91 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from task4_forecast import fit_linear, fit_logit_linear, predict_linear, predict_logit_linear
+from task4_scenarios import DEFAULT_GRID, evaluate_chunk, grid_size, iter_chunks, load_grid, run_grid
+
+
+@pytest.fixture
+def data():
+    rows = [("Account Ownership Rate", "Global Findex", year, value)
+            for year, value in [(2011, 14.0), (2014, 22.0), (2017, 35.0), (2021, 46.0), (2024, 49.0)]]
+    rows += [("Mobile Money Account Rate", "Global Findex", year, value)
+             for year, value in [(2014, 0.0), (2017, 0.3), (2021, 4.7), (2024, 9.5)]]
+    rows += [("Account Ownership Rate", "NFIS-II strategy", 2025, 70.0)]
+    return pd.DataFrame(rows, columns=["indicator", "source_name", "fiscal_year", "value_numeric"])
+
+
+def grid(**overrides):
+    g = dict(DEFAULT_GRID, band=[1.0, 2.0], event_lift=[[5.0, 3.0], [0.0]], target_year=[None, 2030])
+    g.update(overrides)
+    return g
+
+
+def test_evaluate_chunk_bands_lifts_and_targets():
+    years_fore = np.array([2025, 2026, 2027])
+    fitted = {("A", "linear"): {"baseline": np.array([50.0, 52.0, 54.0]), "se": np.array([1.0, 2.0, 3.0]),
+                                "last_year": 2024.0, "last_val": 49.0, "nfis_year": 2025.0, "nfis_val": 70.0}}
+    scenarios = [("A", "linear", 2.0, [5.0, 3.0], None, None), ("A", "linear", 1.0, [1.0], 2027, 55.0)]
+    out = evaluate_chunk(10, scenarios, fitted, years_fore)
+
+    assert out["scenario_id"].tolist() == [10, 10, 10, 11, 11, 11]
+    assert out["year"].dtype == np.int64
+    first, second = out[out["scenario_id"] == 10], out[out["scenario_id"] == 11]
+    np.testing.assert_allclose(first["optimistic"], [52.0, 56.0, 60.0])
+    np.testing.assert_allclose(first["pessimistic"], [48.0, 48.0, 48.0])
+    np.testing.assert_allclose(first["event_augmented"], [55.0, 55.0, 54.0])
+    # default target: the NFIS target, reached in 2025
+    np.testing.assert_allclose(first["target_path"], [70.0, 70.0, 70.0])
+    np.testing.assert_allclose(second["event_augmented"], [51.0, 52.0, 54.0])
+    np.testing.assert_allclose(second["target_path"], [51.0, 53.0, 55.0])
+    assert second["event_lift"].iloc[0] == "1/0/0"
+
+
+def test_run_grid_matches_direct_fits(data, tmp_path):
+    g = grid()
+    path = run_grid(data, g, out_dir=tmp_path, workers=1, chunk_size=5, run_id="inline")
+    out = pd.read_parquet(path)
+
+    assert len(out) == grid_size(g) * len(g["years"])
+    assert out["scenario_id"].nunique() == grid_size(g)
+    assert out["year"].dtype == np.int64
+    years, vals = np.array([2011, 2014, 2017, 2021, 2024.0]), np.array([14.0, 22.0, 35.0, 46.0, 49.0])
+    for model, fit, predict in [("linear", fit_linear, predict_linear),
+                                ("logit_linear", fit_logit_linear, predict_logit_linear)]:
+        baseline, se = predict(fit(years, vals), np.array(g["years"], dtype=float))
+        rows = out[(out["series"] == "Account Ownership Rate") & (out["model"] == model) & (out["band"] == 1.0)]
+        for _, scenario in rows.groupby("scenario_id"):
+            np.testing.assert_allclose(scenario["baseline"], baseline)
+            np.testing.assert_allclose(scenario["optimistic"], baseline + se)
+
+
+def test_pool_gives_the_inline_result(data, tmp_path):
+    g = grid()
+    inline = pd.read_parquet(run_grid(data, g, out_dir=tmp_path, workers=1, run_id="inline"))
+    pooled = pd.read_parquet(run_grid(data, g, out_dir=tmp_path, workers=2, chunk_size=3, run_id="pool"))
+    # chunks are written in completion order
+    pooled = pooled.sort_values(["scenario_id", "year"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(pooled, inline)
+
+
+def test_grid_loading(tmp_path):
+    path = tmp_path / "grid.json"
+    path.write_text(json.dumps({"series": "Account Ownership Rate", "band": [1.5]}))
+    g = load_grid(path)
+    assert g["series"] == ["Account Ownership Rate"] and g["model"] == DEFAULT_GRID["model"]
+    assert [len(chunk) for _, chunk in iter_chunks(g, 3)] == [3, 1]
+
+    path.write_text(json.dumps({"model": ["arima"]}))
+    with pytest.raises(ValueError, match="Unknown models"):
+        load_grid(path)
+    path.write_text(json.dumps({"horizon": 5}))
+    with pytest.raises(ValueError, match="Unknown scenario grid keys"):
+        load_grid(path)
+
+
+def test_short_series_is_rejected(data, tmp_path):
+    with pytest.raises(ValueError, match="fewer than two"):
+        run_grid(data[data["fiscal_year"] < 2014], grid(), out_dir=tmp_path, workers=1)
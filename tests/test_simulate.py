@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from task4_forecast import fit_linear, fit_logit_linear, safe_inv_logit
+from task4_simulate import _cov_factor, event_impact_ranges, simulate_forecast
+
+YEARS = np.array([2011, 2014, 2017, 2021, 2024], dtype=float)
+VALUES = np.array([14.0, 22.0, 35.0, 46.0, 49.0])
+YEARS_FORE = np.array([2025.0, 2026.0, 2027.0])
+QUANTILES = (0.025, 0.5, 0.975)
+
+
+def direct_paths(model, years_pred, n_draws, seed, logit=False, impacts=None, active=None):
+    # the draws simulate_forecast makes when everything fits in one chunk
+    rng = np.random.default_rng(seed)
+    Xp = np.stack([np.ones_like(years_pred), years_pred], axis=-1)
+    dof = model["n"] - 2
+    sigma = np.sqrt(dof * model["s2"] / rng.chisquare(dof, size=n_draws))[:, None]
+    beta = model["beta"] + sigma * (rng.standard_normal((n_draws, 2)) @ _cov_factor(model["XtX_inv"]).T)
+    paths = beta @ Xp.T + sigma * rng.standard_normal((n_draws, len(years_pred)))
+    if logit:
+        paths = safe_inv_logit(paths) * 100.0
+    if impacts is not None:
+        lifts = rng.triangular(impacts["low"], impacts["mode"], impacts["high"], size=(n_draws, len(impacts)))
+        paths += lifts @ active
+    return np.clip(paths, 0.0, 100.0)
+
+
+def assert_quantiles_match(sim, paths):
+    # a histogram quantile lies in the bin of the order statistic; the support
+    # is clipped to 0-100% here, so bins are 100 / 20_000 wide at most
+    for q in QUANTILES:
+        expected = np.quantile(paths, q, axis=0, method="inverted_cdf")
+        np.testing.assert_allclose(sim[f"q{q:g}"], expected, atol=100 / 20_000)
+    np.testing.assert_allclose(sim["mean"], paths.mean(axis=0))
+    np.testing.assert_allclose(sim["sd"], paths.std(axis=0), rtol=1e-6)
+
+
+@pytest.mark.parametrize("fit, logit", [(fit_linear, False), (fit_logit_linear, True)])
+def test_quantiles_match_np_quantile(fit, logit):
+    model = fit(YEARS, VALUES)
+    sim = simulate_forecast(model, YEARS_FORE, n_draws=20_000, logit=logit, quantiles=QUANTILES, seed=3)
+    paths = direct_paths(model, YEARS_FORE, 20_000, seed=3, logit=logit)
+    assert_quantiles_match(sim, paths)
+
+
+def test_quantiles_with_impacts_match_np_quantile():
+    model = fit_linear(YEARS, VALUES)
+    impacts = pd.DataFrame({"low": [1.0, -5.0], "mode": [3.0, -2.0], "high": [5.0, -1.0],
+                            "event_year": [2025.0, 2025.5], "onset_year": [2025.0, 2025.5],
+                            "lag_months": [0.0, 0.0], "ramp_months": [0.0, 24.0]})
+    sim = simulate_forecast(model, YEARS_FORE, n_draws=20_000, impacts=impacts, quantiles=QUANTILES, seed=5)
+    # the immediate link is in full from 2025; the 24-month ramp from mid-2025
+    # is about a quarter in at the end of 2025 and complete by the end of 2027
+    ramp = np.clip((YEARS_FORE + 1 - 2025.5) * 365.25 / 30.44 / 24, 0.0, 1.0)
+    np.testing.assert_allclose(ramp, [0.25, 0.75, 1.0], atol=1e-3)
+    active = np.vstack([np.ones(3), ramp])
+    paths = direct_paths(model, YEARS_FORE, 20_000, seed=5, impacts=impacts, active=active)
+    assert_quantiles_match(sim, paths)
+
+
+def test_short_trend_gives_nan_quantiles():
+    with pytest.warns(UserWarning, match="no residual variance"):
+        sim = simulate_forecast(fit_linear(YEARS[:2], VALUES[:2]), YEARS_FORE, n_draws=100)
+    assert sim.drop(columns="year").isna().all().all()
+
+
+def test_impact_ranges_follow_the_event_category():
+    events = pd.DataFrame({"record_id": ["EVT_1", "EVT_2", "EVT_3"],
+                           "category": ["policy", "product_launch", "pricing"],
+                           "observation_date": pd.to_datetime(["2025-01-01", "2025-01-01", "2020-01-01"])})
+    links = pd.DataFrame({"record_id": ["IMP_1", "IMP_2", "IMP_3"], "parent_id": ["EVT_1", "EVT_2", "EVT_3"],
+                          "related_indicator": "ACC_OWNERSHIP", "impact_estimate": [4.0, -2.0, 3.0],
+                          "impact_magnitude": ["low", "low", "low"], "lag_months": [6.0, np.nan, 0.0]})
+    ranges = event_impact_ranges(events, links, "ACC_OWNERSHIP", after_year=2024.9)
+
+    # EVT_3's effect started before after_year, so it is already in the history
+    assert ranges["record_id"].tolist() == ["IMP_1", "IMP_2"]
+    assert ranges["ramp_months"].tolist() == [24.0, 12.0]
+    assert ranges["lag_months"].tolist() == [6.0, 0.0]
+    np.testing.assert_allclose(ranges["low"], [1.0, -5.0])
+    np.testing.assert_allclose(ranges["high"], [5.0, -1.0])
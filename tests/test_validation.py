@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from validation import RuleSet, validate_tables
+
+REF_CODES = pd.DataFrame({
+    "field": ["pillar", "pillar", "confidence", "confidence", "category", "category"],
+    "code": ["ACCESS", "USAGE", "high", "medium", "policy", "product_launch"],
+    "applies_to": ["All", "All", "All", "All", "event", "event"],
+})
+
+
+def test_rule_set_scopes_fields_to_record_types():
+    rules = RuleSet.from_reference_codes(REF_CODES)
+    assert rules.applies_to["category"] == frozenset({"event"})
+    assert rules.applies_to["pillar"] is None
+
+    df = pd.DataFrame({
+        "record_id": ["REC_1", "REC_2", "EVT_1", "EVT_2", "REC_3"],
+        "record_type": ["observation", "observation", "event", "event", "observation"],
+        "pillar": ["ACCESS", "GENDER", np.nan, "ACCESS", "GENDER"],
+        "category": ["anything", np.nan, "policy", "rumour", np.nan],
+    })
+    masks = rules.check(df)
+    assert masks["pillar"].tolist() == [False, True, False, False, True]
+    assert masks["category"].tolist() == [False, False, False, True, False]
+
+    report = rules.validate(df)
+    pillar = report[report["field"] == "pillar"].iloc[0]
+    assert (pillar["value"], pillar["count"], pillar["first_row"], pillar["example_id"]) == ("GENDER", 2, 1, "REC_2")
+
+
+def test_categorical_columns_give_the_same_result():
+    rules = RuleSet({"pillar": ["ACCESS", "USAGE"]})
+    df = pd.DataFrame({"record_type": "observation", "pillar": ["ACCESS", "X", np.nan, "X", "USAGE"]})
+    plain = rules.check(df)["pillar"]
+    categorical = rules.check(df.astype({"pillar": "category"}))["pillar"]
+    assert plain.tolist() == categorical.tolist() == [False, True, False, True, False]
+
+
+def test_validate_report_counts_each_value_and_record_type():
+    rules = RuleSet.from_reference_codes(REF_CODES)
+    df = pd.DataFrame({
+        "record_id": ["REC_1", "EVT_1", "REC_2", "EVT_2", "REC_3"],
+        "record_type": ["observation", "event", "observation", "event", "observation"],
+        "pillar": ["GENDER", "GENDER", "ACCESS", np.nan, "GENDER"],
+        "confidence": ["high", "low", "low", "high", "medium"],
+    })
+    report = rules.validate(df).sort_values(["field", "record_type"]).reset_index(drop=True)
+    assert list(report.columns) == ["field", "value", "record_type", "count", "first_row", "example_id"]
+    assert report[["field", "value", "record_type", "count", "first_row", "example_id"]].values.tolist() == [
+        ["confidence", "low", "event", 1, 1, "EVT_1"],
+        ["confidence", "low", "observation", 1, 2, "REC_2"],
+        ["pillar", "GENDER", "event", 1, 1, "EVT_1"],
+        ["pillar", "GENDER", "observation", 2, 0, "REC_1"],
+    ]
+    assert rules.validate(df[df["pillar"] != "GENDER"].assign(confidence="high")).empty
+
+
+def test_validate_tables_labels_tables():
+    main = pd.DataFrame({"record_id": ["REC_1"], "record_type": ["observation"], "pillar": ["GENDER"]})
+    links = pd.DataFrame({"record_id": ["IMP_1"], "record_type": ["impact_link"], "pillar": ["SAVINGS"]})
+    report = validate_tables(main, links, RuleSet.from_reference_codes(REF_CODES))
+    assert sorted(report["table"]) == ["impact_links", "main"]